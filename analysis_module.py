@@ -7,26 +7,135 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 from scipy.stats import pearsonr, spearmanr
+from engine.ccf import MAX_LAG, cross_correlation_table, peak_lags
+from engine.downsample import downsample_indices
+from engine.models import find_columns
+from engine.seasonal import SeasonalDecomposition
 import warnings
 warnings.filterwarnings('ignore')
 
+# Columns of describe_cases, in order
+CASE_STATISTICS = ['count', 'sum', 'mean', 'median', 'std', 'min', 'max', 'q1', 'q3', 'cv']
+
+
+def describe_cases(values, codes=None, n_groups=1):
+    """
+    Descriptive statistics of values, overall or per group, in one kernel
+
+    One sort by (group, value) yields min, max, median and quartiles by
+    position; counts, sums and squared deviations come from bincounts.
+    Codes below zero and NaN values are skipped; std uses ddof=1 and cv is
+    std / mean in percent (pandas conventions).
+
+    Returns an (n_groups, len(CASE_STATISTICS)) array.
+    """
+    values = np.asarray(values, dtype=float)
+    codes = np.zeros(len(values), dtype=int) if codes is None else np.asarray(codes)
+    keep = ~np.isnan(values) & (codes >= 0)
+    values, codes = values[keep], codes[keep]
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+
+    count = np.bincount(codes, minlength=n_groups)
+    total = np.bincount(codes, weights=values, minlength=n_groups)
+    starts = np.cumsum(count) - count
+    present = count > 0
+    last = np.maximum(count - 1, 0)
+
+    def at(offsets):
+        picked = np.full(n_groups, np.nan)
+        picked[present] = values[(starts + offsets)[present]]
+        return picked
+
+    def quantile(q):
+        position = q * last
+        below = np.floor(position).astype(int)
+        low, high = at(below), at(np.minimum(below + 1, last))
+        return low + (position - below) * (high - low)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        deviations = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=n_groups)
+        std = np.sqrt(deviations / (count - 1))
+        std[count < 2] = np.nan
+        cv = std / mean * 100
+    return np.column_stack([count, total, mean, quantile(0.5), std, at(0), at(last),
+                            quantile(0.25), quantile(0.75), cv])
+
+
 class DengueAnalyzer:
     """Comprehensive dengue epidemiological analysis"""
     
     def __init__(self, df):
         self.df = df.dropna(subset=['CASES'])
     
+    @property
+    def df(self):
+        return self._df
+    
+    @df.setter
+    def df(self, df):
+        self._df = df
+        self.invalidate()
+    
+    def invalidate(self):
+        """Drop memoized statistics (call after editing self.df in place)"""
+        self._statistics = {}
+    
+    def case_statistics(self, by=None):
+        """
+        CASE_STATISTICS of CASES, overall or grouped
+
+        Args:
+            by: None, a column such as 'MUNICIPALITY', 'YEAR_2' or
+                'QUARTER', or a list of columns
+
+        Returns:
+            DataFrame with one row per group (one row for the overall
+            statistics). Memoized per grouping until the data changes.
+        """
+        by = [] if by is None else [by] if isinstance(by, str) else list(by)
+        key = tuple(by)
+        if key not in self._statistics:
+            if not by:
+                codes, index = None, pd.Index(['All'])
+            elif len(by) == 1:
+                codes, index = pd.factorize(self.df[by[0]], sort=True)
+                index = pd.Index(index, name=by[0])
+            else:
+                # Rows with a missing key belong to no group (code -1), as in groupby
+                keys = self.df[by]
+                complete = keys.notna().all(axis=1).to_numpy()
+                codes = np.full(len(keys), -1)
+                codes[complete], index = pd.factorize(pd.MultiIndex.from_frame(keys[complete]), sort=True)
+                index = pd.MultiIndex.from_tuples(index, names=by)
+            table = describe_cases(self.df['CASES'], codes, len(index))
+            self._statistics[key] = pd.DataFrame(table, index=index, columns=CASE_STATISTICS)
+        return self._statistics[key]
+    
     def trend_analysis(self, column, period='MONTH'):
         """Analyze temporal trends"""
         trend_data = self.df.groupby(period)[column].agg(['mean', 'std', 'count', 'min', 'max'])
         return trend_data
     
-    def seasonality_detection(self, window=4):
-        """Detect seasonal patterns using moving average"""
+    def seasonality_detection(self, window=4, max_points=None):
+        """
+        Detect seasonal patterns using moving average
+
+        With max_points, rows are thinned by LTTB on the weekly cases for
+        plotting; the moving average is computed on the full series first.
+        """
         weekly_cases = self.df.groupby(['YEAR_2', 'WEEK'])['CASES'].sum().reset_index()
         weekly_cases['MA'] = weekly_cases['CASES'].rolling(window=window, center=True).mean()
+        if max_points is not None:
+            keep = downsample_indices(np.arange(len(weekly_cases)), weekly_cases['CASES'], max_points)
+            weekly_cases = weekly_cases.iloc[keep].reset_index(drop=True)
         return weekly_cases
     
+    def seasonal_decomposition(self):
+        """Trend, seasonal and remainder components for every municipality (see engine.seasonal)"""
+        return SeasonalDecomposition.from_frame(self.df, find_columns(self.df))
+    
     def environmental_impact(self):
         """Analyze environmental factor impact on dengue"""
         results = {}
@@ -47,6 +156,11 @@ class DengueAnalyzer:
         
         return results
     
+    def lagged_correlation(self, max_lag=MAX_LAG):
+        """Strongest climate-leading lag per municipality and variable (prewhitened weekly CCF)"""
+        table = cross_correlation_table(self.df, find_columns(self.df), max_lag=max_lag)
+        return peak_lags(table)
+    
     def spatial_analysis(self):
         """Municipality-level analysis"""
         spatial = self.df.groupby('MUNICIPALITY').agg({
@@ -78,14 +192,15 @@ class DengueAnalyzer:
     
     def calculate_statistics(self):
         """Generate comprehensive statistics"""
+        overall = self.case_statistics().iloc[0]
         stats_dict = {
-            'Total Cases': self.df['CASES'].sum(),
-            'Mean Weekly Cases': self.df['CASES'].mean(),
-            'Median Weekly Cases': self.df['CASES'].median(),
-            'Std Dev': self.df['CASES'].std(),
-            'Min Cases': self.df['CASES'].min(),
-            'Max Cases': self.df['CASES'].max(),
-            'CV (%)': (self.df['CASES'].std() / self.df['CASES'].mean()) * 100,
+            'Total Cases': overall['sum'],
+            'Mean Weekly Cases': overall['mean'],
+            'Median Weekly Cases': overall['median'],
+            'Std Dev': overall['std'],
+            'Min Cases': overall['min'],
+            'Max Cases': overall['max'],
+            'CV (%)': overall['cv'],
         }
         return stats_dict
 
@@ -96,16 +211,17 @@ class ThesisReportGenerator:
     @staticmethod
     def generate_summary(analyzer):
         """Generate statistical summary for thesis"""
+        stats_dict = analyzer.calculate_statistics()
         summary = f"""
         DENGUE EPIDEMIOLOGICAL ANALYSIS - SUMMARY STATISTICS
         
         CASE STATISTICS:
-        - Total Cases: {analyzer.calculate_statistics()['Total Cases']:.0f}
-        - Mean (per week): {analyzer.calculate_statistics()['Mean Weekly Cases']:.2f}
-        - Median (per week): {analyzer.calculate_statistics()['Median Weekly Cases']:.2f}
-        - Std Deviation: {analyzer.calculate_statistics()['Std Dev']:.2f}
-        - Coefficient of Variation: {analyzer.calculate_statistics()['CV (%)']:.2f}%
-        - Range: {analyzer.calculate_statistics()['Min Cases']:.0f} - {analyzer.calculate_statistics()['Max Cases']:.0f}
+        - Total Cases: {stats_dict['Total Cases']:.0f}
+        - Mean (per week): {stats_dict['Mean Weekly Cases']:.2f}
+        - Median (per week): {stats_dict['Median Weekly Cases']:.2f}
+        - Std Deviation: {stats_dict['Std Dev']:.2f}
+        - Coefficient of Variation: {stats_dict['CV (%)']:.2f}%
+        - Range: {stats_dict['Min Cases']:.0f} - {stats_dict['Max Cases']:.0f}
         
         ENVIRONMENTAL CORRELATIONS:
         """
@@ -6,6 +6,7 @@ Main Landing Page
 
 import streamlit as st
 import pandas as pd
+from engine.manifest import current_manifest
 from styles import SHARED_CSS, render_header, render_section_header, render_footer, render_sidebar_header
 
 # Page configuration
@@ -55,20 +56,16 @@ st.markdown(render_header(
     badge="Zamboanga Sibugay Province"
 ), unsafe_allow_html=True)
 
-# Load data for quick stats
-@st.cache_data
+# Quick stats come from the dataset manifest; the CSV is only scanned when it is stale
 def load_quick_stats():
-    try:
-        df = pd.read_csv('sibugay_dengue_cases_dataset.csv')
-        total_cases = df['CASES'].sum()
-        municipalities = df['MUNICIPALITY'].nunique()
-        years = f"{int(df['YEAR_2'].min()) + 2000} - {int(df['YEAR_2'].max()) + 2000}"
-        records = len(df)
-        return total_cases, municipalities, years, records
-    except:
-        return 0, 0, "N/A", 0
-
-total_cases, municipalities, years, records = load_quick_stats()
+    manifest = current_manifest()
+    if manifest is None or manifest['year_min'] is None:
+        return 0, 0, "N/A", 0, "N/A"
+    years = f"{manifest['year_min'] + 2000} - {manifest['year_max'] + 2000}"
+    span = f"{manifest['year_max'] - manifest['year_min'] + 1} years"
+    return manifest['total_cases'], len(manifest['municipalities']), years, manifest['records'], span
+
+total_cases, municipalities, years, records, span = load_quick_stats()
 
 # Welcome Section
 st.markdown(render_section_header("Welcome"), unsafe_allow_html=True)
@@ -103,7 +100,7 @@ with col3:
     st.metric(
         label="Data Period",
         value=years,
-        delta="13 years"
+        delta=span
     )
 
 with col4:
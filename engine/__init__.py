@@ -0,0 +1,5 @@
+"""
+Analytics Engine Package
+Dengue Surveillance System - Zamboanga Sibugay
+Streamlit-free computation shared by the dashboard pages
+"""
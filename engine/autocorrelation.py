@@ -0,0 +1,264 @@
+"""
+Spatial Autocorrelation
+Dengue Surveillance System - Zamboanga Sibugay
+Contiguity weights, Moran's I (global and local) and Getis-Ord Gi*
+
+Every statistic takes a (municipalities, weeks) matrix, so a whole season
+is tested in one vectorized pass and a map can step through weeks without
+recomputing anything.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.stats import norm
+
+try:
+    import shapely
+    SHAPELY_AVAILABLE = True
+except ImportError:
+    SHAPELY_AVAILABLE = False
+
+DEFAULT_PERMUTATIONS = 999
+SIGNIFICANCE_LEVEL = 0.05
+
+# LISA quadrant labels (value vs neighbour average, both relative to the mean)
+QUADRANTS = {1: 'High-High', 2: 'Low-High', 3: 'Low-Low', 4: 'High-Low'}
+NOT_SIGNIFICANT = 'Not Significant'
+
+
+def contiguity_weights(geometries, criterion='queen'):
+    """
+    Binary contiguity matrix (sparse CSR) from polygon boundaries
+
+    'queen' links polygons sharing any boundary point; 'rook' requires a
+    shared edge of positive length. Candidate pairs come from an STR-tree,
+    so only nearby polygons are tested.
+    """
+    if criterion not in ('queen', 'rook'):
+        raise ValueError(f"Unknown contiguity criterion: {criterion}")
+
+    tree = shapely.STRtree(geometries)
+    left, right = tree.query(geometries, predicate='intersects')
+    pairs = left < right
+    left, right = left[pairs], right[pairs]
+
+    if criterion == 'rook' and len(left):
+        shared = shapely.intersection(geometries[left], geometries[right])
+        edges = shapely.length(shared) > 0
+        left, right = left[edges], right[edges]
+
+    n = len(geometries)
+    rows = np.concatenate([left, right])
+    cols = np.concatenate([right, left])
+    data = np.ones(len(rows))
+    return sparse.csr_matrix((data, (rows, cols)), shape=(n, n))
+
+
+def row_standardize(weights):
+    """Row-standardised copy of a sparse weights matrix (islands stay zero)"""
+    row_sums = np.asarray(weights.sum(axis=1)).ravel()
+    scale = np.divide(1.0, row_sums, out=np.zeros_like(row_sums), where=row_sums > 0)
+    return sparse.diags(scale) @ weights
+
+
+def case_matrix(df, location_col, value_col, time_cols, locations):
+    """
+    Dense (locations, time) matrix of summed values
+
+    Rows follow `locations` (e.g. the spatial asset's order); missing
+    location-weeks are zero. Returns (matrix, time_index).
+    """
+    totals = df.groupby([location_col] + list(time_cols))[value_col].sum()
+    wide = totals.unstack(list(time_cols)).reindex(locations).fillna(0.0)
+    wide = wide.sort_index(axis=1)
+    return wide.to_numpy(dtype=float), wide.columns
+
+
+def _standardize(values):
+    """Column-wise z-scores of a (n, T) matrix (constant columns become zero)"""
+    mean = values.mean(axis=0)
+    std = values.std(axis=0)
+    return np.divide(values - mean, std, out=np.zeros_like(values), where=std > 0)
+
+
+def _conditional_lags(values, weights, permutations, rng):
+    """
+    Spatial lags of each location under conditional randomisation
+
+    For location i the value at i stays fixed while its neighbours are
+    drawn from the other n-1 locations. One random ordering per
+    permutation is shared by all locations and weeks, so the work is a
+    gather plus a weighted sum over (permutations, weeks) per location.
+
+    Returns an array of shape (n, permutations, T).
+    """
+    n, T = values.shape
+    weights = sparse.csr_matrix(weights)
+    cardinality = np.diff(weights.indptr)
+    k_max = int(cardinality.max()) if n else 0
+
+    # First k_max entries of a random ordering of 0..n-2, per permutation
+    order = np.argsort(rng.random((permutations, n - 1)), axis=1)[:, :k_max]
+
+    lags = np.zeros((n, permutations, T))
+    for i in range(n):
+        k = cardinality[i]
+        if k == 0:
+            continue
+        # Skip over i itself when mapping 0..n-2 onto the other locations
+        draws = order[:, :k]
+        draws = draws + (draws >= i)
+        w = weights.data[weights.indptr[i]:weights.indptr[i + 1]]
+        lags[i] = np.einsum('k,pkt->pt', w, values[draws])
+    return lags
+
+
+def _pseudo_p(observed, simulated):
+    """
+    Folded pseudo p-value: share of permutations at least as extreme
+
+    `simulated` holds the permutations on axis 1; `observed` has the
+    same shape without that axis.
+    """
+    permutations = simulated.shape[1]
+    expected = simulated.mean(axis=1)
+    extreme = np.abs(simulated - expected[:, None]) >= np.abs(observed - expected)[:, None]
+    return (extreme.sum(axis=1) + 1) / (permutations + 1)
+
+
+def global_morans_i(values, weights, permutations=DEFAULT_PERMUTATIONS, seed=None):
+    """
+    Global Moran's I per week with a permutation p-value
+
+    Args:
+        values: (n,) or (n, T) matrix of values per location and week
+        weights: sparse contiguity weights (row-standardised here)
+        permutations: random relabellings for inference (0 skips them)
+        seed: random seed
+
+    Returns:
+        DataFrame with I, expected I, z-score and pseudo p-value per week
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[:, None] if values.ndim == 1 else values
+    n = values.shape[0]
+    W = row_standardize(weights)
+    z = _standardize(values)
+
+    denominator = (z ** 2).sum(axis=0)
+    safe = denominator > 0
+    I = np.divide((z * (W @ z)).sum(axis=0), denominator, out=np.zeros(values.shape[1]), where=safe)
+    expected = -1.0 / (n - 1)
+
+    result = pd.DataFrame({'morans_i': I, 'expected_i': expected})
+    if permutations:
+        rng = np.random.default_rng(seed)
+        # (permutations, n) relabellings applied to every week at once
+        order = np.argsort(rng.random((permutations, n)), axis=1)
+        permuted = z[order]
+        lagged = np.einsum('ij,pjt->pit', W.toarray(), permuted)
+        I_sim = np.divide((permuted * lagged).sum(axis=1), denominator, out=np.zeros((permutations, len(I))),
+                          where=safe)
+        sim_mean = I_sim.mean(axis=0)
+        sim_std = I_sim.std(axis=0)
+        result['z_score'] = np.divide(I - sim_mean, sim_std, out=np.zeros_like(I), where=sim_std > 0)
+        result['p_value'] = _pseudo_p(I, I_sim.T)
+    return result
+
+
+def local_morans_i(values, weights, permutations=DEFAULT_PERMUTATIONS, seed=None):
+    """
+    Local Moran's I (LISA) per location and week
+
+    Returns (I, p_values, quadrant), each of shape (n, T). Quadrants use
+    the codes in QUADRANTS.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[:, None] if values.ndim == 1 else values
+    W = row_standardize(weights)
+    z = _standardize(values)
+    lag = W @ z
+    I = z * lag
+
+    quadrant = np.where(z > 0, np.where(lag > 0, 1, 4), np.where(lag > 0, 2, 3))
+
+    if not permutations:
+        return I, np.full(I.shape, np.nan), quadrant
+
+    rng = np.random.default_rng(seed)
+    simulated = z[:, None, :] * _conditional_lags(z, W, permutations, rng)
+    return I, _pseudo_p(I, simulated), quadrant
+
+
+def getis_ord_g_star(values, weights, permutations=DEFAULT_PERMUTATIONS, seed=None):
+    """
+    Getis-Ord Gi* hot/cold spot z-scores per location and week
+
+    Gi* includes each location in its own neighbourhood (binary weights
+    plus the diagonal). Returns (z_scores, p_values) of shape (n, T):
+    analytic two-sided normal p-values, or conditional-permutation pseudo
+    p-values when permutations > 0.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[:, None] if values.ndim == 1 else values
+    n = values.shape[0]
+    binary = sparse.csr_matrix(weights, copy=True)
+    binary.data[:] = 1.0
+    W = (binary + sparse.identity(n, format='csr')).tocsr()
+
+    mean = values.mean(axis=0)
+    s = values.std(axis=0)
+    w_sum = np.asarray(W.sum(axis=1)).ravel()
+    w_sq = np.asarray(W.multiply(W).sum(axis=1)).ravel()
+    spread = s[None, :] * np.sqrt(np.maximum(n * w_sq - w_sum ** 2, 0) / (n - 1))[:, None]
+
+    def g_star(local_sum):
+        return np.divide(local_sum - w_sum[:, None] * mean[None, :], spread,
+                         out=np.zeros_like(local_sum), where=spread > 0)
+
+    z_scores = g_star(W @ values)
+    if not permutations:
+        return z_scores, 2 * norm.sf(np.abs(z_scores))
+
+    # Own value stays fixed; neighbours are resampled from the other locations
+    rng = np.random.default_rng(seed)
+    simulated = values[:, None, :] + _conditional_lags(values, binary, permutations, rng)
+    simulated = np.divide(simulated - w_sum[:, None, None] * mean[None, None, :], spread[:, None, :],
+                          out=np.zeros_like(simulated), where=spread[:, None, :] > 0)
+    return z_scores, _pseudo_p(z_scores, simulated)
+
+
+def spatial_clusters(values, weights, locations, time_index, permutations=DEFAULT_PERMUTATIONS,
+                     alpha=SIGNIFICANCE_LEVEL, seed=0):
+    """
+    Local Moran and Gi* results for every location and week
+
+    Returns (local, global) DataFrames. `local` has one row per location
+    and week with LISA cluster labels and Gi* hot/cold spot labels at
+    significance level alpha; `global` has Moran's I per week.
+    """
+    I, lisa_p, quadrant = local_morans_i(values, weights, permutations, seed)
+    gi_z, gi_p = getis_ord_g_star(values, weights, permutations, seed)
+    global_i = global_morans_i(values, weights, permutations, seed)
+
+    quadrant_labels = np.array([NOT_SIGNIFICANT] + [QUADRANTS[q] for q in sorted(QUADRANTS)], dtype=object)
+    lisa = np.where(lisa_p <= alpha, quadrant_labels[quadrant], NOT_SIGNIFICANT)
+    hotspot = np.where(gi_p <= alpha, np.where(gi_z > 0, 'Hot Spot', 'Cold Spot'), NOT_SIGNIFICANT)
+
+    n, T = I.shape
+    time_frame = time_index.to_frame(index=False) if isinstance(time_index, pd.MultiIndex) \
+        else pd.DataFrame({'time': np.asarray(time_index)})
+    local = pd.DataFrame({
+        'municipality': np.repeat(np.asarray(locations, dtype=object), T),
+        'value': values.ravel(),
+        'local_i': I.ravel(),
+        'lisa_p': lisa_p.ravel(),
+        'lisa_cluster': lisa.ravel(),
+        'gi_z': gi_z.ravel(),
+        'gi_p': gi_p.ravel(),
+        'hotspot': hotspot.ravel(),
+    })
+    local = pd.concat([time_frame.iloc[np.tile(np.arange(T), n)].reset_index(drop=True), local], axis=1)
+    global_i = pd.concat([time_frame, global_i], axis=1)
+    return local, global_i
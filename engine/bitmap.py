@@ -0,0 +1,117 @@
+"""
+Bitmap Filter Index
+Dengue Surveillance System - Zamboanga Sibugay
+Per-value row bitmaps for the sidebar filter columns
+
+A selection ORs the bitmaps of the allowed values within a column and ANDs
+the columns together on packed bits (one byte per eight rows), then hands
+back row ids into the indexed frame instead of a filtered copy.
+"""
+
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ['MUNICIPALITY', 'YEAR_2', 'QUARTER']
+
+
+class FrameView:
+    """
+    Rows of a shared frame selected by position
+
+    Holds the frame and an array of row ids; nothing is copied until
+    rows are actually taken for display.
+    """
+
+    def __init__(self, frame, rows):
+        self.frame = frame
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def take(self, start=0, stop=None):
+        """Materialize rows start..stop of the view as a DataFrame"""
+        return self.frame.iloc[self.rows[start:stop]]
+
+    def head(self, n=5):
+        return self.take(0, n)
+
+    def column(self, name):
+        """Values of one column at the view's rows"""
+        return self.frame[name].to_numpy()[self.rows]
+
+    def search(self, text, columns):
+        """View of the rows where any of `columns` contains `text` (case-insensitive)"""
+        if not text:
+            return self
+        hits = np.zeros(len(self.rows), dtype=bool)
+        for col in columns:
+            values = pd.Series(self.column(col), dtype='string')
+            hits |= values.str.contains(text, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+        return FrameView(self.frame, self.rows[hits])
+
+    def sort(self, column=None, ascending=True):
+        """View ordered by one column (None keeps frame order); stable, missing values last"""
+        if column is None:
+            return self if ascending else FrameView(self.frame, self.rows[::-1])
+        values = pd.Series(self.column(column))
+        order = values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+        return FrameView(self.frame, self.rows[order])
+
+    def page(self, number, size):
+        """DataFrame of page `number` (0-based) holding up to `size` rows"""
+        return self.take(number * size, (number + 1) * size)
+
+
+class BitmapIndex:
+    """
+    Packed row bitmaps per distinct value of each indexed column
+
+    `required` columns add a bitmap of rows where they are present,
+    ANDed into every selection (the pages drop rows without cases).
+    """
+
+    def __init__(self, frame, bitmaps, present):
+        self.frame = frame
+        self.bitmaps = bitmaps
+        self.present = present
+
+    @classmethod
+    def from_frame(cls, frame, columns=FILTER_COLUMNS, required=()):
+        bitmaps = {}
+        for col in columns:
+            codes, uniques = pd.factorize(frame[col], sort=True)
+            bitmaps[col] = {value: np.packbits(codes == k) for k, value in enumerate(uniques.tolist())}
+        present = np.packbits(frame[list(required)].notna().all(axis=1).to_numpy()) if required \
+            else np.packbits(np.ones(len(frame), dtype=bool))
+        return cls(frame, bitmaps, present)
+
+    def values(self, column):
+        """Sorted non-null values of an indexed column"""
+        return list(self.bitmaps[column])
+
+    def bitmap(self, **conditions):
+        """
+        Packed bitmap of rows matching every condition
+
+        Each keyword names an indexed column and gives the allowed values
+        (any collection, e.g. a list or a range).
+        """
+        selected = self.present.copy()
+        for col, allowed in conditions.items():
+            column_bits = np.zeros_like(selected)
+            for value in allowed:
+                bits = self.bitmaps[col].get(value)
+                if bits is not None:
+                    column_bits |= bits
+            selected &= column_bits
+        return selected
+
+    def rows(self, **conditions):
+        """Row positions matching every condition, in frame order"""
+        bits = np.unpackbits(self.bitmap(**conditions), count=len(self.frame))
+        return np.flatnonzero(bits)
+
+    def view(self, **conditions):
+        """Zero-copy FrameView of the matching rows"""
+        return FrameView(self.frame, self.rows(**conditions))
@@ -0,0 +1,155 @@
+"""
+Climate-Case Cross-Correlation
+Dengue Surveillance System - Zamboanga Sibugay
+Prewhitened cross-correlation functions over lagged weeks, computed in batch
+
+Every (municipality, climate variable) pair is one row of a 2-D array:
+the climate series is prewhitened with its own AR filter (Yule-Walker),
+the same filter is applied to the case series, and all CCFs come from one
+batched FFT. Positive lags mean climate leads cases by that many weeks.
+"""
+
+import numpy as np
+import pandas as pd
+
+from engine.autocorrelation import case_matrix
+from engine.features import CLIMATE_VARIABLES, stack_panel
+
+CCF_ARTIFACT = 'ccf.parquet'
+
+MAX_LAG = 26
+PREWHITEN_ORDER = 2
+
+# Two-sided 95% band for white-noise cross-correlations
+BAND_Z = 1.96
+
+ALL_MUNICIPALITIES = 'All Municipalities'
+
+
+def _fill_missing(series):
+    """Replace NaN with each row's mean (zero for all-missing rows)"""
+    means = np.nanmean(np.where(np.isnan(series).all(axis=1, keepdims=True), 0.0, series), axis=1, keepdims=True)
+    return np.where(np.isnan(series), means, series)
+
+
+def _autocovariance(series, max_lag):
+    """Biased autocovariances at lags 0..max_lag of each demeaned row, via FFT"""
+    n = series.shape[1]
+    nfft = 1 << int(np.ceil(np.log2(2 * n)))
+    spectrum = np.fft.rfft(series, nfft, axis=1)
+    return np.fft.irfft(spectrum * np.conj(spectrum), nfft, axis=1)[:, :max_lag + 1] / n
+
+
+def ar_coefficients(series, order=PREWHITEN_ORDER):
+    """Yule-Walker AR(order) coefficients of each demeaned row, shape (rows, order)"""
+    acov = _autocovariance(series, order)
+    lags = np.abs(np.arange(order)[:, None] - np.arange(order)[None, :])
+    toeplitz = acov[:, lags]                                    # (rows, order, order)
+    # A tiny ridge keeps constant series solvable (their coefficients are ~0)
+    toeplitz += np.eye(order) * (1e-12 + 1e-9 * acov[:, :1, None])
+    return np.linalg.solve(toeplitz, acov[:, 1:order + 1, None])[..., 0]
+
+
+def ar_filter(series, coefficients):
+    """Residuals e_t = x_t - sum_j phi_j x_(t-j); the first `order` weeks are dropped"""
+    order = coefficients.shape[1]
+    n = series.shape[1]
+    residuals = series[:, order:].copy()
+    for j in range(1, order + 1):
+        residuals -= coefficients[:, j - 1:j] * series[:, order - j:n - j]
+    return residuals
+
+
+def _standardize(series):
+    std = series.std(axis=1, keepdims=True)
+    return np.divide(series - series.mean(axis=1, keepdims=True), std, out=np.zeros_like(series), where=std > 0)
+
+
+def cross_correlation(x, y, max_lag=MAX_LAG, order=PREWHITEN_ORDER):
+    """
+    Prewhitened CCF of each row pair for lags -max_lag..max_lag
+
+    Args:
+        x: (rows, T) driver series (climate)
+        y: (rows, T) response series (cases)
+        max_lag: largest lag in weeks
+        order: AR order of the prewhitening filter (0 skips prewhitening)
+
+    Returns:
+        (ccf, lags, n) where ccf has shape (rows, 2 * max_lag + 1),
+        ccf[:, k] correlates x_t with y_(t + lags[k]), and n is the series
+        length after filtering (for the significance band).
+    """
+    x = _fill_missing(np.asarray(x, dtype=float))
+    y = _fill_missing(np.asarray(y, dtype=float))
+    x = x - x.mean(axis=1, keepdims=True)
+    y = y - y.mean(axis=1, keepdims=True)
+    if order:
+        phi = ar_coefficients(x, order)
+        x, y = ar_filter(x, phi), ar_filter(y, phi)
+    x, y = _standardize(x), _standardize(y)
+
+    n = x.shape[1]
+    max_lag = min(max_lag, n - 1)
+    nfft = 1 << int(np.ceil(np.log2(2 * n)))
+    cross = np.fft.irfft(np.conj(np.fft.rfft(x, nfft, axis=1)) * np.fft.rfft(y, nfft, axis=1), nfft, axis=1) / n
+    lags = np.arange(-max_lag, max_lag + 1)
+    return cross[:, lags % nfft], lags, n
+
+
+def significance_band(n):
+    """Half-width of the 95% band for the CCF of two white-noise series of length n"""
+    return BAND_Z / np.sqrt(n)
+
+
+def cross_correlation_table(df, cols, variables=None, max_lag=MAX_LAG, order=PREWHITEN_ORDER, locations=None):
+    """
+    CCF of weekly cases against every climate variable, per municipality
+
+    A province-wide series (cases summed, climate averaged over
+    municipalities) is included as ALL_MUNICIPALITIES.
+
+    Returns a long DataFrame with municipality, variable, lag, ccf, band
+    and significant.
+    """
+    variables = [v for v in (variables or CLIMATE_VARIABLES) if v in df.columns]
+    location_col, time_cols = cols['location'], [cols['year'], cols['week']]
+    if locations is None:
+        locations = sorted(df[location_col].dropna().unique())
+
+    cases, time_index = case_matrix(df, location_col, cols['cases'], time_cols, locations)
+    climate, groups, climate_time, _ = stack_panel(df, variables, time_cols, location_col)
+    # Align climate to the case grid: (locations, T, variables)
+    climate = climate[groups.get_indexer(locations)][:, climate_time.get_indexer(time_index)]
+
+    present = ~np.isnan(climate)
+    counts = present.sum(axis=0, keepdims=True)
+    province_climate = np.divide(np.where(present, climate, 0.0).sum(axis=0, keepdims=True), counts,
+                                 out=np.full(counts.shape, np.nan), where=counts > 0)
+    cases = np.vstack([cases, cases.sum(axis=0, keepdims=True)])
+    climate = np.concatenate([climate, province_climate], axis=0)
+    names = list(locations) + [ALL_MUNICIPALITIES]
+
+    # One row per (location, variable)
+    x = climate.transpose(0, 2, 1).reshape(-1, climate.shape[1])
+    y = np.repeat(cases, len(variables), axis=0)
+    ccf, lags, n = cross_correlation(x, y, max_lag, order)
+
+    band = significance_band(n)
+    rows, n_lags = ccf.shape
+    return pd.DataFrame({
+        'municipality': np.repeat(np.repeat(np.asarray(names, dtype=object), len(variables)), n_lags),
+        'variable': np.repeat(np.tile(np.asarray(variables, dtype=object), len(names)), n_lags),
+        'lag': np.tile(lags, rows),
+        'ccf': ccf.ravel(),
+        'band': band,
+        'significant': np.abs(ccf.ravel()) > band,
+    })
+
+
+def peak_lags(table):
+    """Strongest positive-lag (climate-leading) correlation per municipality and variable"""
+    leading = table[table['lag'] >= 0]
+    strongest = leading.iloc[np.argsort(-leading['ccf'].abs().to_numpy(), kind='stable')]
+    strongest = strongest.drop_duplicates(['municipality', 'variable'])
+    return strongest.sort_values(['municipality', 'variable']).reset_index(drop=True)
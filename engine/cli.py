@@ -0,0 +1,267 @@
+"""
+Headless Command-Line Interface
+Dengue Surveillance System - Zamboanga Sibugay
+
+Usage:
+    python -m engine forecast --weeks 4
+    python -m engine backtest --train-fraction 0.8
+    python -m engine risk --year 23 --window 8
+    python -m engine scan --replications 999 --jobs 4
+    python -m engine tiles --min-zoom 6 --max-zoom 10
+    python -m engine benchmark --repeat 3
+
+Every subcommand writes one JSON document to stdout (or --output). Model
+diagnostics go to stderr. Heavy modules (pandas, statsmodels) are imported
+only once a subcommand runs, so argument parsing and --help stay fast.
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+from engine.data import ARTIFACT_DIR, DATA_FILE
+from engine.tiles import TILE_CACHE_DIR
+
+
+def _load(args):
+    """Dataset and detected columns for a subcommand"""
+    import pandas as pd
+    from engine.models import find_columns
+    from engine.pipeline import REQUIRED_COLUMNS
+
+    df = pd.read_csv(args.data)
+    cols = find_columns(df)
+    missing = [r for r in REQUIRED_COLUMNS if r not in cols]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    return df, cols
+
+
+def cmd_forecast(args):
+    """Member and ensemble forecasts for the next weeks"""
+    import os
+    from engine.data import dataset_version
+    from engine.ensemble import EnsembleForecaster
+    from engine.models import get_dataset_dates, prepare_regression_data
+    from engine.pipeline import (
+        ENSEMBLE_MEMBERS, ENSEMBLE_STATE, json_list, combine_forecasts, forecast_members,
+    )
+
+    df, cols = _load(args)
+    _, last_year, last_week = get_dataset_dates(df, cols['year'], cols['week'])
+    time_series = prepare_regression_data(df, cols)
+    forecasts = forecast_members(time_series, args.weeks)
+
+    # Weights come from this dataset version's backtest state; equal weights without one
+    version = dataset_version(args.data)
+    ensemble = EnsembleForecaster.load(os.path.join(args.artifacts, ENSEMBLE_STATE), ENSEMBLE_MEMBERS,
+                                       version=version)
+
+    return {
+        'dataset_version': version,
+        'last_year': int(last_year),
+        'last_week': int(last_week),
+        'weeks': args.weeks,
+        'models': {name: forecasts[name]['forecast'] for name in ENSEMBLE_MEMBERS},
+        'ensemble': json_list(combine_forecasts(ensemble, forecasts)),
+        'weights': dict(zip(ENSEMBLE_MEMBERS, json_list(ensemble.weights))),
+    }
+
+
+def cmd_backtest(args):
+    """Train/test metrics and information criteria for every model"""
+    from engine.comparison import compare_count_models
+    from engine.data import dataset_version
+    from engine.models import prepare_regression_data
+    from engine.pipeline import backtest_members, split_train_test
+
+    df, cols = _load(args)
+    time_series = prepare_regression_data(df, cols)
+    train_data, test_data = split_train_test(time_series, args.train_fraction)
+    backtests = backtest_members(train_data, test_data)
+
+    return {
+        'dataset_version': dataset_version(args.data),
+        'n_train': len(train_data),
+        'n_test': len(test_data),
+        'models': {
+            name: {'metrics': result['metrics'], 'fit': result['fit']}
+            for name, result in backtests.items()
+        },
+        'comparison': compare_count_models(train_data).to_dict(orient='records'),
+    }
+
+
+def cmd_risk(args):
+    """Municipality risk scores for one year and analysis window"""
+    from engine.models import calculate_municipality_risk
+    from engine.pipeline import ALL_YEARS
+
+    df, cols = _load(args)
+    year = ALL_YEARS if args.year.lower() in ('all', 'all years') else int(args.year)
+    risk_df = calculate_municipality_risk(df, cols, year, args.window)
+    risk_df['risk_level'] = risk_df['risk_level'].astype(str)
+
+    return {
+        'year': ALL_YEARS if year == ALL_YEARS else year,
+        'window': 52 if year == ALL_YEARS else args.window,
+        'municipalities': risk_df.to_dict(orient='records'),
+    }
+
+
+def cmd_scan(args):
+    """Most likely and secondary space-time case clusters"""
+    from engine.data import dataset_version
+    from engine.geometry import SHAPELY_AVAILABLE, build_spatial_asset, load_municipality_geometries
+    from engine.pipeline import compute_scan_clusters
+
+    if not SHAPELY_AVAILABLE:
+        raise ValueError("The space-time scan requires shapely")
+    df, cols = _load(args)
+    if 'geometry' not in cols:
+        raise ValueError("Missing columns: ['geometry']")
+
+    version = dataset_version(args.data)
+    names, geometries = load_municipality_geometries(version, cols['location'], cols['geometry'], args.data)
+    spatial_asset = build_spatial_asset(names, geometries, version)
+    clusters = compute_scan_clusters(df, cols, spatial_asset, args.replications, args.jobs)
+
+    return {
+        'dataset_version': version,
+        'replications': args.replications,
+        'clusters': clusters.to_dict(orient='records'),
+    }
+
+
+def cmd_tiles(args):
+    """Prefetch basemap tiles covering the province for offline maps"""
+    from engine.data import dataset_version
+    from engine.geometry import SHAPELY_AVAILABLE, build_spatial_asset, load_municipality_geometries
+    from engine.tiles import prefetch_tiles
+
+    if not SHAPELY_AVAILABLE:
+        raise ValueError("Tile prefetching requires shapely")
+    if args.min_zoom > args.max_zoom:
+        raise ValueError("--min-zoom must not exceed --max-zoom")
+    df, cols = _load(args)
+    if 'geometry' not in cols:
+        raise ValueError("Missing columns: ['geometry']")
+
+    version = dataset_version(args.data)
+    names, geometries = load_municipality_geometries(version, cols['location'], cols['geometry'], args.data)
+    bounds = build_spatial_asset(names, geometries, version).bounds
+    zooms = range(args.min_zoom, args.max_zoom + 1)
+
+    return {
+        'bounds': list(bounds),
+        'zooms': list(zooms),
+        'cache_dir': args.cache_dir,
+        'tiles': prefetch_tiles(bounds, zooms, args.cache_dir),
+    }
+
+
+def cmd_benchmark(args):
+    """Wall-clock timings of each pipeline stage"""
+    import numpy as np
+    import pandas as pd
+    from engine.models import (
+        calculate_municipality_risk, find_columns, predict_future, predict_with_model,
+        prepare_full_regression_data, prepare_regression_data,
+    )
+    from engine.pipeline import MODEL_SPECS, split_train_test
+
+    timings = {}
+
+    def timed(stage, func, *func_args):
+        start = time.perf_counter()
+        result = func(*func_args)
+        timings.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    for _ in range(args.repeat):
+        df = timed('load_csv', pd.read_csv, args.data)
+        cols = timed('find_columns', find_columns, df)
+        time_series = timed('prepare_regression_data', prepare_regression_data, df, cols)
+        timed('prepare_full_regression_data', prepare_full_regression_data, df, cols)
+        train_data, test_data = split_train_test(time_series)
+        for name, model_type, fit, _ in MODEL_SPECS:
+            _, results = timed(f'fit_{model_type}', fit, train_data)
+            if results:
+                timed(f'predict_{model_type}', predict_with_model, results, test_data, model_type)
+                timed(f'forecast_{model_type}', predict_future, results, train_data, 4, model_type)
+        timed('calculate_municipality_risk', calculate_municipality_risk, df, cols, None, 4)
+
+    return {
+        'repeat': args.repeat,
+        'seconds': {
+            stage: {'min': float(np.min(values)), 'median': float(np.median(values))}
+            for stage, values in timings.items()
+        },
+    }
+
+
+COMMANDS = {
+    'forecast': cmd_forecast,
+    'backtest': cmd_backtest,
+    'risk': cmd_risk,
+    'scan': cmd_scan,
+    'tiles': cmd_tiles,
+    'benchmark': cmd_benchmark,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m engine',
+                                     description="Headless dengue forecasting pipeline")
+    parser.add_argument('--data', default=DATA_FILE, help="dataset CSV")
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    parser.add_argument('--indent', type=int, default=None, help="pretty-print JSON")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    forecast = subparsers.add_parser('forecast', help=cmd_forecast.__doc__)
+    forecast.add_argument('--weeks', type=int, default=4, help="forecast horizon in weeks")
+    forecast.add_argument('--artifacts', default=ARTIFACT_DIR, help="directory holding ensemble state")
+
+    backtest = subparsers.add_parser('backtest', help=cmd_backtest.__doc__)
+    backtest.add_argument('--train-fraction', type=float, default=0.8, help="share of weeks used for training")
+
+    risk = subparsers.add_parser('risk', help=cmd_risk.__doc__)
+    risk.add_argument('--year', default='all', help="two-digit year (e.g. 23) or 'all'")
+    risk.add_argument('--window', type=int, default=4, help="analysis window in weeks")
+
+    scan = subparsers.add_parser('scan', help=cmd_scan.__doc__)
+    scan.add_argument('--replications', type=int, default=999, help="Monte Carlo replications")
+    scan.add_argument('--jobs', type=int, default=None, help="worker processes (default: all cores)")
+
+    tiles = subparsers.add_parser('tiles', help=cmd_tiles.__doc__)
+    tiles.add_argument('--min-zoom', type=int, default=6, help="lowest zoom level")
+    tiles.add_argument('--max-zoom', type=int, default=10, help="highest zoom level")
+    tiles.add_argument('--cache-dir', default=TILE_CACHE_DIR, help="tile cache directory")
+
+    benchmark = subparsers.add_parser('benchmark', help=cmd_benchmark.__doc__)
+    benchmark.add_argument('--repeat', type=int, default=3, help="repetitions per stage")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    try:
+        # Library code prints diagnostics; keep stdout for the JSON result
+        with contextlib.redirect_stdout(sys.stderr):
+            result = COMMANDS[args.command](args)
+    except (FileNotFoundError, ValueError) as e:
+        print(json.dumps({'error': str(e)}), file=sys.stderr)
+        return 1
+
+    from engine.pipeline import json_safe
+    payload = json.dumps(json_safe(result), indent=args.indent)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload + '\n')
+    else:
+        print(payload)
+    return 0
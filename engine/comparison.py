@@ -0,0 +1,133 @@
+"""
+Count Model Comparison Sweep
+Dengue Surveillance System - Zamboanga Sibugay
+Fits a catalog of count models against one shared design matrix
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from engine.models import calculate_aic_bic
+
+try:
+    import statsmodels.api as sm
+    from statsmodels.discrete.count_model import ZeroInflatedNegativeBinomialP, ZeroInflatedPoisson
+    from statsmodels.discrete.discrete_model import NegativeBinomial, Poisson
+    STATSMODELS_AVAILABLE = True
+except ImportError:
+    STATSMODELS_AVAILABLE = False
+
+try:
+    from statsmodels.discrete.truncated_model import HurdleCountModel
+    HURDLE_AVAILABLE = True
+except ImportError:
+    HURDLE_AVAILABLE = False
+
+DESIGN_FEATURES = ['time_index', 'lag1', 'rolling_mean_4']
+
+
+def build_design(data, features=DESIGN_FEATURES):
+    """Response vector and constant-augmented design matrix, built once"""
+    X = np.ascontiguousarray(data[features].to_numpy(dtype=float))
+    X = sm.add_constant(X, has_constant='add')
+    y = data['cases'].to_numpy(dtype=float)
+    return y, X
+
+
+def _fit_poisson(y, X, X_infl):
+    return Poisson(y, X).fit(disp=0, maxiter=200)
+
+
+def _fit_nb1(y, X, X_infl):
+    return NegativeBinomial(y, X, loglike_method='nb1').fit(disp=0, maxiter=300)
+
+
+def _fit_nb2(y, X, X_infl):
+    return NegativeBinomial(y, X, loglike_method='nb2').fit(disp=0, maxiter=300)
+
+
+def _fit_zero_inflated(model):
+    """BFGS first, Nelder-Mead if the gradient fit diverges"""
+    results = model.fit(disp=0, maxiter=300, method='bfgs')
+    if not np.isfinite(results.llf):
+        results = model.fit(disp=0, maxiter=2000, method='nm')
+    return results
+
+
+def _fit_zip(y, X, X_infl):
+    return _fit_zero_inflated(ZeroInflatedPoisson(y, X, exog_infl=X_infl))
+
+
+def _fit_zinb(y, X, X_infl):
+    return _fit_zero_inflated(ZeroInflatedNegativeBinomialP(y, X, exog_infl=X_infl))
+
+
+def _fit_hurdle_nb(y, X, X_infl):
+    return HurdleCountModel(y, X, dist='negbin', zerodist='poisson').fit(disp=0, maxiter=300)
+
+
+# Display name -> fitting function taking (y, X, X_infl)
+MODEL_CATALOG = {
+    'Poisson': _fit_poisson,
+    'NB1': _fit_nb1,
+    'NB2': _fit_nb2,
+    'ZIP': _fit_zip,
+    'ZINB': _fit_zinb,
+    'Hurdle NB': _fit_hurdle_nb,
+}
+
+
+def _fit_one(name, fit, y, X, X_infl):
+    """Fit one catalog model and summarise it (NaN row on failure)"""
+    try:
+        results = fit(y, X, X_infl)
+        row = calculate_aic_bic(results, len(y))
+        row['Parameters'] = len(results.params)
+        row['Converged'] = bool(getattr(results, 'mle_retvals', {}).get('converged', True))
+    except Exception as e:
+        print(f"{name} fitting error: {str(e)[:100]}")
+        row = {'AIC': np.nan, 'BIC': np.nan, 'Log-likelihood': np.nan, 'Deviance': np.nan,
+               'Parameters': np.nan, 'Converged': False}
+    return {'Model': name, **row}
+
+
+def compare_count_models(data, features=DESIGN_FEATURES, models=None, n_jobs=None):
+    """
+    AIC/BIC/log-likelihood/deviance table for the count model catalog
+
+    The design matrix is built once and shared read-only by every fit.
+    Fits run on a thread pool: statsmodels spends most of its time in
+    NumPy/BLAS, and threads avoid copying the matrix into worker processes.
+
+    Args:
+        data: weekly series with 'cases' and the feature columns
+        features: regressors (a constant is added)
+        models: subset of MODEL_CATALOG names (default: all available)
+        n_jobs: worker threads (default: one per model; 1 fits serially)
+
+    Returns:
+        DataFrame with one row per model, sorted by AIC
+    """
+    columns = ['Model', 'AIC', 'BIC', 'Log-likelihood', 'Deviance', 'Parameters', 'Converged']
+    if not STATSMODELS_AVAILABLE:
+        return pd.DataFrame(columns=columns)
+
+    names = [m for m in (models or MODEL_CATALOG) if m in MODEL_CATALOG]
+    if not HURDLE_AVAILABLE:
+        names = [m for m in names if m != 'Hurdle NB']
+
+    y, X = build_design(data, features)
+    X_infl = np.ones((len(y), 1))
+
+    if n_jobs == 1:
+        rows = [_fit_one(name, MODEL_CATALOG[name], y, X, X_infl) for name in names]
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs or len(names)) as executor:
+            futures = [executor.submit(_fit_one, name, MODEL_CATALOG[name], y, X, X_infl)
+                       for name in names]
+            rows = [future.result() for future in futures]
+
+    table = pd.DataFrame(rows, columns=columns)
+    return table.sort_values('AIC', na_position='last').reset_index(drop=True)
@@ -0,0 +1,220 @@
+"""
+Aggregate Cube
+Dengue Surveillance System - Zamboanga Sibugay
+Precomputed rollups over municipality x year x quarter x month x week
+
+Rows are summed once into cells (case sum, record count, sum of squares
+and climate sums); every filter and chart afterwards works on the cells,
+so its cost depends on the number of distinct cells, not on rows.
+
+A missing dimension value gets code -1. Such cells count in totals and in
+rollups over other dimensions, but a rollup leaves out the groups whose
+own keys are missing, as groupby does.
+"""
+
+import numpy as np
+import pandas as pd
+
+from engine.features import CLIMATE_VARIABLES
+
+CUBE_DIMENSIONS = ['MUNICIPALITY', 'YEAR_2', 'QUARTER', 'MONTH', 'MORBIDITY_WEEK']
+CUBE_VALUE = 'CASES'
+
+
+def _grouping(by):
+    """Rollup dimensions as a tuple"""
+    by = (by,) if isinstance(by, str) else tuple(by)
+    if not by:
+        raise ValueError("rollup needs at least one dimension; use totals()")
+    return by
+
+
+def _group_sums(levels, codes, measures, by):
+    """
+    Sum measures per combination of the `by` dimensions
+
+    `codes` holds per-row (cell or group) level codes for at least the
+    `by` dimensions, -1 where missing. Returns the group codes per
+    dimension and the summed measures, one entry per observed group;
+    groups with a missing key are kept, so coarser groupings can still be
+    summed from these.
+    """
+    shape = tuple(len(levels[dim]) + 1 for dim in by)
+    keys = np.ravel_multi_index([codes[dim] + 1 for dim in by], shape)
+    groups, group_of_row = np.unique(keys, return_inverse=True)
+    sums = {name: np.bincount(group_of_row, weights=values, minlength=len(groups))
+            for name, values in measures.items()}
+    return dict(zip(by, [c - 1 for c in np.unravel_index(groups, shape)])), sums
+
+
+class AggregateCube:
+    """
+    Sparse rollup cube
+
+    Each dimension is stored as integer codes into its sorted levels and
+    each measure as one float array per cell. select() narrows the cells,
+    rollup() marginalizes them onto any subset of dimensions.
+
+    Rollups hold the value sum under the value column's own name, the
+    record count ('records'), the value mean and sample standard deviation
+    ('<value>_mean', '<value>_std') and each climate variable's mean under
+    its own name.
+    """
+
+    def __init__(self, levels, codes, measures, value, climate):
+        self.levels = levels
+        self.codes = codes
+        self.measures = measures
+        self.value = value
+        self.climate = climate
+
+    @classmethod
+    def from_frame(cls, df, dimensions=CUBE_DIMENSIONS, value=CUBE_VALUE, climate=None):
+        """Cube of every observed cell; rows without a value are left out"""
+        climate = [c for c in (climate or CLIMATE_VARIABLES) if c in df.columns]
+        df = df.dropna(subset=[value])
+
+        levels, row_codes = {}, []
+        for dim in dimensions:
+            codes, uniques = pd.factorize(df[dim], sort=True)
+            levels[dim] = np.asarray(uniques)
+            row_codes.append(codes + 1)
+
+        # Missing values (code -1) are shifted to 0 for the cell keys
+        shape = tuple(len(levels[dim]) + 1 for dim in dimensions)
+        keys = np.ravel_multi_index(row_codes, shape) if len(df) else np.zeros(0, dtype=int)
+        cell_keys, cell_of_row = np.unique(keys, return_inverse=True)
+        n_cells = len(cell_keys)
+        codes = dict(zip(dimensions, [c - 1 for c in np.unravel_index(cell_keys, shape)]))
+
+        def cell_sum(values):
+            return np.bincount(cell_of_row, weights=values, minlength=n_cells)
+
+        values = df[value].to_numpy(dtype=float)
+        measures = {
+            value: cell_sum(values),
+            'records': cell_sum(np.ones(len(values))),
+            f"{value}_sq": cell_sum(values ** 2),
+        }
+        for col in climate:
+            x = df[col].to_numpy(dtype=float)
+            present = ~np.isnan(x)
+            measures[col] = cell_sum(np.where(present, x, 0.0))
+            measures[f"{col}_n"] = cell_sum(present.astype(float))
+        return cls(levels, codes, measures, value, climate)
+
+    def __len__(self):
+        return len(self.measures[self.value])
+
+    def select(self, **conditions):
+        """
+        Sub-cube of the cells whose dimensions take the given values
+
+        Each keyword names a dimension and gives the allowed values (any
+        collection, e.g. a list or a range). Cells missing a filtered
+        dimension are left out.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for dim, allowed in conditions.items():
+            # Trailing False is picked by the missing code -1
+            allowed_levels = np.append(np.isin(self.levels[dim], list(allowed)), False)
+            mask &= allowed_levels[self.codes[dim]]
+        return AggregateCube(
+            self.levels,
+            {dim: codes[mask] for dim, codes in self.codes.items()},
+            {name: values[mask] for name, values in self.measures.items()},
+            self.value,
+            self.climate,
+        )
+
+    def _summarize(self, sums):
+        """Rollup columns from summed measures"""
+        value = self.value
+        n = sums['records']
+        total = sums[value]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n > 0, total / n, np.nan)
+            var = np.where(n > 1, (sums[f"{value}_sq"] - total * mean) / (n - 1), np.nan)
+            columns = {
+                value: total,
+                'records': n.astype(int),
+                f"{value}_mean": mean,
+                f"{value}_std": np.sqrt(np.maximum(var, 0)),
+            }
+            for col in self.climate:
+                columns[col] = np.where(sums[f"{col}_n"] > 0, sums[col] / sums[f"{col}_n"], np.nan)
+        return columns
+
+    def rollup(self, by):
+        """DataFrame indexed by the `by` dimensions, one row per observed combination"""
+        by = _grouping(by)
+        codes, sums = _group_sums(self.levels, self.codes, self.measures, by)
+        return self._frame(by, codes, sums)
+
+    def _frame(self, by, codes, sums):
+        """Rollup DataFrame from group codes and summed measures (groups with a missing key dropped)"""
+        complete = np.logical_and.reduce([codes[dim] >= 0 for dim in by])
+        codes = {dim: codes[dim][complete] for dim in by}
+        sums = {name: values[complete] for name, values in sums.items()}
+        index = pd.MultiIndex.from_arrays([self.levels[dim][codes[dim]] for dim in by], names=list(by))
+        if len(by) == 1:
+            index = index.get_level_values(0)
+        return pd.DataFrame(self._summarize(sums), index=index)
+
+    def totals(self):
+        """Rollup over every cell as a Series"""
+        sums = {name: np.array([values.sum()]) for name, values in self.measures.items()}
+        return pd.DataFrame(self._summarize(sums)).iloc[0]
+
+
+class RollupPlan:
+    """
+    Rollups needed by one render, each grouping computed once
+
+    Groupings are declared up front with request(); the first rollup()
+    executes all of them, finest first, and answers each from the
+    smallest already-summed grouping that contains its dimensions (e.g.
+    YEAR_2 from YEAR_2 x QUARTER) rather than from the cells. Results are
+    memoized, so charts asking for the same grouping share one result.
+    """
+
+    def __init__(self, cube):
+        self.cube = cube
+        self.requested = []
+        self._sums = {}
+        self._frames = {}
+
+    def request(self, *groupings):
+        for by in groupings:
+            by = _grouping(by)
+            if by not in self.requested:
+                self.requested.append(by)
+        return self
+
+    def _compute(self, by):
+        """Group sums for one grouping from the smallest summed superset, else the cells"""
+        sources = [(len(next(iter(sums.values()))), codes, sums)
+                   for key, (codes, sums) in self._sums.items() if set(by) <= set(key)]
+        if sources:
+            _, codes, measures = min(sources, key=lambda source: source[0])
+        else:
+            codes, measures = self.cube.codes, self.cube.measures
+        self._sums[by] = _group_sums(self.cube.levels, codes, measures, by)
+
+    def execute(self):
+        """Compute every requested grouping not yet summed"""
+        for by in sorted(self.requested, key=len, reverse=True):
+            if by not in self._sums:
+                self._compute(by)
+        return self
+
+    def rollup(self, by):
+        """Memoized rollup DataFrame, as AggregateCube.rollup"""
+        by = _grouping(by)
+        if by not in self._frames:
+            if not self._sums:
+                self.execute()
+            if by not in self._sums:
+                self._compute(by)
+            self._frames[by] = self.cube._frame(by, *self._sums[by])
+        return self._frames[by]
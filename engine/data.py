@@ -0,0 +1,39 @@
+"""
+Dataset Location and Versioning
+Dengue Surveillance System - Zamboanga Sibugay
+"""
+
+import hashlib
+import os
+
+DATA_FILE = 'sibugay_dengue_cases_dataset.csv'
+
+# Derived state (model weights, precomputed artifacts) lives here
+ARTIFACT_DIR = 'artifacts'
+
+
+def dataset_version(path=DATA_FILE):
+    """
+    Cheap version token for the dataset file
+
+    Derived from the file size and modification time, so it changes whenever
+    the CSV is rewritten or appended to without reading its contents.
+    Returns None if the file does not exist.
+    """
+    return file_version(path)
+
+
+def file_version(path):
+    """Size/mtime version token for any file (None if missing)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    token = f"{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(token.encode()).hexdigest()[:12]
+
+
+def artifact_path(name, artifact_dir=ARTIFACT_DIR):
+    """Path of a named artifact, creating the artifact directory if needed"""
+    os.makedirs(artifact_dir, exist_ok=True)
+    return os.path.join(artifact_dir, name)
@@ -0,0 +1,102 @@
+"""
+Time-Series Downsampling
+Dengue Surveillance System - Zamboanga Sibugay
+Point-budgeted LTTB and min-max selection for long weekly line charts
+
+Both methods return indices into the full series, so callers keep the
+full-resolution data and can re-select a zoomed window at any time.
+"""
+
+import numpy as np
+
+DEFAULT_POINT_BUDGET = 1000
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets selection
+
+    Keeps the first and last points and one point per bucket in between:
+    the one forming the largest triangle with the previously kept point
+    and the next bucket's average. Bucket averages are computed in one
+    reduceat; the loop runs once per output point, not per input point.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    starts, stops = edges[:-1], edges[1:]
+    counts = stops - starts
+    avg_x = np.add.reduceat(x[:n - 1], starts) / counts
+    avg_y = np.add.reduceat(y[:n - 1], starts) / counts
+    # The last bucket looks ahead to the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i, (start, stop) in enumerate(zip(starts, stops)):
+        area = np.abs((x[a] - next_x[i]) * (y[start:stop] - y[a])
+                      - (x[a] - x[start:stop]) * (next_y[i] - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, max_points):
+    """
+    Minimum and maximum of each bucket (fully vectorized)
+
+    Uses max_points // 2 equal buckets; peaks and troughs always survive,
+    which suits outbreak spikes. The first and last points are kept.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+
+    n_buckets = max_points // 2 - 1
+    size = int(np.ceil(n / n_buckets))
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    valid = ~np.isnan(buckets).all(axis=1)
+    offsets = np.arange(n_buckets)[valid] * size
+    filled = np.where(np.isnan(buckets[valid]), np.inf, buckets[valid])
+    lows = offsets + filled.argmin(axis=1)
+    filled = np.where(np.isnan(buckets[valid]), -np.inf, buckets[valid])
+    highs = offsets + filled.argmax(axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample_indices(x, y, max_points=DEFAULT_POINT_BUDGET, method='lttb', x_range=None):
+    """
+    Indices of at most max_points points to draw
+
+    x_range (low, high) first restricts the series to a zoomed window, so
+    narrowing the window brings back full resolution once it holds fewer
+    than max_points points.
+    """
+    x = np.asarray(x, dtype=float)
+    window = np.arange(len(x))
+    if x_range is not None:
+        window = np.flatnonzero((x >= x_range[0]) & (x <= x_range[1]))
+    if method == 'lttb':
+        picked = lttb_indices(x[window], np.asarray(y, dtype=float)[window], max_points)
+    elif method == 'minmax':
+        picked = minmax_indices(np.asarray(y, dtype=float)[window], max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return window[picked]
+
+
+def downsample(x, y, max_points=DEFAULT_POINT_BUDGET, method='lttb', x_range=None):
+    """(x, y) arrays of the points to draw; see downsample_indices"""
+    x = np.arange(len(y)) if x is None else np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    keep = downsample_indices(x, y, max_points, method, x_range)
+    return x[keep], y[keep]
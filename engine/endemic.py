@@ -0,0 +1,181 @@
+"""
+Endemic Channels and Epidemic Thresholds
+Dengue Surveillance System - Zamboanga Sibugay
+Per municipality-week baselines from prior years
+
+Cases are held in a (years, weeks, locations) array. Every target year's
+channel comes from the BASELINE_YEARS years before it, taken as strided
+windows over the year axis, so all years, weeks and municipalities are
+summarized in one reduction.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from engine.autocorrelation import case_matrix
+from engine.ccf import ALL_MUNICIPALITIES
+from engine.seasonal import SEASON_WEEKS
+
+BASELINE_YEARS = 5
+
+# Channels need at least this many prior years with data for a week
+MIN_BASELINE_YEARS = 3
+
+# 'quartile': Q1 / median / Q3 (Bortman); 'mean_sd': mean -/+ 2 SD
+CHANNEL_METHODS = {
+    'quartile': 'Median and quartiles',
+    'mean_sd': 'Mean ± 2 SD',
+}
+
+SD_MULTIPLIER = 2.0
+
+ZONES = ['Success', 'Safety', 'Alert', 'Epidemic']
+
+
+def nan_quantiles(values, quantiles):
+    """
+    Linear-interpolated quantiles over the last axis, ignoring NaN
+
+    Same result as np.nanpercentile, but one sort and two gathers for the
+    whole array instead of a per-slice loop. All-NaN slices give NaN.
+    """
+    ordered = np.sort(values, axis=-1)                       # NaN sorts last
+    count = np.sum(~np.isnan(values), axis=-1, keepdims=True)
+    result = []
+    for q in quantiles:
+        position = q * np.maximum(count - 1, 0)
+        below = np.floor(position).astype(int)
+        above = np.minimum(below + 1, np.maximum(count - 1, 0))
+        low = np.take_along_axis(ordered, below, axis=-1)
+        high = np.take_along_axis(ordered, above, axis=-1)
+        result.append(np.where(count > 0, low + (position - below) * (high - low), np.nan)[..., 0])
+    return np.stack(result)
+
+
+def channel_bounds(baseline, method='quartile'):
+    """
+    (lower, center, upper) over the last axis of a baseline array
+
+    NaN marks years without data; positions with fewer than
+    MIN_BASELINE_YEARS values get NaN bounds.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if method == 'quartile':
+            bounds = nan_quantiles(baseline, [0.25, 0.5, 0.75])
+        elif method == 'mean_sd':
+            mean = np.nanmean(baseline, axis=-1)
+            spread = SD_MULTIPLIER * np.nanstd(baseline, axis=-1, ddof=1)
+            bounds = np.stack([np.maximum(mean - spread, 0.0), mean, mean + spread])
+        else:
+            raise ValueError(f"Unknown channel method: {method}")
+    enough = np.sum(~np.isnan(baseline), axis=-1) >= MIN_BASELINE_YEARS
+    return np.where(enough, bounds, np.nan)
+
+
+def classify(cases, lower, center, upper):
+    """Endemic-channel zone index (into ZONES) of each count; -1 where no channel"""
+    zone = np.select([cases <= lower, cases <= center, cases <= upper], [0, 1, 2], default=3)
+    return np.where(np.isnan(upper) | np.isnan(cases), -1, zone)
+
+
+class EndemicChannels:
+    """
+    Endemic channel per target year, week and location
+
+    `cases` is (years, SEASON_WEEKS, locations) with NaN for weeks not yet
+    reported; `bounds` is (3, years + 1, SEASON_WEEKS, locations), where
+    the extra year is the season after the last one in the data.
+    Locations follow `names`; the last is the province total
+    (ALL_MUNICIPALITIES). Years in `long_years` have an epi-week 53, which
+    shares week 52's channel.
+    """
+
+    def __init__(self, names, years, cases, method='quartile', window=BASELINE_YEARS, long_years=()):
+        self.names = list(names)
+        self.years = list(years)
+        self.long_years = set(long_years)
+        self.cases = cases
+        self.method = method
+        self.window = window
+        # Year i's baseline is years i-window..i-1 (NaN-padded before the first)
+        padding = np.full((window,) + cases.shape[1:], np.nan)
+        padded = np.concatenate([padding, cases], axis=0)
+        baselines = sliding_window_view(padded, window, axis=0)
+        self.bounds = channel_bounds(baselines, method)
+
+    @classmethod
+    def from_frame(cls, df, cols, locations=None, method='quartile', window=BASELINE_YEARS):
+        location_col = cols['location']
+        if locations is None:
+            locations = sorted(df[location_col].dropna().unique())
+        counts, time_index = case_matrix(df, location_col, cols['cases'], [cols['year'], cols['week']], locations)
+        counts = np.vstack([counts, counts.sum(axis=0, keepdims=True)])
+
+        years = time_index.get_level_values(0).to_numpy(dtype=int)
+        weeks = time_index.get_level_values(1).to_numpy(dtype=int)
+        span = np.arange(years.min(), years.max() + 1)
+        in_season = (weeks >= 1) & (weeks <= SEASON_WEEKS)
+        cases = np.full((len(span), SEASON_WEEKS, counts.shape[0]), np.nan)
+        cases[years[in_season] - span[0], weeks[in_season] - 1] = counts[:, in_season].T
+        long_years = np.unique(years[weeks == SEASON_WEEKS + 1]).tolist()
+        return cls(list(locations) + [ALL_MUNICIPALITIES], span.tolist(), cases, method, window, long_years)
+
+    def _year_index(self, year):
+        index = year - self.years[0]
+        if not 0 <= index <= len(self.years):
+            raise KeyError(f"No channel for year {year}")
+        return index
+
+    def channel(self, year, location=ALL_MUNICIPALITIES, weeks=None):
+        """
+        (lower, center, upper) arrays for one year and location
+
+        `year` may be the season after the last one in the data; `weeks`
+        (1-based) defaults to the whole season.
+        """
+        weeks = np.arange(1, SEASON_WEEKS + 1) if weeks is None else np.asarray(weeks, dtype=int)
+        lower, center, upper = self.bounds[:, self._year_index(year), weeks - 1, self.names.index(location)]
+        return lower, center, upper
+
+    def around(self, year, week, offsets, location=ALL_MUNICIPALITIES):
+        """
+        (3, len(offsets)) bounds at week offsets from (year, week)
+
+        Offsets run across season boundaries: seasons have 52 weeks, or 53
+        in `long_years` (week 53 takes week 52's channel), and the season
+        after the data is taken to have 52. Positions with no channel are NaN.
+        """
+        lengths = [SEASON_WEEKS + (y in self.long_years) for y in self.years] + [SEASON_WEEKS]
+        starts = np.concatenate([[0], np.cumsum(lengths)])
+        absolute = starts[self._year_index(year)] + week - 1 + np.asarray(offsets, dtype=int)
+        valid = (absolute >= 0) & (absolute < starts[-1])
+        year_idx = np.searchsorted(starts, absolute[valid], side='right') - 1
+        week_idx = np.minimum(absolute[valid] - starts[year_idx], SEASON_WEEKS - 1)
+        bounds = np.full((3, len(absolute)), np.nan)
+        bounds[:, valid] = self.bounds[:, year_idx, week_idx, self.names.index(location)]
+        return bounds
+
+    def zones(self):
+        """
+        Long DataFrame of municipality, year, week, cases, lower, center,
+        upper and zone for every reported week
+        """
+        n_years = len(self.years)
+        lower, center, upper = self.bounds[:, :n_years]
+        zone = classify(self.cases, lower, center, upper)
+        year_idx, week_idx, loc_idx = np.nonzero(~np.isnan(self.cases))
+        labels = np.asarray(ZONES + [None], dtype=object)
+        return pd.DataFrame({
+            'municipality': np.asarray(self.names, dtype=object)[loc_idx],
+            'year': np.asarray(self.years)[year_idx],
+            'week': week_idx + 1,
+            'cases': self.cases[year_idx, week_idx, loc_idx],
+            'lower': lower[year_idx, week_idx, loc_idx],
+            'center': center[year_idx, week_idx, loc_idx],
+            'upper': upper[year_idx, week_idx, loc_idx],
+            'zone': labels[zone[year_idx, week_idx, loc_idx]],
+        })
@@ -0,0 +1,188 @@
+"""
+Backtest-Weighted Ensemble Forecaster
+Dengue Surveillance System - Zamboanga Sibugay
+Combines NB, ZINB and Markov-switching forecasts with inverse-MASE weights
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+class EnsembleForecaster:
+    """
+    Inverse-MASE weighted combination of member forecasts
+
+    Absolute one-step errors of each member and of the naive (previous week)
+    forecast are accumulated with exponential forgetting, so weights track
+    recent backtest performance. New weeks are scored incrementally: weeks
+    at or before the last scored (year, week) key are skipped. State is
+    kept per dataset version, since a corrected or refitted dataset changes
+    weeks that were already scored.
+    """
+
+    def __init__(self, members, decay=0.97):
+        self.members = list(members)
+        self.decay = float(decay)
+        self.errors = np.zeros(len(self.members))
+        self.counts = np.zeros(len(self.members))
+        self.naive_error = 0.0
+        self.naive_count = 0.0
+        self.n_scored = 0
+        self.last_key = None
+        self.dataset_version = None
+
+    def score(self, keys, actual, member_predictions, previous=None):
+        """
+        Score newly observed weeks against member predictions
+
+        Args:
+            keys: (year, week) tuple per observed week, in time order
+            actual: observed cases, shape (n_weeks,)
+            member_predictions: one prediction array per member (or None
+                if that member is unavailable), each shape (n_weeks,)
+            previous: observed cases for the week before keys[0], used as
+                the first naive forecast
+
+        Returns:
+            number of weeks scored
+        """
+        keys = [tuple(int(v) for v in key) for key in keys]
+        actual = np.asarray(actual, dtype=float)
+        start = 0
+        if self.last_key is not None:
+            while start < len(keys) and keys[start] <= self.last_key:
+                start += 1
+        if start >= len(keys):
+            return 0
+
+        predictions = np.full((len(self.members), len(keys)), np.nan)
+        for i, pred in enumerate(member_predictions):
+            if pred is not None:
+                predictions[i] = np.asarray(pred, dtype=float).ravel()
+
+        # Naive one-step forecast is the previous observed week
+        naive = np.concatenate([[np.nan if previous is None else previous], actual[:-1]])
+
+        new_actual = actual[start:]
+        new_predictions = predictions[:, start:]
+        new_naive = naive[start:]
+        n_new = len(new_actual)
+
+        # Discount older weeks inside the block: weight decay**(age in weeks)
+        discount = self.decay ** np.arange(n_new - 1, -1, -1)
+        abs_errors = np.abs(new_predictions - new_actual)
+        valid = ~np.isnan(abs_errors)
+        naive_errors = np.abs(new_naive - new_actual)
+        naive_valid = ~np.isnan(naive_errors)
+
+        carry = self.decay ** n_new
+        self.errors = carry * self.errors + np.where(valid, abs_errors, 0.0) @ discount
+        self.counts = carry * self.counts + valid @ discount
+        self.naive_error = carry * self.naive_error + np.where(naive_valid, naive_errors, 0.0) @ discount
+        self.naive_count = carry * self.naive_count + naive_valid @ discount
+
+        self.n_scored += n_new
+        self.last_key = keys[-1]
+        return n_new
+
+    @property
+    def mase(self):
+        """Discounted MASE per member (NaN for members never scored)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mae = np.where(self.counts > 0, self.errors / self.counts, np.nan)
+            naive_mae = self.naive_error / self.naive_count if self.naive_count > 0 else np.nan
+            if not naive_mae > 0:
+                return mae
+            return mae / naive_mae
+
+    @property
+    def weights(self):
+        """Normalised inverse-MASE weights (equal weights before any scoring)"""
+        mase = self.mase
+        usable = np.isfinite(mase)
+        if not usable.any():
+            return np.full(len(self.members), 1.0 / len(self.members))
+        inverse = np.where(usable, 1.0 / np.maximum(np.where(usable, mase, 1.0), 1e-6), 0.0)
+        return inverse / inverse.sum()
+
+    def forecast(self, member_forecasts):
+        """
+        Combine member forecasts in one vectorized pass
+
+        Args:
+            member_forecasts: one forecast array per member (None if that
+                member is unavailable), each of shape (horizon,)
+
+        Returns:
+            array of shape (n_members + 1, horizon); the last row is the
+            ensemble, with weights renormalised over available members
+        """
+        horizon = max((len(f) for f in member_forecasts if f is not None), default=0)
+        stacked = np.full((len(self.members), horizon), np.nan)
+        for i, forecast in enumerate(member_forecasts):
+            if forecast is not None:
+                stacked[i] = np.asarray(forecast, dtype=float).ravel()
+
+        available = ~np.isnan(stacked)
+        weights = self.weights[:, np.newaxis] * available
+        totals = weights.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            combined = np.where(totals > 0,
+                                (weights * np.nan_to_num(stacked)).sum(axis=0) / totals,
+                                np.nan)
+        return np.vstack([stacked, combined])
+
+    def to_dict(self):
+        """Serialisable ensemble state"""
+        return {
+            'members': self.members,
+            'decay': self.decay,
+            'errors': self.errors.tolist(),
+            'counts': self.counts.tolist(),
+            'naive_error': float(self.naive_error),
+            'naive_count': float(self.naive_count),
+            'n_scored': int(self.n_scored),
+            'last_key': list(self.last_key) if self.last_key is not None else None,
+            'dataset_version': self.dataset_version,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Rebuild an ensemble from to_dict() output"""
+        ensemble = cls(state['members'], decay=state.get('decay', 0.97))
+        ensemble.errors = np.asarray(state['errors'], dtype=float)
+        ensemble.counts = np.asarray(state['counts'], dtype=float)
+        ensemble.naive_error = float(state['naive_error'])
+        ensemble.naive_count = float(state.get('naive_count', 0.0))
+        ensemble.n_scored = int(state['n_scored'])
+        ensemble.last_key = tuple(state['last_key']) if state.get('last_key') else None
+        ensemble.dataset_version = state.get('dataset_version')
+        return ensemble
+
+    @classmethod
+    def load(cls, path, members, decay=0.97, version=None):
+        """
+        Load persisted state, starting fresh if missing or for other members
+
+        With `version`, state scored against another dataset version is
+        discarded too, so every backtest week is scored again.
+        """
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            if state.get('members') == list(members) and (version is None or state.get('dataset_version') == version):
+                return cls.from_dict(state)
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+        ensemble = cls(members, decay=decay)
+        ensemble.dataset_version = version
+        return ensemble
+
+    def save(self, path):
+        """Persist state atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
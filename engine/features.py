@@ -0,0 +1,262 @@
+"""
+Distributed-Lag Climate Feature Engine
+Dengue Surveillance System - Zamboanga Sibugay
+Builds lagged climate covariates from zero-copy sliding-window views,
+and neighbour-weighted (spatial-lag) case covariates
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from engine.autocorrelation import case_matrix, row_standardize
+
+CLIMATE_VARIABLES = ['T2M_MAX', 'T2M_MIN', 'RH2M', 'PRECTOTCORR', 'QV2M', 'GWETTOP']
+
+CLIMATE_LABELS = {
+    'T2M_MAX': 'Max Temperature',
+    'T2M_MIN': 'Min Temperature',
+    'RH2M': 'Humidity',
+    'PRECTOTCORR': 'Precipitation',
+    'QV2M': 'Specific Humidity',
+    'GWETTOP': 'Surface Soil Wetness',
+}
+
+DEFAULT_LAG_RANGE = (2, 12)
+
+# Lag strata (inclusive, in weeks) averaged into one covariate each
+DEFAULT_LAG_STRATA = [(2, 4), (5, 8), (9, 12)]
+
+LAG_FEATURE_MARKER = '_lag'
+
+# Weeks by which neighbour-weighted cases are lagged
+SPATIAL_LAGS = [1, 2, 4]
+
+SPATIAL_LAG_PREFIX = 'neighbour_cases_lag'
+
+
+def lag_tensor(values, lag_min, lag_max):
+    """
+    Distributed-lag view of a (groups, time, variables) array
+
+    Returns an array of shape (groups, time, variables, lag_max - lag_min + 1)
+    where [..., t, v, k] holds values[..., t - (lag_min + k), v]. Only the
+    NaN-padded copy of the input is allocated; every lag is a strided view
+    into it, so no per-lag shift copies are made.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[np.newaxis, :, np.newaxis]
+    elif values.ndim == 2:
+        values = values[np.newaxis, :, :]
+    if lag_min < 0 or lag_max < lag_min:
+        raise ValueError(f"Invalid lag range: ({lag_min}, {lag_max})")
+
+    n_groups, _, n_vars = values.shape
+    padding = np.full((n_groups, lag_max, n_vars), np.nan)
+    padded = np.concatenate([padding, values], axis=1)
+
+    # windows[g, t, v, j] == values[g, t + j - lag_max, v]
+    windows = sliding_window_view(padded, lag_max + 1, axis=1)
+
+    # Reverse the window axis so index k maps to lag (lag_min + k)
+    return windows[..., lag_max - lag_min::-1]
+
+
+def strata_means(lagged, lag_min, strata):
+    """
+    Average a lag tensor within each lag stratum
+
+    Each stratum is a contiguous slice of the strided view, so a stratum
+    is available as soon as its own lags are, independent of longer lags.
+    """
+    n_lags = lagged.shape[-1]
+    means = []
+    for low, high in strata:
+        start, stop = low - lag_min, high - lag_min + 1
+        if start < 0 or stop > n_lags or start >= stop:
+            raise ValueError(f"Lag stratum ({low}, {high}) is outside the lag range")
+        means.append(lagged[..., start:stop].mean(axis=-1))
+    return np.stack(means, axis=-1)
+
+
+def polynomial_basis(lag_min, lag_max, degree=2):
+    """Almon polynomial basis over lags lag_min..lag_max"""
+    lags = np.arange(lag_min, lag_max + 1, dtype=float)
+    scaled = (lags - lags.mean()) / max(lags.std(), 1.0)
+    return np.vander(scaled, degree + 1, increasing=True)
+
+
+def stack_panel(df, variables, time_cols, group_col=None):
+    """
+    Stack long-format rows into a dense (groups, time, variables) array
+
+    Rows are averaged per (group, time) key and placed on the sorted time
+    grid shared by all groups; missing group-weeks are left as NaN so that
+    lags never cross municipality boundaries.
+    """
+    keys = ([group_col] if group_col else []) + list(time_cols)
+    agg = df.groupby(keys, sort=True)[variables].mean()
+
+    time_index = agg.index.droplevel(0).unique() if group_col else agg.index
+    time_index = time_index.sort_values()
+    time_codes = time_index.get_indexer(agg.index.droplevel(0) if group_col else agg.index)
+
+    if group_col:
+        groups = agg.index.get_level_values(0).unique()
+        group_codes = groups.get_indexer(agg.index.get_level_values(0))
+    else:
+        groups = pd.Index([None])
+        group_codes = np.zeros(len(agg), dtype=int)
+
+    values = np.full((len(groups), len(time_index), len(variables)), np.nan)
+    values[group_codes, time_codes] = agg.to_numpy(dtype=float)
+
+    observed = np.zeros((len(groups), len(time_index)), dtype=bool)
+    observed[group_codes, time_codes] = True
+
+    return values, groups, time_index, observed
+
+
+def lag_feature_label(column):
+    """Human-readable label for a lagged covariate column"""
+    variable, _, lag = column.partition(LAG_FEATURE_MARKER)
+    label = CLIMATE_LABELS.get(variable, variable)
+    if '_' in lag:
+        low, high = lag.split('_')
+        return f"{label} (lag {low}-{high} wk)"
+    if lag.startswith('poly'):
+        return f"{label} (lag polynomial {lag[4:]})"
+    return f"{label} (lag {lag} wk)"
+
+
+def lag_feature_columns(columns):
+    """Select the lagged climate covariate columns from a column list"""
+    return [c for c in columns
+            if LAG_FEATURE_MARKER in c and c.partition(LAG_FEATURE_MARKER)[0] in CLIMATE_VARIABLES]
+
+
+def climate_lag_features(df, time_cols, variables=None, lag_range=DEFAULT_LAG_RANGE,
+                         strata=DEFAULT_LAG_STRATA, degree=None, group_col=None):
+    """
+    Build distributed-lag climate covariates
+
+    Args:
+        df: long-format dataset with one row per municipality-week
+        time_cols: ordered time key columns, e.g. ['YEAR_2', 'MORBIDITY_WEEK']
+        variables: climate columns to lag (defaults to every available
+            CLIMATE_VARIABLES column)
+        lag_range: inclusive (min, max) lag in weeks
+        strata: lag strata averaged into one covariate each; pass None to
+            keep one column per lag
+        degree: use an Almon polynomial basis of this degree instead of strata
+        group_col: stack per group (e.g. 'MUNICIPALITY') instead of
+            aggregating to the province-wide weekly mean
+
+    Returns:
+        DataFrame keyed by (group_col,) + time_cols with one column per
+        variable and lag stratum / lag / basis term
+    """
+    variables = [v for v in (variables or CLIMATE_VARIABLES) if v in df.columns]
+    lag_min, lag_max = lag_range
+    keys = ([group_col] if group_col else []) + list(time_cols)
+    if not variables:
+        return pd.DataFrame(columns=keys)
+
+    data = df[keys + variables].copy()
+    for col in variables:
+        data[col] = pd.to_numeric(data[col], errors='coerce')
+    data = data.dropna(subset=keys)
+
+    values, groups, time_index, observed = stack_panel(data, variables, time_cols, group_col)
+    lagged = lag_tensor(values, lag_min, lag_max)
+
+    if degree is not None:
+        # Project the strided view onto the basis: (G, T, V, L) @ (L, K)
+        features = lagged @ polynomial_basis(lag_min, lag_max, degree)
+        suffixes = [f"poly{k}" for k in range(degree + 1)]
+    elif strata:
+        features = strata_means(lagged, lag_min, strata)
+        suffixes = [f"{low}_{high}" for low, high in strata]
+    else:
+        features = lagged
+        suffixes = [str(lag) for lag in range(lag_min, lag_max + 1)]
+
+    n_groups, n_times, n_vars, n_terms = features.shape
+    features = features.reshape(n_groups * n_times, n_vars * n_terms)
+
+    columns = [f"{v}{LAG_FEATURE_MARKER}{s}" for v in variables for s in suffixes]
+    result = pd.DataFrame(features, columns=columns)
+
+    time_frame = time_index.to_frame(index=False)
+    time_frame.columns = list(time_cols)
+    key_frame = pd.concat([time_frame] * n_groups, ignore_index=True)
+    if group_col:
+        key_frame.insert(0, group_col, np.repeat(groups.to_numpy(), n_times))
+
+    result = pd.concat([key_frame, result], axis=1)
+    return result[observed.ravel()].reset_index(drop=True)
+
+
+def spatial_lag_tensor(counts, weights, lags=SPATIAL_LAGS):
+    """
+    Neighbour-weighted lagged cases of a (locations, time) matrix
+
+    For each lag k the row-standardised sparse weights multiply the case
+    matrix shifted by k weeks, giving every location the average of its
+    neighbours' cases k weeks earlier. Returns (locations, time, lags)
+    with NaN where the lag reaches before the first week.
+    """
+    counts = np.asarray(counts, dtype=float)
+    W = row_standardize(weights)
+    n, T = counts.shape
+    lagged = np.full((n, T, len(lags)), np.nan)
+    for j, lag in enumerate(lags):
+        if lag < T:
+            lagged[:, lag:, j] = W @ counts[:, :T - lag]
+    return lagged
+
+
+def spatial_lag_features(df, location_col, value_col, time_cols, locations, weights,
+                         lags=SPATIAL_LAGS, aggregate=False):
+    """
+    Build neighbour-weighted lagged case covariates
+
+    Args:
+        df: long-format dataset with one row per municipality-week
+        location_col, value_col: municipality and case columns
+        time_cols: ordered time key columns, e.g. ['YEAR_2', 'MORBIDITY_WEEK']
+        locations: municipality order of `weights`
+        weights: sparse contiguity weights (row-standardised here)
+        lags: lags in weeks
+        aggregate: average over municipalities to one province-wide
+            series instead of one row per municipality-week
+
+    Returns:
+        DataFrame keyed by (location_col,) + time_cols with one
+        neighbour_cases_lag{k} column per lag
+    """
+    counts, time_index = case_matrix(df, location_col, value_col, time_cols, locations)
+    lagged = spatial_lag_tensor(counts, weights, lags)
+    columns = [f"{SPATIAL_LAG_PREFIX}{lag}" for lag in lags]
+
+    time_frame = time_index.to_frame(index=False)
+    time_frame.columns = list(time_cols)
+    if aggregate:
+        return pd.concat([time_frame, pd.DataFrame(lagged.mean(axis=0), columns=columns)], axis=1)
+
+    n, T, _ = lagged.shape
+    result = pd.DataFrame(lagged.reshape(n * T, len(lags)), columns=columns)
+    key_frame = pd.concat([time_frame] * n, ignore_index=True)
+    key_frame.insert(0, location_col, np.repeat(np.asarray(locations, dtype=object), T))
+    return pd.concat([key_frame, result], axis=1)
+
+
+def spatial_lag_label(column):
+    """Human-readable label for a spatial-lag covariate column"""
+    return f"Neighbour Cases (lag {column[len(SPATIAL_LAG_PREFIX):]} wk)"
+
+
+def spatial_lag_columns(columns):
+    """Select the spatial-lag covariate columns from a column list"""
+    return [c for c in columns if c.startswith(SPATIAL_LAG_PREFIX)]
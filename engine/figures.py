@@ -0,0 +1,108 @@
+"""
+Plotly Figure Cache
+Dengue Surveillance System - Zamboanga Sibugay
+Serialized figures keyed by chart type and a normalized filter signature
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Upper bound on cached figure JSON (characters, roughly bytes)
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def _normalize(value):
+    """
+    Canonical JSON-compatible form of a filter value
+
+    Lists and sets are order-insensitive selections and are sorted;
+    tuples are ordered ranges and keep their order. NumPy scalars and
+    arrays become plain Python values.
+    """
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, set, frozenset, np.ndarray)):
+        items = [_normalize(v) for v in (value.tolist() if isinstance(value, np.ndarray) else value)]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(value, tuple):
+        return [_normalize(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def filter_signature(filters):
+    """Stable hash of a filter dict, independent of selection order"""
+    canonical = json.dumps(_normalize(filters), sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+class FigureCache:
+    """
+    Size-bounded LRU cache of serialized Plotly figures
+
+    Figures are stored as JSON text, so a hit skips the aggregation and
+    figure construction and returns a fresh dict that callers may not
+    mutate back into the cache. The least recently used figures are
+    evicted once the stored JSON exceeds max_bytes. Safe to share between
+    Streamlit sessions (threads).
+    """
+
+    def __init__(self, max_bytes=FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Cached figure JSON for a key, or None"""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text):
+        """Store figure JSON, evicting least recently used entries to fit"""
+        if len(text) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            self._entries[key] = text
+            self.size += len(text)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def get_or_build(self, chart_type, filters, build):
+        """
+        Figure dict for a chart type and filter state
+
+        `build` is called without arguments on a miss and must return a
+        plotly Figure; its JSON is cached under the chart type and the
+        normalized filter signature.
+        """
+        key = f"{chart_type}:{filter_signature(filters)}"
+        text = self.get(key)
+        if text is None:
+            text = build().to_json()
+            self.put(key, text)
+        return json.loads(text)
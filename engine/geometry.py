@@ -0,0 +1,335 @@
+"""
+Municipality Geometry Preprocessing
+Dengue Surveillance System - Zamboanga Sibugay
+Multi-resolution, topology-preserving simplified boundaries for choropleths
+
+Boundaries arrive as WKT in the dataset CSV. They are parsed in bulk,
+repaired once at ingest and kept in a WKB sidecar (artifacts/geometry.parquet)
+so later loads decode binary geometry instead of re-reading the WKT column.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from engine.autocorrelation import contiguity_weights
+from engine.data import ARTIFACT_DIR, DATA_FILE, artifact_path
+
+try:
+    import shapely
+    SHAPELY_AVAILABLE = True
+except ImportError:
+    SHAPELY_AVAILABLE = False
+
+GEOMETRY_ARTIFACT = 'geometry_levels.json'
+GEOMETRY_STORE = 'geometry.parquet'
+
+# (level, simplification tolerance in degrees, minimum map zoom it is meant for)
+SIMPLIFICATION_LEVELS = [
+    ('full', 0.0, 12),
+    ('high', 0.0005, 10),
+    ('medium', 0.002, 8),
+    ('low', 0.008, 0),
+]
+
+# Coordinate grid for quantization (1e-4 degrees is about 11 m here)
+QUANTIZE_GRID = 1e-4
+
+# Default upper bound for one map's GeoJSON payload
+MAP_PAYLOAD_BUDGET = 250_000
+
+
+def parse_municipality_geometries(df, location_col='MUNICIPALITY', geometry_col='geometry'):
+    """Municipality names and parsed, repaired boundaries, one per municipality"""
+    rows = df.drop_duplicates(subset=[location_col])[[location_col, geometry_col]]
+    rows = rows[rows[geometry_col].notna() & (rows[geometry_col].astype(str) != '')]
+    geometries = shapely.from_wkt(rows[geometry_col].to_numpy(dtype=object), on_invalid='ignore')
+    keep = ~shapely.is_missing(geometries)
+    return rows[location_col].to_numpy(dtype=object)[keep], repair_geometries(geometries[keep])
+
+
+def _polygonal(geometry):
+    """Polygonal part of a repaired geometry (drops collapsed lines/points)"""
+    parts = shapely.get_parts(shapely.get_parts(geometry))
+    polygons = parts[np.isin(shapely.get_type_id(parts), [3, 6])]
+    return shapely.union_all(polygons) if len(polygons) else None
+
+
+def repair_geometries(geometries):
+    """
+    Make invalid boundaries valid
+
+    Self-intersections and bad ring orientation break simplification and
+    centroids, so they are fixed once here. Repairs keep only polygonal
+    output, since a choropleth cannot draw stray lines or points.
+    """
+    invalid = ~shapely.is_valid(geometries)
+    if not invalid.any():
+        return geometries
+
+    repaired = geometries.copy()
+    try:
+        repaired[invalid] = shapely.make_valid(geometries[invalid], method='structure', keep_collapsed=False)
+    except TypeError:
+        # shapely < 2.1 only has the linework method
+        repaired[invalid] = [_polygonal(g) for g in shapely.make_valid(geometries[invalid])]
+    print(f"Repaired {int(invalid.sum())} invalid municipality boundaries")
+    return repaired
+
+
+def write_geometry_store(names, geometries, version, artifact_dir=ARTIFACT_DIR):
+    """Persist boundaries as WKB for a dataset version (atomic, best effort)"""
+    frame = pd.DataFrame({
+        'municipality': names,
+        'wkb': shapely.to_wkb(geometries),
+        'dataset_version': version,
+    })
+    try:
+        path = artifact_path(GEOMETRY_STORE, artifact_dir)
+        frame.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+    except (ImportError, OSError) as e:
+        print(f"Could not write geometry store: {e}")
+
+
+def read_geometry_store(version=None, artifact_dir=ARTIFACT_DIR):
+    """
+    Names and boundaries from the WKB store
+
+    Returns None if the store is missing, unreadable or (when version is
+    given) written for another dataset version.
+    """
+    try:
+        frame = pd.read_parquet(os.path.join(artifact_dir, GEOMETRY_STORE))
+    except (FileNotFoundError, ImportError, OSError, ValueError):
+        return None
+    if frame.empty or (version is not None and frame['dataset_version'].iloc[0] != version):
+        return None
+    return frame['municipality'].to_numpy(dtype=object), shapely.from_wkb(frame['wkb'].to_numpy(dtype=object))
+
+
+def ingest_geometries(df, version, location_col='MUNICIPALITY', geometry_col='geometry',
+                      artifact_dir=ARTIFACT_DIR):
+    """Parse and repair the dataset's WKT boundaries and store them as WKB"""
+    names, geometries = parse_municipality_geometries(df, location_col, geometry_col)
+    write_geometry_store(names, geometries, version, artifact_dir)
+    return names, geometries
+
+
+def update_geometry_store(new_rows, previous_version, version, location_col='MUNICIPALITY',
+                          geometry_col='geometry', artifact_dir=ARTIFACT_DIR):
+    """
+    Carry the WKB store over to a new dataset version after an append
+
+    Appended rows reuse their municipality's boundary, so only
+    municipalities not yet in the store are parsed. Returns False if there
+    is no store for `previous_version` to extend (the next load then
+    ingests from the CSV).
+    """
+    stored = read_geometry_store(previous_version, artifact_dir)
+    if stored is None:
+        return False
+    names, geometries = stored
+    unseen = new_rows[~new_rows[location_col].isin(names)]
+    if len(unseen) > 0:
+        new_names, new_geometries = parse_municipality_geometries(unseen, location_col, geometry_col)
+        names = np.concatenate([names, new_names])
+        geometries = np.concatenate([geometries, new_geometries])
+    write_geometry_store(names, geometries, version, artifact_dir)
+    return True
+
+
+def load_municipality_geometries(version, location_col='MUNICIPALITY', geometry_col='geometry',
+                                 data_file=DATA_FILE, artifact_dir=ARTIFACT_DIR):
+    """Boundaries for a dataset version: WKB store if current, else ingest the CSV"""
+    stored = read_geometry_store(version, artifact_dir)
+    if stored is not None:
+        return stored
+    df = pd.read_csv(data_file, usecols=[location_col, geometry_col])
+    return ingest_geometries(df, version, location_col, geometry_col, artifact_dir)
+
+
+def simplify_coverage(geometries, tolerance):
+    """
+    Simplify adjacent polygons without opening gaps or overlaps
+
+    Uses GEOS coverage simplification, which simplifies each shared edge
+    once, when available (shapely >= 2.1); otherwise falls back to
+    per-polygon topology-preserving simplification.
+    """
+    if tolerance <= 0:
+        return geometries
+    if hasattr(shapely, 'coverage_simplify'):
+        try:
+            return shapely.coverage_simplify(geometries, tolerance)
+        except shapely.errors.GEOSException:
+            pass
+    return shapely.simplify(geometries, tolerance, preserve_topology=True)
+
+
+def quantize(geometries, grid_size=QUANTIZE_GRID):
+    """Snap coordinates to a fixed grid, dropping repeated vertices"""
+    return shapely.set_precision(geometries, grid_size)
+
+
+def feature_collection(names, geometries, id_property='MUNICIPALITY'):
+    """Compact GeoJSON FeatureCollection text keyed by municipality name"""
+    geometry_json = shapely.to_geojson(geometries)
+    features = [
+        f'{{"type":"Feature","id":{json.dumps(name)},'
+        f'"properties":{{{json.dumps(id_property)}:{json.dumps(name)}}},"geometry":{geometry}}}'
+        for name, geometry in zip(names, geometry_json)
+    ]
+    return '{"type":"FeatureCollection","features":[' + ','.join(features) + ']}'
+
+
+def build_geometry_levels(names, geometries, levels=SIMPLIFICATION_LEVELS, grid_size=QUANTIZE_GRID):
+    """
+    GeoJSON text for every simplification level
+
+    Returns a list of dicts (level, tolerance, min_zoom, vertices, bytes,
+    geojson) ordered from finest to coarsest.
+    """
+    built = []
+    for level, tolerance, min_zoom in levels:
+        simplified = quantize(simplify_coverage(geometries, tolerance), grid_size)
+        text = feature_collection(names, simplified)
+        built.append({
+            'level': level,
+            'tolerance': tolerance,
+            'min_zoom': min_zoom,
+            'vertices': int(shapely.get_num_coordinates(simplified).sum()),
+            'bytes': len(text),
+            'geojson': text,
+        })
+    return built
+
+
+def select_level(levels, zoom=None, max_bytes=None):
+    """
+    Pick the finest level allowed by zoom and payload budget
+
+    A level qualifies when the map zoom is at least its min_zoom and its
+    GeoJSON fits in max_bytes; the coarsest level is the fallback.
+    """
+    for entry in levels:
+        if zoom is not None and zoom < entry['min_zoom']:
+            continue
+        if max_bytes is not None and entry['bytes'] > max_bytes:
+            continue
+        return entry
+    return levels[-1]
+
+
+def read_geometry_levels(version, artifact_dir=ARTIFACT_DIR):
+    """Cached geometry levels if they match the dataset version, else None"""
+    try:
+        with open(os.path.join(artifact_dir, GEOMETRY_ARTIFACT)) as f:
+            cached = json.load(f)
+        if version is not None and cached.get('dataset_version') == version:
+            return cached['levels']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    return None
+
+
+def write_geometry_levels(levels, version, artifact_dir=ARTIFACT_DIR):
+    """Cache geometry levels for a dataset version (atomic, best effort)"""
+    try:
+        path = artifact_path(GEOMETRY_ARTIFACT, artifact_dir)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'dataset_version': version, 'levels': levels}, f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        print(f"Could not cache geometry levels: {e}")
+
+
+def load_geometry_levels(names, geometries, version, artifact_dir=ARTIFACT_DIR):
+    """
+    Geometry levels for a dataset version, rebuilt only when it changes
+
+    The levels are cached in artifact_dir so a restarted server, or the
+    batch pipeline, can reuse them without re-simplifying.
+    """
+    levels = read_geometry_levels(version, artifact_dir)
+    if levels is None:
+        levels = build_geometry_levels(names, geometries)
+        write_geometry_levels(levels, version, artifact_dir)
+    return levels
+
+
+def map_geojson(levels, zoom=None, max_bytes=MAP_PAYLOAD_BUDGET):
+    """GeoJSON dict for a choropleth at the given zoom and payload budget"""
+    return json.loads(select_level(levels, zoom, max_bytes)['geojson'])
+
+
+class SpatialAsset:
+    """
+    Parsed boundaries, GeoJSON levels and centroids for one dataset version
+
+    Built once and shared read-only by every map; an interaction only
+    joins fresh values (risk scores, case counts) onto the municipality
+    table instead of re-parsing or re-serialising geometry.
+    """
+
+    def __init__(self, names, geometries, levels, version=None):
+        self.names = names
+        self.geometries = geometries
+        self.levels = levels
+        self.version = version
+
+        centroids = shapely.centroid(geometries)
+        self.centroids = pd.DataFrame({
+            'municipality': names,
+            'lon': shapely.get_x(centroids),
+            'lat': shapely.get_y(centroids),
+        })
+        self.center = {'lat': float(self.centroids['lat'].mean()), 'lon': float(self.centroids['lon'].mean())}
+        self.bounds = tuple(float(v) for v in shapely.total_bounds(geometries))
+        self._geojson = {}
+        self._weights = {}
+        self._outline = None
+
+    def geojson(self, zoom=None, max_bytes=MAP_PAYLOAD_BUDGET):
+        """GeoJSON dict for a map, parsed once per level"""
+        entry = select_level(self.levels, zoom, max_bytes)
+        if entry['level'] not in self._geojson:
+            self._geojson[entry['level']] = json.loads(entry['geojson'])
+        return self._geojson[entry['level']]
+
+    def outline(self):
+        """
+        Province outline as lon/lat lists for a line trace
+
+        The dissolved boundary of all municipalities, with None between
+        rings so one trace draws every part.
+        """
+        if self._outline is None:
+            province = shapely.coverage_union_all(self.geometries) if hasattr(shapely, 'coverage_union_all') \
+                else shapely.union_all(self.geometries)
+            lon, lat = [], []
+            for ring in shapely.get_parts(shapely.boundary(province)):
+                coords = shapely.get_coordinates(ring)
+                lon += coords[:, 0].tolist() + [None]
+                lat += coords[:, 1].tolist() + [None]
+            self._outline = (lon, lat)
+        return self._outline
+
+    def weights(self, criterion='queen'):
+        """Sparse contiguity weights in `names` order, built once per criterion"""
+        if criterion not in self._weights:
+            self._weights[criterion] = contiguity_weights(self.geometries, criterion)
+        return self._weights[criterion]
+
+    def join(self, values, on='municipality'):
+        """Attach centroid coordinates to per-municipality values"""
+        return values.merge(self.centroids, left_on=on, right_on='municipality', how='left',
+                            suffixes=('', '_geometry'))
+
+
+def build_spatial_asset(names, geometries, version, artifact_dir=ARTIFACT_DIR):
+    """SpatialAsset for parsed boundaries, reusing cached simplification levels"""
+    levels = load_geometry_levels(names, geometries, version, artifact_dir)
+    return SpatialAsset(names, geometries, levels, version)
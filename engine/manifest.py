@@ -0,0 +1,144 @@
+"""
+Dataset Summary Manifest
+Dengue Surveillance System - Zamboanga Sibugay
+Small JSON summary of the dataset (counts, ranges, last epi-week)
+
+The landing page, page headers and sidebar filters read this instead of
+parsing the CSV.
+The batch pipeline writes it in full, and Data Entry folds appended rows
+into it, so it stays keyed to the current dataset version without
+rescanning the file.
+"""
+
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from engine.data import ARTIFACT_DIR, DATA_FILE, artifact_path, dataset_version
+
+MANIFEST_ARTIFACT = 'manifest.json'
+
+LOCATION_COLUMN = 'MUNICIPALITY'
+CASES_COLUMN = 'CASES'
+YEAR_COLUMN = 'YEAR_2'
+WEEK_COLUMN = 'MORBIDITY_WEEK'
+
+MANIFEST_COLUMNS = [LOCATION_COLUMN, CASES_COLUMN, YEAR_COLUMN, WEEK_COLUMN]
+
+MANIFEST_FIELDS = ['records', 'total_cases', 'municipalities', 'years', 'year_min', 'year_max',
+                   'last_year', 'last_week']
+
+# Raised when a stale manifest cannot be rebuilt (malformed, partial or incomplete CSV)
+MANIFEST_ERRORS = (ValueError, pd.errors.ParserError, OSError)
+
+
+def _summarize(rows):
+    """Counts and ranges of a frame holding MANIFEST_COLUMNS"""
+    cases = pd.to_numeric(rows[CASES_COLUMN], errors='coerce')
+    years = pd.to_numeric(rows[YEAR_COLUMN], errors='coerce')
+    weeks = pd.to_numeric(rows[WEEK_COLUMN], errors='coerce')
+    epi_weeks = (years * 100 + weeks).dropna()
+    last = int(epi_weeks.max()) if len(epi_weeks) else None
+    return {
+        'records': int(len(rows)),
+        'total_cases': float(cases.sum()),
+        'municipalities': sorted(str(m) for m in rows[LOCATION_COLUMN].dropna().unique()),
+        'years': sorted(int(y) for y in years.dropna().unique()),
+        'year_min': int(years.min()) if years.notna().any() else None,
+        'year_max': int(years.max()) if years.notna().any() else None,
+        'last_year': None if last is None else last // 100,
+        'last_week': None if last is None else last % 100,
+    }
+
+
+def _merge(summary, addition):
+    """Fold the summary of appended rows into an existing summary"""
+    def extreme(pick, a, b):
+        present = [v for v in (a, b) if v is not None]
+        return pick(present) if present else None
+
+    epi_weeks = [(s['last_year'], s['last_week']) for s in (summary, addition) if s['last_year'] is not None]
+    last = max(epi_weeks) if epi_weeks else None
+    return {
+        'records': summary['records'] + addition['records'],
+        'total_cases': summary['total_cases'] + addition['total_cases'],
+        'municipalities': sorted(set(summary['municipalities']) | set(addition['municipalities'])),
+        'years': sorted(set(summary['years']) | set(addition['years'])),
+        'year_min': extreme(min, summary['year_min'], addition['year_min']),
+        'year_max': extreme(max, summary['year_max'], addition['year_max']),
+        'last_year': None if last is None else last[0],
+        'last_week': None if last is None else last[1],
+    }
+
+
+def _describes(manifest, version):
+    """Whether a stored manifest is complete and written for `version`"""
+    return (manifest is not None and manifest.get('dataset_version') == version
+            and all(field in manifest for field in MANIFEST_FIELDS))
+
+
+def write_manifest(summary, version, artifact_dir=ARTIFACT_DIR):
+    """Write a summary atomically, stamped with the dataset version it describes"""
+    manifest = dict(summary, dataset_version=version, updated_at=datetime.now().isoformat(timespec='seconds'))
+    path = artifact_path(MANIFEST_ARTIFACT, artifact_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_manifest(artifact_dir=ARTIFACT_DIR):
+    """Stored manifest, or None if it has not been written"""
+    try:
+        with open(os.path.join(artifact_dir, MANIFEST_ARTIFACT)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def build_manifest(df, version, artifact_dir=ARTIFACT_DIR):
+    """Summarize a full dataset and write its manifest"""
+    return write_manifest(_summarize(df), version, artifact_dir)
+
+
+def update_manifest(new_rows, previous_version, version, artifact_dir=ARTIFACT_DIR):
+    """
+    Fold appended rows into the manifest after an append
+
+    Only the new rows are summarized. Returns None if the stored manifest
+    does not describe `previous_version` (the next load then rebuilds it
+    from the CSV).
+    """
+    manifest = read_manifest(artifact_dir)
+    if not _describes(manifest, previous_version):
+        return None
+    return write_manifest(_merge(manifest, _summarize(new_rows)), version, artifact_dir)
+
+
+def load_manifest(data_file=DATA_FILE, artifact_dir=ARTIFACT_DIR):
+    """
+    Manifest of the current dataset
+
+    Reads the stored manifest when its version matches the CSV; otherwise
+    rebuilds it from the four summary columns. Returns None if the dataset
+    does not exist.
+    """
+    version = dataset_version(data_file)
+    if version is None:
+        return None
+    manifest = read_manifest(artifact_dir)
+    if _describes(manifest, version):
+        return manifest
+    df = pd.read_csv(data_file, usecols=MANIFEST_COLUMNS)
+    return build_manifest(df, version, artifact_dir)
+
+
+def current_manifest(data_file=DATA_FILE, artifact_dir=ARTIFACT_DIR):
+    """load_manifest, or None when the CSV cannot be summarized, so a page can fall back"""
+    try:
+        return load_manifest(data_file, artifact_dir)
+    except MANIFEST_ERRORS:
+        return None
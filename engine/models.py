@@ -0,0 +1,653 @@
+"""
+Predictive Modelling Functions
+Dengue Surveillance System - Zamboanga Sibugay
+Negative Binomial, Zero-Inflated NB and Markov-switching models, free of Streamlit
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+import warnings
+warnings.filterwarnings('ignore')
+
+from engine.autocorrelation import case_matrix
+from engine.scan import week_labels
+from engine.seasonal import SeasonalDecomposition
+from engine.features import (
+    DEFAULT_LAG_RANGE, climate_lag_features, lag_feature_columns, lag_feature_label, spatial_lag_columns,
+    spatial_lag_features, spatial_lag_label,
+)
+
+# Try imports for models
+try:
+    import statsmodels.api as sm
+    from statsmodels.discrete.count_model import ZeroInflatedNegativeBinomialP
+    from statsmodels.tsa.regime_switching.markov_regression import MarkovRegression
+    STATSMODELS_AVAILABLE = True
+    MARKOV_AVAILABLE = True
+except ImportError:
+    STATSMODELS_AVAILABLE = False
+    MARKOV_AVAILABLE = False
+
+# One distributed-lag term per climate variable (the whole 2-12 week window)
+# keeps the significance model to a handful of climate columns
+SIGNIFICANCE_LAG_STRATA = [DEFAULT_LAG_RANGE]
+
+# Columns with less than this share of their variance left after the
+# earlier columns are treated as collinear and left out of the design
+COLLINEARITY_TOLERANCE = 1e-6
+
+def find_columns(df):
+    """Dynamically find relevant columns"""
+    columns = {}
+    col_lower = {c.lower(): c for c in df.columns}
+    
+    for pattern in ['mun', 'municipality', 'city', 'location']:
+        for key, orig in col_lower.items():
+            if pattern in key:
+                columns['location'] = orig
+                break
+        if 'location' in columns:
+            break
+    
+    for pattern in ['case', 'count', 'total']:
+        for key, orig in col_lower.items():
+            if pattern in key and 'date' not in key:
+                columns['cases'] = orig
+                break
+        if 'cases' in columns:
+            break
+    
+    for pattern in ['year_2', 'year']:
+        for key, orig in col_lower.items():
+            if pattern in key:
+                columns['year'] = orig
+                break
+        if 'year' in columns:
+            break
+    
+    for pattern in ['morbidity_week', 'morbidity']:
+        for key, orig in col_lower.items():
+            if pattern in key:
+                columns['week'] = orig
+                break
+        if 'week' in columns:
+            break
+    
+    if 'week' not in columns:
+        for key, orig in col_lower.items():
+            if 'week' in key and 'year' not in key and df[orig].nunique() > 1:
+                columns['week'] = orig
+                break
+    
+    for pattern in ['geometry', 'geom']:
+        for key, orig in col_lower.items():
+            if pattern in key:
+                columns['geometry'] = orig
+                break
+        if 'geometry' in columns:
+            break
+    
+    # Environmental columns
+    for pattern in ['t2m_max', 'temp_max', 'temperature']:
+        for key, orig in col_lower.items():
+            if pattern in key:
+                columns['temp_max'] = orig
+                break
+        if 'temp_max' in columns:
+            break
+    
+    for pattern in ['rh2m', 'humidity', 'rh']:
+        for key, orig in col_lower.items():
+            if pattern in key:
+                columns['humidity'] = orig
+                break
+        if 'humidity' in columns:
+            break
+    
+    for pattern in ['prectot', 'precip', 'rain']:
+        for key, orig in col_lower.items():
+            if pattern in key:
+                columns['precipitation'] = orig
+                break
+        if 'precipitation' in columns:
+            break
+    
+    return columns
+
+def get_dataset_dates(df, year_col, week_col):
+    """Get last date in dataset"""
+    # Drop NaN values before converting
+    clean_df = df.dropna(subset=[year_col, week_col])
+    years = clean_df[year_col].astype(int)
+    max_year = years.max()
+    full_year = 2000 + max_year if max_year < 100 else max_year
+    
+    max_year_data = clean_df[clean_df[year_col].astype(int) == max_year]
+    max_week = int(max_year_data[week_col].max())
+    
+    jan1 = datetime(full_year, 1, 1)
+    if jan1.weekday() <= 3:
+        week1_start = jan1 - timedelta(days=jan1.weekday())
+    else:
+        week1_start = jan1 + timedelta(days=7 - jan1.weekday())
+    
+    last_date = week1_start + timedelta(weeks=max_week - 1)
+    return last_date, full_year, max_week
+
+def prepare_regression_data(df, cols):
+    """Prepare time series for regression"""
+    time_series = df.groupby([cols['year'], cols['week']])[cols['cases']].sum().reset_index()
+    time_series.columns = ['year', 'week', 'cases']
+    time_series = time_series.sort_values(['year', 'week']).reset_index(drop=True)
+    time_series['time_index'] = range(len(time_series))
+    time_series['lag1'] = time_series['cases'].shift(1).fillna(0)
+    time_series['rolling_mean_4'] = time_series['cases'].rolling(window=4, min_periods=1).mean()
+    
+    for col in ['cases', 'time_index', 'lag1', 'rolling_mean_4']:
+        time_series[col] = time_series[col].astype(float)
+    
+    return time_series
+
+def prepare_full_regression_data(df, cols, locations=None, weights=None):
+    """
+    Prepare data with environmental variables for significance analysis
+
+    The province-wide seasonal component of the harmonic decomposition is
+    added as a covariate. With municipality `locations` and their contiguity
+    `weights`, the province-wide mean of neighbour-weighted lagged cases is
+    added too.
+    """
+    # Aggregate by time period
+    agg_dict = {cols['cases']: 'sum'}
+    
+    if 'temp_max' in cols:
+        agg_dict[cols['temp_max']] = 'mean'
+    if 'humidity' in cols:
+        agg_dict[cols['humidity']] = 'mean'
+    if 'precipitation' in cols:
+        agg_dict[cols['precipitation']] = 'mean'
+    
+    time_series = df.groupby([cols['year'], cols['week']]).agg(agg_dict).reset_index()
+    
+    # Rename columns
+    rename_dict = {cols['year']: 'year', cols['week']: 'week', cols['cases']: 'cases'}
+    if 'temp_max' in cols:
+        rename_dict[cols['temp_max']] = 'temp_max'
+    if 'humidity' in cols:
+        rename_dict[cols['humidity']] = 'humidity'
+    if 'precipitation' in cols:
+        rename_dict[cols['precipitation']] = 'precipitation'
+    
+    time_series = time_series.rename(columns=rename_dict)
+    time_series = time_series.sort_values(['year', 'week']).reset_index(drop=True)
+    
+    # Add features
+    time_series['time_index'] = range(len(time_series))
+    time_series['lag1'] = time_series['cases'].shift(1).fillna(0)
+    time_series['lag2'] = time_series['cases'].shift(2).fillna(0)
+    time_series['rolling_mean_4'] = time_series['cases'].rolling(window=4, min_periods=1).mean()
+    
+    # Seasonal curve (week-of-year harmonics) of the province-wide cases
+    decomposition = SeasonalDecomposition.from_frame(df, cols)
+    time_series['seasonal'] = decomposition.seasonal_at(time_series['week'].to_numpy(dtype=float))
+    
+    # Distributed-lag climate covariates (province-wide weekly means)
+    lag_features = climate_lag_features(df, [cols['year'], cols['week']], strata=SIGNIFICANCE_LAG_STRATA)
+    lag_features = lag_features.rename(columns={cols['year']: 'year', cols['week']: 'week'})
+    time_series = time_series.merge(lag_features, on=['year', 'week'], how='left')
+    
+    # Neighbour-weighted lagged cases (spatial lags)
+    if weights is not None:
+        spatial_lags = spatial_lag_features(df, cols['location'], cols['cases'], [cols['year'], cols['week']],
+                                            locations, weights, aggregate=True)
+        spatial_lags = spatial_lags.rename(columns={cols['year']: 'year', cols['week']: 'week'})
+        time_series = time_series.merge(spatial_lags, on=['year', 'week'], how='left')
+    
+    # Convert to float
+    for col in time_series.columns:
+        if col not in ['year', 'week']:
+            time_series[col] = time_series[col].astype(float)
+    
+    return time_series
+
+def fit_negative_binomial(train_data):
+    """Fit NB model"""
+    if not STATSMODELS_AVAILABLE:
+        return None, None
+    try:
+        X = train_data[['time_index', 'lag1', 'rolling_mean_4']].values.astype(float)
+        X = sm.add_constant(X, has_constant='add')
+        y = train_data['cases'].values.astype(float)
+        model = sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=1.0))
+        results = model.fit(disp=0)
+        return model, results
+    except:
+        return None, None
+
+def independent_columns(X, tolerance=COLLINEARITY_TOLERANCE):
+    """
+    Indices of a full-rank subset of the columns of X, in column order
+
+    Columns are orthogonalized against the kept ones in turn (Gram-Schmidt);
+    a column is skipped when what is left of it is below `tolerance` of its
+    centered sum of squares, i.e. it is (nearly) a linear combination of the
+    earlier columns. A leading constant column is always kept.
+    """
+    X = np.asarray(X, dtype=float)
+    basis = []
+    keep = []
+    for j in range(X.shape[1]):
+        column = X[:, j]
+        spread = np.sum((column - column.mean()) ** 2) if keep else np.sum(column ** 2)
+        if spread == 0:
+            continue
+        residual = column.copy()
+        for _ in range(2):                              # re-orthogonalize for stability
+            for q in basis:
+                residual -= (q @ residual) * q
+        norm = residual @ residual
+        if norm <= tolerance * spread:
+            continue
+        basis.append(residual / np.sqrt(norm))
+        keep.append(j)
+    return keep
+
+def fit_nb_with_env(train_data):
+    """Fit NB model with environmental variables for significance analysis"""
+    if not STATSMODELS_AVAILABLE:
+        return None, None
+    
+    try:
+        # Build feature list
+        feature_cols = ['time_index', 'lag1', 'rolling_mean_4']
+        feature_names = ['Time Trend', 'Previous Week Cases', '4-Week Rolling Average']
+        
+        if 'temp_max' in train_data.columns:
+            feature_cols.append('temp_max')
+            feature_names.append('Max Temperature')
+        if 'humidity' in train_data.columns:
+            feature_cols.append('humidity')
+            feature_names.append('Humidity')
+        if 'precipitation' in train_data.columns:
+            feature_cols.append('precipitation')
+            feature_names.append('Precipitation')
+        if 'seasonal' in train_data.columns:
+            feature_cols.append('seasonal')
+            feature_names.append('Seasonal Component')
+        
+        # Lagged climate terms and neighbour-weighted lagged cases (when
+        # contiguity weights were available)
+        lag_cols = lag_feature_columns(train_data.columns)
+        feature_cols.extend(lag_cols)
+        feature_names.extend(lag_feature_label(c) for c in lag_cols)
+        spatial_cols = spatial_lag_columns(train_data.columns)
+        feature_cols.extend(spatial_cols)
+        feature_names.extend(spatial_lag_label(c) for c in spatial_cols)
+        
+        # The first weeks lack a full lag history; drop incomplete rows once
+        train_data = train_data.dropna(subset=feature_cols + ['cases'])
+        
+        # Centered covariates: the intercept is the log mean at average conditions
+        X = train_data[feature_cols].values.astype(float)
+        X = sm.add_constant(X - X.mean(axis=0), has_constant='add')
+        y = train_data['cases'].values.astype(float)
+        
+        keep = independent_columns(X)
+        X = X[:, keep]
+        feature_names = [(['Intercept'] + feature_names)[i] for i in keep]
+        
+        model = sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=1.0))
+        results = model.fit(disp=0)
+        
+        return results, feature_names
+    except:
+        return None, None
+
+def prepare_municipality_panel(df, cols, locations, weights):
+    """
+    Municipality-week panel with own and neighbour-weighted lagged cases
+
+    Columns: municipality, year, week, cases, lag1 and one
+    neighbour_cases_lag{k} column per spatial lag.
+    """
+    keys = [cols['location'], cols['year'], cols['week']]
+    panel = spatial_lag_features(df, cols['location'], cols['cases'], keys[1:], locations, weights)
+    cases = df.groupby(keys)[cols['cases']].sum().rename('cases').reset_index()
+    panel = panel.merge(cases, on=keys, how='left')
+    panel['cases'] = panel['cases'].fillna(0).astype(float)
+    panel = panel.rename(columns={cols['location']: 'municipality', cols['year']: 'year', cols['week']: 'week'})
+    panel = panel.sort_values(['municipality', 'year', 'week']).reset_index(drop=True)
+    panel['lag1'] = panel.groupby('municipality')['cases'].shift(1)
+    return panel
+
+def fit_municipality_spillover(panel):
+    """
+    Per-municipality NB fits of weekly cases on own and neighbours' lagged cases
+
+    Returns one row per municipality with the coefficient and p-value of
+    each spatial lag, or an empty DataFrame without statsmodels.
+    """
+    if not STATSMODELS_AVAILABLE:
+        return pd.DataFrame()
+    
+    spatial_cols = spatial_lag_columns(panel.columns)
+    rows = []
+    for municipality, data in panel.groupby('municipality', sort=True):
+        data = data.dropna(subset=['lag1'] + spatial_cols)
+        row = {'municipality': municipality, 'n_weeks': len(data)}
+        try:
+            X = sm.add_constant(data[['lag1'] + spatial_cols].values.astype(float), has_constant='add')
+            y = data['cases'].values.astype(float)
+            results = sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=1.0)).fit(disp=0)
+            params, pvalues = np.asarray(results.params), np.asarray(results.pvalues)
+            for i, col in enumerate(spatial_cols, start=2):
+                row[f"{col}_coef"] = float(params[i])
+                row[f"{col}_pvalue"] = float(pvalues[i])
+            row['aic'] = float(results.aic)
+        except Exception as e:
+            print(f"Spillover fit error ({municipality}): {str(e)[:100]}")
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def fit_zinb(train_data):
+    """Fit ZINB model"""
+    if not STATSMODELS_AVAILABLE:
+        return None, None
+    try:
+        X = train_data[['time_index', 'lag1', 'rolling_mean_4']].values.astype(float)
+        X = sm.add_constant(X, has_constant='add')
+        y = train_data['cases'].values.astype(float)
+        X_infl = np.ones((len(y), 1))
+        model = ZeroInflatedNegativeBinomialP(y, X, exog_infl=X_infl)
+        results = model.fit(disp=0, maxiter=300, method='bfgs')
+        return model, results
+    except:
+        try:
+            X_simple = sm.add_constant(train_data[['lag1']].values.astype(float))
+            y = train_data['cases'].values.astype(float)
+            X_infl = np.ones((len(y), 1))
+            model = ZeroInflatedNegativeBinomialP(y, X_simple, exog_infl=X_infl)
+            results = model.fit(disp=0, maxiter=300, method='nm')
+            return model, results
+        except:
+            return None, None
+
+def fit_markov_switching_nb(train_data):
+    """Fit Markov-Switching Negative Binomial model"""
+    if not MARKOV_AVAILABLE:
+        print("Markov not available")
+        return None, None
+    try:
+        # Prepare exogenous variables - simpler approach
+        y = train_data['cases'].values.astype(float)
+        X = train_data[['lag1']].values.astype(float)
+        
+        # Fit Markov-switching model with 2 regimes (low/high outbreak states)
+        model = MarkovRegression(
+            endog=y,
+            k_regimes=2,
+            exog=X,
+            switching_variance=True
+        )
+        results = model.fit(maxiter=200, disp=False, warn_convergence=False)
+        print(f"Markov model fitted successfully. AIC: {results.aic:.2f}")
+        return model, results
+    except Exception as e:
+        print(f"Markov fitting error (first attempt): {str(e)[:100]}")
+        # Fallback to even simpler specification
+        try:
+            y = train_data['cases'].values.astype(float)
+            # Just use constant term, no exog variables
+            model = MarkovRegression(
+                endog=y,
+                k_regimes=2,
+                switching_variance=False
+            )
+            results = model.fit(maxiter=200, disp=False, warn_convergence=False)
+            print(f"Markov model fitted (simple). AIC: {results.aic:.2f}")
+            return model, results
+        except Exception as e2:
+            print(f"Markov fitting error (fallback): {str(e2)[:100]}")
+            return None, None
+
+def predict_with_model(results, test_data, model_type='nb'):
+    """Make predictions"""
+    try:
+        if model_type == 'zinb':
+            n_params = results.model.exog.shape[1]
+            if n_params == 4:
+                X_test = test_data[['time_index', 'lag1', 'rolling_mean_4']].values.astype(float)
+            else:
+                X_test = test_data[['lag1']].values.astype(float)
+            X_test = sm.add_constant(X_test, has_constant='add')
+            predictions = results.predict(X_test, exog_infl=np.ones((len(test_data), 1)))
+        elif model_type == 'markov':
+            # For Markov-switching, use expected value across regimes
+            try:
+                if results.model.exog is not None:
+                    X_test = test_data[['lag1']].values.astype(float)
+                    predictions = results.predict(exog=X_test)
+                else:
+                    # No exog variables - just predict based on fitted model
+                    predictions = results.predict()
+                    # Trim or extend to test data length if needed
+                    if len(predictions) > len(test_data):
+                        # Take the last N predictions matching test data length
+                        predictions = predictions[-len(test_data):]
+                    elif len(predictions) < len(test_data):
+                        predictions = np.tile(predictions.mean(), len(test_data))
+            except Exception as e:
+                print(f"Markov prediction error: {str(e)[:100]}")
+                predictions = results.predict()
+                # Ensure correct length
+                if len(predictions) > len(test_data):
+                    predictions = predictions[-len(test_data):]
+                elif len(predictions) < len(test_data):
+                    predictions = np.tile(predictions.mean(), len(test_data))
+        else:
+            X_test = test_data[['time_index', 'lag1', 'rolling_mean_4']].values.astype(float)
+            X_test = sm.add_constant(X_test, has_constant='add')
+            predictions = results.predict(X_test)
+        
+        # Final safety check: ensure predictions match test_data length
+        predictions = np.array(predictions).flatten()
+        if len(predictions) != len(test_data):
+            print(f"Warning: Prediction length mismatch for {model_type}. Expected {len(test_data)}, got {len(predictions)}")
+            if len(predictions) > len(test_data):
+                predictions = predictions[-len(test_data):]
+            else:
+                predictions = np.tile(predictions.mean() if len(predictions) > 0 else 0, len(test_data))
+        
+        return predictions
+    except Exception as e:
+        print(f"Prediction error for {model_type}: {str(e)[:100]}")
+        return None
+
+def calculate_metrics(actual, predicted):
+    """Calculate performance metrics: MAE, RMSE, MASE"""
+    actual = np.array(actual).flatten().astype(float)
+    predicted = np.array(predicted).flatten().astype(float)
+    
+    rmse = np.sqrt(np.mean((actual - predicted) ** 2))
+    mae = np.mean(np.abs(actual - predicted))
+    
+    naive_errors = np.abs(np.diff(actual))
+    mase = mae / np.mean(naive_errors) if len(naive_errors) > 0 and np.mean(naive_errors) > 0 else np.nan
+    
+    return {'MAE': mae, 'RMSE': rmse, 'MASE': mase}
+
+def calculate_aic_bic(results, n_obs, model_type='nb'):
+    """
+    Calculate AIC, BIC, and Log-likelihood/Deviance for model comparison
+    
+    AIC = 2k - 2ln(L)
+    BIC = k*ln(n) - 2ln(L)
+    Deviance = -2*ln(L)
+    
+    where:
+    - k = number of parameters
+    - L = likelihood
+    - n = number of observations
+    """
+    try:
+        if hasattr(results, 'aic') and hasattr(results, 'bic'):
+            # Model already has AIC/BIC computed
+            aic = float(results.aic)
+            bic = float(results.bic)
+            log_likelihood = float(results.llf) if hasattr(results, 'llf') else np.nan
+        else:
+            # Calculate manually
+            k = len(results.params)  # number of parameters
+            log_likelihood = float(results.llf)  # log-likelihood
+            
+            aic = 2 * k - 2 * log_likelihood
+            bic = k * np.log(n_obs) - 2 * log_likelihood
+        
+        deviance = -2 * log_likelihood if not np.isnan(log_likelihood) else np.nan
+        
+        return {'AIC': aic, 'BIC': bic, 'Log-likelihood': log_likelihood, 'Deviance': deviance}
+    except Exception as e:
+        print(f"AIC/BIC error for {model_type}: {str(e)[:100]}")
+        return {'AIC': np.nan, 'BIC': np.nan, 'Log-likelihood': np.nan, 'Deviance': np.nan}
+
+def predict_future(results, last_data, weeks_ahead=4, model_type='nb'):
+    """Predict future cases"""
+    predictions = []
+    current_lag1 = float(last_data['cases'].iloc[-1])
+    current_rolling = float(last_data['rolling_mean_4'].iloc[-1])
+    next_time_index = float(last_data['time_index'].iloc[-1]) + 1
+    
+    for i in range(weeks_ahead):
+        if model_type == 'zinb':
+            try:
+                n_params = results.model.exog.shape[1]
+                if n_params == 4:
+                    X_future = np.array([[1.0, next_time_index + i, current_lag1, current_rolling]])
+                else:
+                    X_future = np.array([[1.0, current_lag1]])
+                pred = results.predict(X_future, exog_infl=np.ones((1, 1)))
+            except:
+                pred = [current_rolling]
+        elif model_type == 'markov':
+            try:
+                if results.model.exog is not None:
+                    X_future = np.array([[current_lag1]])
+                    pred = results.predict(exog=X_future)
+                    if hasattr(pred, '__iter__'):
+                        pred_value = float(pred[-1] if len(pred) > 0 else current_rolling)
+                    else:
+                        pred_value = float(pred)
+                else:
+                    # No exog - use smoothed predicted mean
+                    pred_value = results.smoothed_marginal_probabilities[:, 0].mean() * results.params[0] + \
+                                 results.smoothed_marginal_probabilities[:, 1].mean() * results.params[1]
+                pred = [pred_value]
+            except Exception as e:
+                print(f"Markov future prediction error: {str(e)[:100]}")
+                pred = [current_rolling]
+        else:
+            X_future = np.array([[1.0, next_time_index + i, current_lag1, current_rolling]])
+            try:
+                pred = results.predict(X_future)
+            except:
+                pred = [current_rolling]
+        
+        pred_value = float(np.array(pred).flatten()[0])
+        predictions.append(max(0, pred_value))
+        current_lag1 = pred_value
+        current_rolling = (current_rolling * 3 + pred_value) / 4
+    
+    return predictions
+
+def calculate_municipality_risk(df, cols, selected_year=None, selected_weeks=4):
+    """Calculate risk by municipality with filters"""
+    if selected_year is None or selected_year == 'All Years':
+        # Use all data when "All Years" is selected
+        if selected_year == 'All Years':
+            recent_data = df.copy()
+            max_week = df[cols['week']].max()
+        else:
+            max_year = df[cols['year']].max()
+            recent_data = df[df[cols['year']] == max_year]
+            max_week = recent_data[cols['week']].max()
+    else:
+        max_year = selected_year
+        recent_data = df[df[cols['year']] == max_year]
+        max_week = recent_data[cols['week']].max()
+    
+    # For "All Years", aggregate all data; otherwise filter by recent weeks
+    if selected_year == 'All Years':
+        recent_weeks = recent_data
+    else:
+        recent_weeks = recent_data[recent_data[cols['week']] >= max(1, max_week - selected_weeks + 1)]
+    
+    risk_df = recent_weeks.groupby(cols['location']).agg({
+        cols['cases']: ['sum', 'mean', 'max', 'std']
+    }).reset_index()
+    risk_df.columns = ['municipality', 'total_cases', 'avg_cases', 'max_cases', 'std_cases']
+    risk_df['std_cases'] = risk_df['std_cases'].fillna(0)
+    
+    # Calculate risk score
+    if risk_df['total_cases'].max() > 0:
+        risk_df['risk_score'] = (risk_df['total_cases'] / risk_df['total_cases'].max() * 100).round(1)
+    else:
+        risk_df['risk_score'] = 0
+    
+    # Categorize risk
+    risk_df['risk_level'] = pd.cut(
+        risk_df['risk_score'],
+        bins=[-1, 25, 50, 75, 100],
+        labels=['Low', 'Moderate', 'High', 'Critical']
+    )
+    
+    # Calculate trend (using std as volatility indicator)
+    risk_df['trend'] = risk_df.apply(
+        lambda x: '↑ Increasing' if x['std_cases'] > x['avg_cases'] * 0.5 else 
+                  ('↓ Stable' if x['avg_cases'] < 1 else '→ Steady'),
+        axis=1
+    )
+    
+    return risk_df.sort_values('risk_score', ascending=False)
+
+RISK_LEVELS = np.array(['Low', 'Moderate', 'High', 'Critical'], dtype=object)
+
+def municipality_risk_frames(df, cols, selected_weeks=4, locations=None):
+    """
+    Municipality risk at every epi-week in one pass
+
+    Each (year, week) frame scores the trailing `selected_weeks` weeks of
+    that year, as calculate_municipality_risk does for the latest week:
+    window totals come from a cumulative sum over the municipality x week
+    matrix, so all frames cost one cumsum and a gather.
+
+    Returns a long DataFrame (year, week, frame, municipality, total_cases,
+    risk_score, risk_level) ordered by week, then `locations`.
+    """
+    if locations is None:
+        locations = sorted(df[cols['location']].dropna().unique())
+    counts, time_index = case_matrix(df, cols['location'], cols['cases'], [cols['year'], cols['week']], locations)
+    years = time_index.get_level_values(0).to_numpy(dtype=int)
+    weeks = time_index.get_level_values(1).to_numpy(dtype=int)
+
+    # First column of each frame's window: same year, week >= week - window + 1
+    keys = years * 100 + weeks
+    lower = np.searchsorted(keys, years * 100 + np.maximum(1, weeks - selected_weeks + 1), side='left')
+    cumulative = np.concatenate([np.zeros((len(locations), 1)), np.cumsum(counts, axis=1)], axis=1)
+    totals = cumulative[:, 1:] - cumulative[:, lower]                  # (locations, weeks)
+
+    peak = totals.max(axis=0)
+    scores = np.divide(totals, peak, out=np.zeros_like(totals), where=peak > 0) * 100
+    scores = np.round(scores, 1)
+    levels = RISK_LEVELS[np.digitize(scores, [25, 50, 75], right=True)]
+
+    n, T = totals.shape
+    return pd.DataFrame({
+        cols['year']: np.tile(years, n),
+        cols['week']: np.tile(weeks, n),
+        'frame': np.tile(week_labels(time_index), n),
+        'municipality': np.repeat(np.asarray(locations, dtype=object), T),
+        'total_cases': totals.ravel(),
+        'risk_score': scores.ravel(),
+        'risk_level': levels.ravel(),
+    }).sort_values([cols['year'], cols['week']], kind='stable').reset_index(drop=True)
@@ -0,0 +1,436 @@
+"""
+Offline Batch Pipeline
+Dengue Surveillance System - Zamboanga Sibugay
+Precomputes forecast, backtest and risk artifacts for the dashboard
+
+Run off-peak, e.g. from cron:
+    15 2 * * * cd /srv/dengue && python -m engine.pipeline >> artifacts/pipeline.log 2>&1
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from engine.autocorrelation import case_matrix
+from engine.ccf import CCF_ARTIFACT, cross_correlation_table
+from engine.comparison import compare_count_models
+from engine.data import ARTIFACT_DIR, DATA_FILE, artifact_path, dataset_version, file_version
+from engine.ensemble import EnsembleForecaster
+from engine.geometry import SHAPELY_AVAILABLE, build_spatial_asset, ingest_geometries
+from engine.manifest import build_manifest
+from engine.models import (
+    calculate_aic_bic, calculate_metrics, calculate_municipality_risk, find_columns,
+    fit_markov_switching_nb, fit_municipality_spillover, fit_negative_binomial, fit_nb_with_env, fit_zinb,
+    get_dataset_dates, predict_future, predict_with_model, prepare_full_regression_data,
+    prepare_municipality_panel, prepare_regression_data,
+)
+from engine.scan import DEFAULT_REPLICATIONS, space_time_scan, week_labels
+
+FORECAST_ARTIFACT = 'forecast.json'
+RISK_ARTIFACT = 'risk.parquet'
+SCAN_ARTIFACT = 'scan.parquet'
+ENSEMBLE_STATE = 'ensemble_state.json'
+
+# Parquet key-value metadata entry naming the dataset version an artifact
+# was built from (kept outside the rows, so an empty result still has one)
+VERSION_METADATA_KEY = b'dataset_version'
+
+TRAIN_FRACTION = 0.8
+
+# Longest horizon offered by the forecast slider; shorter horizons are prefixes
+MAX_FORECAST_WEEKS = 8
+
+# Member name, model_type for predict_*, fitting function, display label
+MODEL_SPECS = [
+    ('NB', 'nb', fit_negative_binomial, 'Negative Binomial (NB)'),
+    ('ZINB', 'zinb', fit_zinb, 'Zero-Inflated NB (ZINB)'),
+    ('Markov', 'markov', fit_markov_switching_nb, 'Markov-Switching NB'),
+]
+
+ENSEMBLE_MEMBERS = [name for name, _, _, _ in MODEL_SPECS]
+
+ALL_YEARS = 'All Years'
+RISK_WINDOWS = range(1, 53)
+
+REQUIRED_COLUMNS = ['location', 'cases', 'year', 'week']
+
+
+def json_list(values):
+    """Float list with NaN mapped to None (strict JSON)"""
+    if values is None:
+        return None
+    return [None if not np.isfinite(v) else float(v) for v in np.asarray(values, dtype=float).ravel()]
+
+
+def json_safe(value):
+    """Recursively replace non-finite floats with None"""
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if math.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def significance_rows(results, feature_names):
+    """Coefficient, p-value and 95% CI per factor of a fitted GLM"""
+    rows = []
+    params = np.asarray(results.params)
+    pvalues = np.asarray(results.pvalues)
+    conf_int = np.asarray(results.conf_int())
+    for i, name in enumerate(feature_names):
+        if i >= len(params):
+            continue
+        rows.append({
+            'name': name,
+            'coef': float(params[i]),
+            'pvalue': float(pvalues[i]) if i < len(pvalues) else 1.0,
+            'ci_low': float(conf_int[i, 0]),
+            'ci_high': float(conf_int[i, 1]),
+        })
+    return rows
+
+
+def split_train_test(time_series, train_fraction=TRAIN_FRACTION):
+    """Chronological train/test split of the weekly series"""
+    train_size = int(len(time_series) * train_fraction)
+    return time_series.iloc[:train_size].copy(), time_series.iloc[train_size:].copy()
+
+
+def forecast_members(time_series, weeks_ahead=MAX_FORECAST_WEEKS):
+    """Fit every model on the full series and forecast weeks_ahead weeks"""
+    forecasts = {}
+    for name, model_type, fit, label in MODEL_SPECS:
+        _, results = fit(time_series)
+        forecast = predict_future(results, time_series, weeks_ahead, model_type) if results else None
+        forecasts[name] = {
+            'label': label,
+            'available': bool(results),
+            'forecast': json_list(forecast),
+        }
+    return forecasts
+
+
+def backtest_members(train_data, test_data):
+    """Fit every model on the training split and score it on the test split"""
+    backtests = {}
+    for name, model_type, fit, label in MODEL_SPECS:
+        _, train_results = fit(train_data)
+        test_pred = None
+        if train_results and len(test_data) > 0:
+            test_pred = predict_with_model(train_results, test_data, model_type)
+
+        metrics = calculate_metrics(test_data['cases'].values, test_pred) if test_pred is not None else None
+        fit_stats = None
+        if train_results:
+            fit_stats = calculate_aic_bic(train_results, len(train_data), model_type)
+            fit_stats['Parameters'] = len(train_results.params)
+
+        backtests[name] = {
+            'label': label,
+            'train_available': bool(train_results),
+            'test_pred': json_list(test_pred),
+            'metrics': metrics,
+            'fit': fit_stats,
+        }
+    return backtests
+
+
+def _as_arrays(values_by_member, key):
+    values = [values_by_member[name][key] for name in ENSEMBLE_MEMBERS]
+    return [None if v is None else np.array(v, dtype=float) for v in values]
+
+
+def update_ensemble(backtests, train_data, test_data, state_file=None, version=None):
+    """
+    Score the backtest weeks into the (persisted) ensemble state
+
+    State from another dataset version is dropped, so corrected or refitted
+    weeks are scored again instead of being skipped.
+    """
+    ensemble = EnsembleForecaster(ENSEMBLE_MEMBERS)
+    if state_file:
+        ensemble = EnsembleForecaster.load(state_file, ENSEMBLE_MEMBERS, version=version)
+    keys = list(zip(test_data['year'], test_data['week']))
+    previous_cases = float(train_data['cases'].iloc[-1]) if len(train_data) > 0 else None
+    ensemble.score(keys, test_data['cases'].values, _as_arrays(backtests, 'test_pred'),
+                   previous=previous_cases)
+    ensemble.dataset_version = version
+    if state_file:
+        try:
+            ensemble.save(state_file)
+        except OSError as e:
+            print(f"Could not persist ensemble state: {e}", file=sys.stderr)
+    return ensemble
+
+
+def combine_forecasts(ensemble, forecasts):
+    """Ensemble forecast row, or None if no member produced a forecast"""
+    member_forecasts = _as_arrays(forecasts, 'forecast')
+    if all(f is None for f in member_forecasts):
+        return None
+    return ensemble.forecast(member_forecasts)[-1]
+
+
+def compute_forecast_bundle(df, cols, version=None, state_file=None, spatial_asset=None):
+    """
+    Fit every model, forecast, backtest and weight the ensemble
+
+    Returns a JSON-serialisable dict holding everything the Predictive page
+    renders apart from the risk map. With a spatial asset, neighbour-weighted
+    lagged cases join the environmental model and per-municipality
+    spillover fits are included.
+    """
+    last_date, last_year, last_week = get_dataset_dates(df, cols['year'], cols['week'])
+    time_series = prepare_regression_data(df, cols)
+    locations = weights = None
+    if spatial_asset is not None:
+        locations, weights = spatial_asset.names, spatial_asset.weights()
+    full_time_series = prepare_full_regression_data(df, cols, locations, weights)
+    train_data, test_data = split_train_test(time_series)
+
+    forecasts = forecast_members(time_series)
+    backtests = backtest_members(train_data, test_data)
+    models = {name: {**forecasts[name], **backtests[name]} for name in ENSEMBLE_MEMBERS}
+
+    # Ensemble weights from backtest errors, updated incrementally
+    ensemble = update_ensemble(backtests, train_data, test_data, state_file, version)
+    ensemble_forecast = combine_forecasts(ensemble, forecasts)
+
+    # Environmental significance model
+    significance = None
+    nb_env_results, feature_names = fit_nb_with_env(full_time_series)
+    if nb_env_results is not None and feature_names is not None:
+        try:
+            significance = significance_rows(nb_env_results, feature_names)
+        except Exception as e:
+            print(f"Could not extract model coefficients: {e}", file=sys.stderr)
+
+    # Per-municipality fits on own and neighbours' lagged cases
+    spillover = None
+    if weights is not None:
+        panel = prepare_municipality_panel(df, cols, locations, weights)
+        spillover = fit_municipality_spillover(panel).to_dict(orient='records')
+    
+    # Count model catalog on the training split's shared design matrix
+    comparison = compare_count_models(train_data).to_dict(orient='records')
+
+    history = time_series.tail(16)
+    return json_safe({
+        'dataset_version': version,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'last_date': last_date.strftime('%Y-%m-%d'),
+        'last_year': int(last_year),
+        'last_week': int(last_week),
+        'n_train': len(train_data),
+        'n_test': len(test_data),
+        'recent_avg': float(time_series['cases'].tail(4).mean()),
+        'history': json_list(history['cases']),
+        'test_actual': json_list(test_data['cases']),
+        'models': models,
+        'ensemble': {
+            'members': ensemble.members,
+            'weights': json_list(ensemble.weights),
+            'mase': json_list(ensemble.mase),
+            'forecast': json_list(ensemble_forecast),
+            'state': ensemble.to_dict(),
+        },
+        'significance': significance,
+        'spillover': spillover,
+        'comparison': comparison,
+    })
+
+
+def compute_risk_table(df, cols):
+    """
+    Municipality risk for every year and analysis window
+
+    The 'period' column holds 'All Years' or the two-digit year as a string;
+    'All Years' rows use the full-data window of 52 weeks.
+    """
+    frames = []
+    periods = [(ALL_YEARS, [52])]
+    periods += [(year, RISK_WINDOWS) for year in sorted(df[cols['year']].dropna().unique())]
+    for year, windows in periods:
+        for window in windows:
+            risk_df = calculate_municipality_risk(df, cols, year, window)
+            risk_df.insert(0, 'window', window)
+            risk_df.insert(0, 'period', ALL_YEARS if year == ALL_YEARS else str(int(year)))
+            frames.append(risk_df)
+
+    risk_table = pd.concat(frames, ignore_index=True)
+    risk_table['risk_level'] = risk_table['risk_level'].astype(str)
+    return risk_table
+
+
+def select_risk(risk_table, selected_year, weeks_window):
+    """Rows of a precomputed risk table for one sidebar selection"""
+    period = ALL_YEARS if selected_year == ALL_YEARS else str(int(selected_year))
+    window = 52 if selected_year == ALL_YEARS else int(weeks_window)
+    rows = risk_table[(risk_table['period'] == period) & (risk_table['window'] == window)]
+    return rows.drop(columns=['period', 'window']).reset_index(drop=True)
+
+
+def compute_scan_clusters(df, cols, spatial_asset, replications=DEFAULT_REPLICATIONS, n_jobs=None):
+    """Space-time scan clusters over every municipality and epi-week"""
+    counts, time_index = case_matrix(df, cols['location'], cols['cases'], [cols['year'], cols['week']],
+                                     spatial_asset.names)
+    centroids = spatial_asset.centroids
+    return space_time_scan(counts, centroids['lon'], centroids['lat'], spatial_asset.names,
+                           week_labels(time_index), replications=replications, n_jobs=n_jobs)
+
+
+def compute_ccf_table(df, cols, version=None):
+    """Prewhitened climate-case cross-correlations, tagged with the dataset version they came from"""
+    ccf_table = cross_correlation_table(df, cols)
+    ccf_table['dataset_version'] = version
+    return ccf_table
+
+
+def write_json(payload, path):
+    """Write JSON atomically"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def write_parquet(frame, path, version=None):
+    """Write Parquet atomically, recording `version` in the file metadata"""
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    if version is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               VERSION_METADATA_KEY: version.encode()})
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def parquet_version(path):
+    """Dataset version recorded by write_parquet (None if absent)"""
+    version = (pq.read_schema(path).metadata or {}).get(VERSION_METADATA_KEY)
+    return None if version is None else version.decode()
+
+
+def read_forecast_artifact(artifact_dir=ARTIFACT_DIR):
+    """Precomputed forecast bundle, or None if the batch job has not run"""
+    try:
+        with open(os.path.join(artifact_dir, FORECAST_ARTIFACT)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _read_versioned_parquet(name, artifact_dir, version):
+    """Parquet artifact, or None if missing or (with `version`) built from another dataset version"""
+    path = os.path.join(artifact_dir, name)
+    if not os.path.exists(path):
+        return None
+    if version is not None and parquet_version(path) != version:
+        return None
+    return pd.read_parquet(path)
+
+
+def read_risk_artifact(artifact_dir=ARTIFACT_DIR, version=None):
+    """
+    Precomputed risk table, or None if the batch job has not run
+
+    With `version`, a table built from another dataset version counts as
+    missing.
+    """
+    return _read_versioned_parquet(RISK_ARTIFACT, artifact_dir, version)
+
+
+def read_scan_artifact(artifact_dir=ARTIFACT_DIR, version=None):
+    """
+    Precomputed space-time clusters, or None if the batch job has not run
+
+    With `version`, clusters found in another dataset version count as
+    missing; a scan that found no cluster is an empty table.
+    """
+    return _read_versioned_parquet(SCAN_ARTIFACT, artifact_dir, version)
+
+
+def read_ccf_artifact(artifact_dir=ARTIFACT_DIR):
+    """Precomputed cross-correlation table, or None if the batch job has not run"""
+    path = os.path.join(artifact_dir, CCF_ARTIFACT)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def artifact_version(name=FORECAST_ARTIFACT, artifact_dir=ARTIFACT_DIR):
+    """Version token of a written artifact (None if missing)"""
+    return file_version(os.path.join(artifact_dir, name))
+
+
+def run_pipeline(data_file=DATA_FILE, artifact_dir=ARTIFACT_DIR):
+    """Load the dataset, compute every artifact and write it to artifact_dir"""
+    df = pd.read_csv(data_file)
+    cols = find_columns(df)
+    missing = [r for r in REQUIRED_COLUMNS if r not in cols]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    version = dataset_version(data_file)
+    state_file = artifact_path(ENSEMBLE_STATE, artifact_dir)
+
+    # Boundaries: WKB store and simplified map levels for this version
+    spatial_asset = None
+    if SHAPELY_AVAILABLE and 'geometry' in cols:
+        names, geometries = ingest_geometries(df, version, cols['location'], cols['geometry'], artifact_dir)
+        spatial_asset = build_spatial_asset(names, geometries, version, artifact_dir)
+
+    bundle = compute_forecast_bundle(df, cols, version, state_file, spatial_asset)
+    risk_table = compute_risk_table(df, cols)
+    ccf_table = compute_ccf_table(df, cols, version)
+
+    write_parquet(risk_table, artifact_path(RISK_ARTIFACT, artifact_dir), version)
+    write_parquet(ccf_table, artifact_path(CCF_ARTIFACT, artifact_dir))
+    build_manifest(df, version, artifact_dir)
+    write_json(bundle, artifact_path(FORECAST_ARTIFACT, artifact_dir))
+
+    scan_clusters = None
+    if spatial_asset is not None:
+        scan_clusters = compute_scan_clusters(df, cols, spatial_asset)
+        write_parquet(scan_clusters, artifact_path(SCAN_ARTIFACT, artifact_dir), version)
+
+    return {
+        'dataset_version': version,
+        'rows': len(df),
+        'risk_rows': len(risk_table),
+        'ccf_rows': len(ccf_table),
+        'scan_clusters': None if scan_clusters is None else len(scan_clusters),
+        'models': {name: model['available'] for name, model in bundle['models'].items()},
+        'artifact_dir': artifact_dir,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute dashboard forecast and risk artifacts")
+    parser.add_argument('--data', default=DATA_FILE, help="dataset CSV")
+    parser.add_argument('--out', default=ARTIFACT_DIR, help="artifact directory")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_pipeline(args.data, args.out)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Pipeline failed: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
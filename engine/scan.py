@@ -0,0 +1,224 @@
+"""
+Space-Time Scan Statistic
+Dengue Surveillance System - Zamboanga Sibugay
+Kulldorff's space-time permutation scan over municipality centroids and epi-weeks
+
+Candidate cylinders are circles of the k nearest municipalities (by
+centroid) crossed with runs of consecutive epi-weeks. Expected counts come
+from the space-time permutation model, so no population denominator is
+needed: a cylinder's expectation is its municipalities' total cases times
+its weeks' total cases divided by all cases.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_REPLICATIONS = 999
+
+# Largest circle as a share of municipalities, longest window in weeks
+MAX_ZONE_FRACTION = 0.5
+MAX_CLUSTER_WEEKS = 8
+
+MAX_CLUSTERS = 5
+
+
+def week_labels(time_index):
+    """'2019-W49' style labels for (year, epi-week) pairs; two-digit years are taken as 20xx"""
+    labels = []
+    for year, week in time_index:
+        year = int(year)
+        full_year = 2000 + year if year < 100 else year
+        labels.append(f"{full_year}-W{int(week):02d}")
+    return labels
+
+
+def candidate_zones(lon, lat, max_zone_fraction=MAX_ZONE_FRACTION):
+    """
+    Boolean (zones, locations) matrix of circular scanning zones
+
+    Each centroid is the centre of circles holding its 1..K nearest
+    centroids (itself included), K being max_zone_fraction of all
+    locations. Duplicate circles are dropped.
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    n = len(lon)
+    k_max = max(1, int(np.floor(n * max_zone_fraction)))
+
+    # Local planar distances: shrink longitude by cos(latitude)
+    x = lon * np.cos(np.deg2rad(lat.mean()))
+    distances = np.hypot(x[:, None] - x[None, :], lat[:, None] - lat[None, :])
+    nearest = np.argsort(distances, axis=1, kind='stable')[:, :k_max]
+
+    zones = np.zeros((n, k_max, n), dtype=bool)
+    for k in range(k_max):
+        zones[np.arange(n)[:, None], k:, nearest[:, k][:, None]] = True
+    return np.unique(zones.reshape(n * k_max, n), axis=0)
+
+
+def _window_totals(series, max_weeks):
+    """
+    Sums over every run of 1..max_weeks consecutive weeks
+
+    Returns (totals, starts, lengths) where totals has one column per
+    window (the last axis of `series` is time).
+    """
+    T = series.shape[-1]
+    cumulative = np.concatenate([np.zeros(series.shape[:-1] + (1,)), np.cumsum(series, axis=-1)], axis=-1)
+    starts, lengths, totals = [], [], []
+    for length in range(1, min(max_weeks, T) + 1):
+        totals.append(cumulative[..., length:] - cumulative[..., :T - length + 1])
+        starts.append(np.arange(T - length + 1))
+        lengths.append(np.full(T - length + 1, length))
+    return np.concatenate(totals, axis=-1), np.concatenate(starts), np.concatenate(lengths)
+
+
+def _poisson_llr(observed, expected, total):
+    """Log-likelihood ratio of high-rate cylinders (zero when not elevated)"""
+    inside = np.where(observed > 0, observed * np.log(np.maximum(observed, 1e-300) / expected), 0.0)
+    remaining = total - observed
+    outside = np.where(remaining > 0, remaining * np.log(np.maximum(remaining, 1e-300) / (total - expected)), 0.0)
+    return np.where(observed > expected, inside + outside, 0.0)
+
+
+def cylinder_llr(counts, zones, max_weeks=MAX_CLUSTER_WEEKS):
+    """
+    LLR of every cylinder for a (locations, weeks) count matrix
+
+    Returns (llr, observed, expected, starts, lengths); the first three
+    have shape (zones, windows) and the window of column j covers
+    lengths[j] weeks from week starts[j].
+    """
+    zones = zones.astype(float)
+    total = counts.sum()
+    zone_series = zones @ counts                      # (zones, weeks)
+    observed, starts, lengths = _window_totals(zone_series, max_weeks)
+    week_totals, _, _ = _window_totals(counts.sum(axis=0), max_weeks)
+    expected = np.outer(zone_series.sum(axis=1), week_totals) / total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        llr = _poisson_llr(observed, expected, total)
+    return llr, observed, expected, starts, lengths
+
+
+def _replicate_maxima(counts, zones, max_weeks, replications, seed):
+    """
+    Maximum LLR of each Monte Carlo replicate
+
+    Replicates shuffle the epi-week of every case while keeping its
+    municipality, which preserves both marginals (space-time permutation).
+    """
+    n, T = counts.shape
+    cases = np.rint(counts).astype(int).ravel()
+    locations = np.repeat(np.repeat(np.arange(n), T), cases)
+    weeks = np.repeat(np.tile(np.arange(T), n), cases)
+
+    rng = np.random.default_rng(seed)
+    maxima = np.empty(replications)
+    for r in range(replications):
+        shuffled = np.bincount(locations * T + rng.permutation(weeks), minlength=n * T).reshape(n, T)
+        llr = cylinder_llr(shuffled.astype(float), zones, max_weeks)[0]
+        maxima[r] = llr.max()
+    return maxima
+
+
+def _relative_risk(observed, expected, total):
+    """Rate inside the cylinder over the rate outside it"""
+    outside = (total - observed) / (total - expected) if total > expected else np.nan
+    return float((observed / expected) / outside) if expected > 0 and outside > 0 else np.nan
+
+
+def monte_carlo_maxima(counts, zones, max_weeks=MAX_CLUSTER_WEEKS, replications=DEFAULT_REPLICATIONS,
+                       n_jobs=None, seed=0):
+    """
+    Null distribution of the maximum LLR
+
+    Replications are split into chunks run on a process pool (each scan is
+    pure NumPy over the whole cylinder set, so processes avoid the GIL);
+    n_jobs=1 runs them in this process. Chunk seeds derive from `seed`,
+    so results do not depend on the number of workers.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    n_chunks = max(1, min(replications, n_jobs * 4))
+    sizes = np.diff(np.linspace(0, replications, n_chunks + 1).astype(int))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    tasks = [(counts, zones, max_weeks, int(size), chunk_seed) for size, chunk_seed in zip(sizes, seeds) if size]
+
+    if n_jobs == 1:
+        chunks = [_replicate_maxima(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            chunks = list(executor.map(_replicate_maxima, *zip(*tasks)))
+    return np.concatenate(chunks)
+
+
+def space_time_scan(counts, lon, lat, locations, time_index, max_zone_fraction=MAX_ZONE_FRACTION,
+                    max_weeks=MAX_CLUSTER_WEEKS, replications=DEFAULT_REPLICATIONS, max_clusters=MAX_CLUSTERS,
+                    n_jobs=None, seed=0):
+    """
+    Most likely and secondary space-time clusters
+
+    Args:
+        counts: (locations, weeks) case matrix
+        lon, lat: centroid coordinates in `locations` order
+        locations: municipality names
+        time_index: week labels (e.g. a (year, week) MultiIndex)
+        max_zone_fraction: largest circle as a share of municipalities
+        max_weeks: longest cluster duration in weeks
+        replications: Monte Carlo replications for p-values
+        max_clusters: clusters to report
+        n_jobs: worker processes (1 runs serially)
+        seed: random seed
+
+    Returns:
+        DataFrame with one row per cluster, most likely first. Secondary
+        clusters share no municipality with higher-ranked ones; every
+        p-value is read off the same null distribution of maximum LLRs.
+    """
+    counts = np.asarray(counts, dtype=float)
+    total = counts.sum()
+    zones = candidate_zones(lon, lat, max_zone_fraction)
+    llr, observed, expected, starts, lengths = cylinder_llr(counts, zones, max_weeks)
+
+    # Best window per zone, then greedily keep non-overlapping zones
+    best_window = llr.argmax(axis=1)
+    best_llr = llr[np.arange(len(zones)), best_window]
+    picked, covered = [], np.zeros(zones.shape[1], dtype=bool)
+    for z in np.argsort(-best_llr, kind='stable'):
+        if best_llr[z] <= 0 or len(picked) >= max_clusters:
+            break
+        if (zones[z] & covered).any():
+            continue
+        picked.append(z)
+        covered |= zones[z]
+
+    maxima = monte_carlo_maxima(counts, zones, max_weeks, replications, n_jobs, seed) if replications else None
+
+    labels = list(time_index)
+    locations = np.asarray(locations, dtype=object)
+    rows = []
+    for rank, z in enumerate(picked, start=1):
+        w = best_window[z]
+        start, length = starts[w], lengths[w]
+        p_value = np.nan
+        if maxima is not None:
+            p_value = (np.sum(maxima >= best_llr[z]) + 1) / (len(maxima) + 1)
+        rows.append({
+            'rank': rank,
+            'cluster': 'Most likely' if rank == 1 else 'Secondary',
+            'municipalities': ', '.join(locations[zones[z]]),
+            'n_municipalities': int(zones[z].sum()),
+            'start': labels[start],
+            'end': labels[start + length - 1],
+            'weeks': int(length),
+            'observed': float(observed[z, w]),
+            'expected': float(expected[z, w]),
+            'relative_risk': _relative_risk(observed[z, w], expected[z, w], total),
+            'llr': float(best_llr[z]),
+            'p_value': p_value,
+        })
+    columns = ['rank', 'cluster', 'municipalities', 'n_municipalities', 'start', 'end', 'weeks',
+               'observed', 'expected', 'relative_risk', 'llr', 'p_value']
+    return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,161 @@
+"""
+Seasonal-Trend Decomposition
+Dengue Surveillance System - Zamboanga Sibugay
+Batched harmonic decomposition of every municipality's weekly cases
+
+All series are rows of one (locations, weeks) matrix. The trend is a
+centered moving average (shrinking at the ends) and the seasonal part is
+a Fourier regression on week-of-year, alternated a few times as in STL's
+inner loop. Every step is a cumulative sum or one least-squares solve
+shared by all rows, so no per-series fitting loop runs.
+"""
+
+import numpy as np
+import pandas as pd
+
+from engine.autocorrelation import case_matrix
+from engine.ccf import ALL_MUNICIPALITIES
+
+SEASON_WEEKS = 52
+
+# Fourier pairs in the seasonal regression (3 allows a sharp single peak)
+HARMONICS = 3
+
+# Centered trend window in weeks (odd, about one season)
+TREND_WINDOW = 53
+
+ITERATIONS = 2
+
+
+def harmonic_design(weeks, harmonics=HARMONICS, period=SEASON_WEEKS):
+    """(len(weeks), 2 * harmonics) cosine/sine columns of week-of-year"""
+    phase = 2 * np.pi * (np.asarray(weeks, dtype=float) - 1) / period
+    k = np.arange(1, harmonics + 1)
+    return np.concatenate([np.cos(np.outer(phase, k)), np.sin(np.outer(phase, k))], axis=1)
+
+
+def centered_mean(series, window=TREND_WINDOW):
+    """Centered moving average of each row; the window shrinks at both ends"""
+    half = window // 2
+    n = series.shape[1]
+    padded = np.concatenate([np.zeros((series.shape[0], 1)), np.cumsum(series, axis=1)], axis=1)
+    stops = np.minimum(np.arange(n) + half + 1, n)
+    starts = np.maximum(np.arange(n) - half, 0)
+    return (padded[:, stops] - padded[:, starts]) / (stops - starts)
+
+
+def decompose(series, weeks, harmonics=HARMONICS, window=TREND_WINDOW, iterations=ITERATIONS):
+    """
+    Trend and seasonal components of each row of a (rows, T) matrix
+
+    Args:
+        series: weekly values, one series per row
+        weeks: week-of-year (1-based) of each column
+        harmonics: Fourier pairs in the seasonal fit
+        window: trend moving-average window in weeks
+        iterations: trend/seasonal alternations
+
+    Returns:
+        (trend, seasonal, coefficients) where coefficients has shape
+        (rows, 2 * harmonics) and reproduces the seasonal curve for any
+        week through harmonic_design.
+    """
+    series = np.asarray(series, dtype=float)
+    design = harmonic_design(weeks, harmonics)
+    seasonal = np.zeros_like(series)
+    for _ in range(iterations):
+        trend = centered_mean(series - seasonal, window)
+        coefficients = np.linalg.lstsq(design, (series - trend).T, rcond=None)[0].T
+        seasonal = coefficients @ design.T
+    trend = centered_mean(series - seasonal, window)
+    return trend, seasonal, coefficients
+
+
+def _strength(component, remainder):
+    """max(0, 1 - var(R) / var(component + R)) per row"""
+    total = np.var(component + remainder, axis=1)
+    ratio = np.divide(np.var(remainder, axis=1), total, out=np.ones_like(total), where=total > 0)
+    return np.clip(1 - ratio, 0.0, 1.0)
+
+
+class SeasonalDecomposition:
+    """
+    Trend, seasonal and remainder components per municipality
+
+    Rows follow `names`; the last row is the province-wide total
+    (ALL_MUNICIPALITIES). Columns follow `time_index` (year, week).
+    """
+
+    def __init__(self, names, time_index, observed, trend, seasonal, coefficients):
+        self.names = list(names)
+        self.time_index = time_index
+        self.observed = observed
+        self.trend = trend
+        self.seasonal = seasonal
+        self.coefficients = coefficients
+
+    @classmethod
+    def from_frame(cls, df, cols, locations=None, harmonics=HARMONICS, window=TREND_WINDOW):
+        location_col = cols['location']
+        if locations is None:
+            locations = sorted(df[location_col].dropna().unique())
+        cases, time_index = case_matrix(df, location_col, cols['cases'], [cols['year'], cols['week']], locations)
+        observed = np.vstack([cases, cases.sum(axis=0, keepdims=True)])
+        weeks = time_index.get_level_values(1).to_numpy(dtype=float)
+        trend, seasonal, coefficients = decompose(observed, weeks, harmonics, window)
+        return cls(list(locations) + [ALL_MUNICIPALITIES], time_index, observed, trend, seasonal, coefficients)
+
+    @property
+    def remainder(self):
+        return self.observed - self.trend - self.seasonal
+
+    def seasonal_strength(self):
+        """Share of detrended variance explained by the seasonal component (0..1)"""
+        return _strength(self.seasonal, self.remainder)
+
+    def trend_strength(self):
+        """Share of deseasonalized variance explained by the trend (0..1)"""
+        return _strength(self.trend, self.remainder)
+
+    def profile(self):
+        """Seasonal curve over weeks 1..52, one row per municipality"""
+        design = harmonic_design(np.arange(1, SEASON_WEEKS + 1), self.coefficients.shape[1] // 2)
+        return pd.DataFrame(self.coefficients @ design.T, index=self.names,
+                            columns=np.arange(1, SEASON_WEEKS + 1))
+
+    def seasonal_at(self, weeks, location=ALL_MUNICIPALITIES):
+        """One location's seasonal component at the given weeks-of-year (1-based)"""
+        row = self.coefficients[self.names.index(location)]
+        return harmonic_design(weeks, len(row) // 2) @ row
+
+    def peak_weeks(self):
+        """Week-of-year (1-based) at which each seasonal curve peaks"""
+        return self.profile().to_numpy().argmax(axis=1) + 1
+
+    def summary(self):
+        """Seasonal and trend strength, peak week and seasonal amplitude per municipality"""
+        curve = self.profile().to_numpy()
+        return pd.DataFrame({
+            'municipality': self.names,
+            'seasonal_strength': self.seasonal_strength(),
+            'trend_strength': self.trend_strength(),
+            'peak_week': curve.argmax(axis=1) + 1,
+            'amplitude': curve.max(axis=1) - curve.min(axis=1),
+        })
+
+    def components(self, location=None):
+        """
+        Long DataFrame of municipality, year, week, observed, trend,
+        seasonal and remainder (one municipality if given)
+        """
+        rows = np.arange(len(self.names)) if location is None else np.array([self.names.index(location)])
+        T = len(self.time_index)
+        time_frame = self.time_index.to_frame(index=False)
+        time_frame.columns = ['year', 'week']
+        frame = pd.concat([time_frame] * len(rows), ignore_index=True)
+        frame.insert(0, 'municipality', np.repeat(np.asarray(self.names, dtype=object)[rows], T))
+        frame['observed'] = self.observed[rows].ravel()
+        frame['trend'] = self.trend[rows].ravel()
+        frame['seasonal'] = self.seasonal[rows].ravel()
+        frame['remainder'] = self.remainder[rows].ravel()
+        return frame
@@ -0,0 +1,87 @@
+"""
+Local Basemap Tile Cache
+Dengue Surveillance System - Zamboanga Sibugay
+Prefetches raster tiles for the province so maps can run without internet
+
+Tiles are stored as {z}/{x}/{y}.png under static/tiles, which Streamlit
+serves at /app/static/tiles when static serving is enabled.
+"""
+
+import math
+import os
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+TILE_CACHE_DIR = os.path.join('static', 'tiles')
+
+# Same light basemap as plotly's 'carto-positron' style
+TILE_SOURCE_URL = 'https://a.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png'
+
+# Where the browser fetches cached tiles from (Streamlit static serving)
+CACHED_TILE_URL = '/app/static/tiles/{z}/{x}/{y}.png'
+
+DEFAULT_ZOOMS = range(6, 11)
+
+
+def tile_xy(lon, lat, zoom):
+    """Web Mercator tile column and row containing a point"""
+    n = 2 ** zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bounds(bounds, zoom):
+    """(z, x, y) of every tile covering (min_lon, min_lat, max_lon, max_lat)"""
+    min_lon, min_lat, max_lon, max_lat = bounds
+    x0, y0 = tile_xy(min_lon, max_lat, zoom)
+    x1, y1 = tile_xy(max_lon, min_lat, zoom)
+    return [(zoom, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def tile_path(z, x, y, cache_dir=TILE_CACHE_DIR):
+    return os.path.join(cache_dir, str(z), str(x), f"{y}.png")
+
+
+def _fetch_tile(tile, cache_dir, source_url, timeout):
+    """Download one tile unless cached; returns 'cached', 'downloaded' or 'failed'"""
+    path = tile_path(*tile, cache_dir)
+    if os.path.exists(path):
+        return 'cached'
+    z, x, y = tile
+    request = urllib.request.Request(source_url.format(z=z, x=x, y=y),
+                                     headers={'User-Agent': 'dengue-sibugay-dashboard'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            content = response.read()
+    except OSError as e:
+        print(f"Tile {z}/{x}/{y} failed: {e}")
+        return 'failed'
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(content)
+    os.replace(path + '.tmp', path)
+    return 'downloaded'
+
+
+def prefetch_tiles(bounds, zooms=DEFAULT_ZOOMS, cache_dir=TILE_CACHE_DIR, source_url=TILE_SOURCE_URL,
+                   padding=0.25, workers=4, timeout=20):
+    """
+    Download the tiles covering bounds (padded by `padding` degrees)
+
+    Already cached tiles are skipped, so the command can be re-run to
+    resume or to add zoom levels. Returns counts per outcome.
+    """
+    min_lon, min_lat, max_lon, max_lat = bounds
+    padded = (min_lon - padding, min_lat - padding, max_lon + padding, max_lat + padding)
+    tiles = [tile for zoom in zooms for tile in tiles_for_bounds(padded, zoom)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(lambda tile: _fetch_tile(tile, cache_dir, source_url, timeout), tiles))
+    return {outcome: outcomes.count(outcome) for outcome in ('downloaded', 'cached', 'failed')}
+
+
+def tile_cache_available(cache_dir=TILE_CACHE_DIR):
+    """True if at least one zoom level has been prefetched"""
+    return os.path.isdir(cache_dir) and any(name.isdigit() for name in os.listdir(cache_dir))
@@ -0,0 +1,76 @@
+"""
+Raw Data Explorer
+Dengue Surveillance System - Zamboanga Sibugay
+Paginated, sortable and searchable table over a FrameView
+
+Only the requested page is taken from the shared frame and sent to the
+browser; numbers are formatted by column_config instead of a pandas Styler.
+"""
+
+import math
+
+import pandas as pd
+import streamlit as st
+
+from engine.figures import filter_signature
+
+PAGE_SIZES = [25, 50, 100]
+FRAME_ORDER = 'Entry order'
+
+
+def _ordered_view(view, key, signature, search, search_columns, sort_column, descending):
+    """Searched and sorted view, memoized per session until its inputs change"""
+    token = filter_signature({'rows': signature, 'search': search, 'sort': sort_column, 'descending': descending})
+    memo = st.session_state.get(f"{key}_memo")
+    if memo is not None and memo[0] == token:
+        return memo[1], False
+    ordered = view.search(search, search_columns).sort(sort_column, ascending=not descending)
+    st.session_state[f"{key}_memo"] = (token, ordered)
+    return ordered, True
+
+
+def data_explorer(view, columns, key, signature, labels=None, formats=None, search_columns=None,
+                  descending=False):
+    """
+    Render one page of `view` with search, sort and page controls
+
+    Args:
+        view: FrameView of the rows to explore
+        columns: frame columns to show
+        key: widget key prefix (unique per page)
+        signature: filter state that produced `view`; a new value resets
+            the memoized order and the page number
+        labels: display name per column
+        formats: printf-style number format per column, e.g. '%.1f°C'
+        search_columns: columns matched by the search box (default: text columns)
+        descending: initial sort direction
+    """
+    labels = labels or {}
+    formats = formats or {}
+    if search_columns is None:
+        search_columns = [c for c in columns if pd.api.types.is_string_dtype(view.frame[c])]
+
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        search = st.text_input("Search", key=f"{key}_search", placeholder="Municipality, province, ...")
+    with col2:
+        sort_label = st.selectbox("Sort by", [FRAME_ORDER] + [labels.get(c, c) for c in columns], key=f"{key}_sort")
+    with col3:
+        descending = st.toggle("Descending", value=descending, key=f"{key}_descending")
+    with col4:
+        page_size = st.selectbox("Rows", PAGE_SIZES, key=f"{key}_page_size")
+
+    sort_column = None if sort_label == FRAME_ORDER else columns[[labels.get(c, c) for c in columns].index(sort_label)]
+    ordered, changed = _ordered_view(view, key, signature, search, search_columns, sort_column, descending)
+
+    pages = max(1, math.ceil(len(ordered) / page_size))
+    if changed or st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    page_df = ordered.page(page - 1, page_size)[columns].rename(columns=labels)
+    column_config = {labels.get(c, c): st.column_config.NumberColumn(format=fmt) for c, fmt in formats.items()}
+    st.dataframe(page_df, column_config=column_config, use_container_width=True, hide_index=True)
+
+    first = (page - 1) * page_size
+    st.caption(f"Rows {min(first + 1, len(ordered)):,}–{first + len(page_df):,} of {len(ordered):,} (page {page} of {pages})")
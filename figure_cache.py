@@ -0,0 +1,25 @@
+"""
+Shared Figure Cache
+Dengue Surveillance System - Zamboanga Sibugay
+Serialized Plotly figures reused across reruns, pages and sessions
+"""
+
+import streamlit as st
+
+from engine.figures import FigureCache
+
+
+@st.cache_resource(show_spinner=False)
+def load_figure_cache():
+    """One size-bounded figure cache per server process"""
+    return FigureCache()
+
+
+def cached_figure(chart_type, filters, build):
+    """
+    Figure for a chart type and filter state, built only on a cache miss
+
+    `filters` must hold everything the figure depends on (dataset version
+    included); `build` returns the plotly Figure.
+    """
+    return load_figure_cache().get_or_build(chart_type, filters, build)
@@ -9,7 +9,6 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import json
 import sys
 sys.path.append('..')
 
@@ -18,13 +17,32 @@ try:
 except:
     from styles import SHARED_CSS, render_header, render_section_header, render_footer, render_sidebar_header, render_info_box
 
-# Try imports for mapping
-try:
-    from shapely import wkt
-    import geopandas as gpd
-    GEOPANDAS_AVAILABLE = True
-except ImportError:
-    GEOPANDAS_AVAILABLE = False
+from engine.bitmap import BitmapIndex
+from engine.ccf import ALL_MUNICIPALITIES, MAX_LAG
+from engine.cube import AggregateCube, RollupPlan
+from engine.data import dataset_version
+from engine.downsample import DEFAULT_POINT_BUDGET, downsample_indices
+from engine.endemic import CHANNEL_METHODS, ZONES, EndemicChannels
+from engine.features import CLIMATE_LABELS
+from engine.manifest import current_manifest
+from engine.models import find_columns
+from engine.pipeline import CCF_ARTIFACT, artifact_version, compute_ccf_table, read_ccf_artifact
+from engine.seasonal import SeasonalDecomposition
+from explorer import data_explorer
+from figure_cache import cached_figure
+from sections import lazy_section, lazy_tabs, render_open
+from spatial import choropleth_map, load_spatial_asset, map_mode
+
+MAP_ZOOM = 8
+
+# Most points drawn per trace of a full-history weekly chart
+CHART_POINT_BUDGET = DEFAULT_POINT_BUDGET
+
+# Raw data explorer columns (boundary WKT is left out of the table)
+RAW_DATA_COLUMNS = [
+    'MUNICIPALITY', 'YEAR_2', 'QUARTER', 'MONTH', 'MORBIDITY_WEEK', 'CASES',
+    'T2M_MAX', 'T2M_MIN', 'RH2M', 'PRECTOTCORR'
+]
 
 # Page configuration
 st.set_page_config(
@@ -49,23 +67,46 @@ def load_data():
     df = df[df['QUARTER'].isin([1, 2, 3, 4])]
     return df
 
-@st.cache_data
-def load_geojson():
-    if not GEOPANDAS_AVAILABLE:
-        return None
-    try:
-        df = pd.read_csv('sibugay_dengue_cases_dataset.csv')
-        muni_geo = df.drop_duplicates(subset=['MUNICIPALITY'])[['MUNICIPALITY', 'geometry']].copy()
-        muni_geo['geometry'] = muni_geo['geometry'].apply(wkt.loads)
-        gdf = gpd.GeoDataFrame(muni_geo, geometry='geometry', crs="EPSG:4326")
-        geojson = json.loads(gdf.to_json())
-        return geojson
-    except:
-        return None
-
-# Load data
-df = load_data()
-geojson = load_geojson()
+@st.cache_resource(show_spinner=False)
+def load_cube(version):
+    """Rollup cube of the dataset, shared read-only per dataset version"""
+    return AggregateCube.from_frame(load_data())
+
+@st.cache_resource(show_spinner=False)
+def load_filter_index(version):
+    """Row bitmaps for the sidebar filters over one shared copy of the dataset"""
+    return BitmapIndex.from_frame(load_data(), required=['CASES'])
+
+@st.cache_data(show_spinner=False)
+def load_ccf_table(version, artifact_token):
+    """Climate-case cross-correlations: the batch artifact if it matches this dataset, else computed live"""
+    ccf_table = read_ccf_artifact() if artifact_token else None
+    if ccf_table is None or not (ccf_table['dataset_version'] == version).all():
+        df = load_data()
+        ccf_table = compute_ccf_table(df, find_columns(df), version)
+    return ccf_table
+
+@st.cache_resource(show_spinner=False)
+def load_seasonal(version):
+    """Trend/seasonal/remainder components of every municipality, shared per dataset version"""
+    df = load_data()
+    return SeasonalDecomposition.from_frame(df, find_columns(df))
+
+@st.cache_resource(show_spinner=False)
+def load_endemic_channels(version, method):
+    """Endemic channels for every municipality-week, shared per dataset version"""
+    df = load_data()
+    return EndemicChannels.from_frame(df, find_columns(df), method=method)
+
+# Load data: read-only resources shared by every session
+version = dataset_version()
+cube = load_cube(version)
+filter_index = load_filter_index(version)
+manifest = current_manifest()
+try:
+    spatial_asset = load_spatial_asset(version)
+except Exception:
+    spatial_asset = None
 
 # Sidebar
 with st.sidebar:
@@ -73,8 +114,15 @@ with st.sidebar:
     
     st.markdown("### Filters")
     
+    # Filter choices come from the dataset manifest (the filter index if it cannot be built)
+    if manifest is not None and manifest['years']:
+        municipalities = manifest['municipalities']
+        years = manifest['years']
+    else:
+        municipalities = filter_index.values('MUNICIPALITY')
+        years = filter_index.values('YEAR_2')
+    
     # Municipality filter
-    municipalities = sorted(df['MUNICIPALITY'].dropna().unique())
     selected_municipality = st.multiselect(
         "Municipality",
         municipalities,
@@ -83,8 +131,8 @@ with st.sidebar:
     )
     
     # Year range
-    min_year = int(df['YEAR_2'].min())
-    max_year = int(df['YEAR_2'].max())
+    min_year = int(years[0])
+    max_year = int(years[-1])
     year_range = st.slider(
         "Year Range",
         min_year,
@@ -101,12 +149,23 @@ with st.sidebar:
         key="desc_quarter"
     )
 
-# Filter data
-filtered_df = df[
-    (df['MUNICIPALITY'].isin(selected_municipality)) &
-    (df['YEAR_2'].between(year_range[0], year_range[1])) &
-    (df['QUARTER'].isin(quarters))
-].dropna(subset=['CASES'])
+# Filter the cube's cells; every chart below is a rollup of this view
+view = cube.select(
+    MUNICIPALITY=selected_municipality,
+    YEAR_2=range(year_range[0], year_range[1] + 1),
+    QUARTER=quarters
+)
+totals = view.totals()
+
+# Every grouping this render needs, summed once and shared by the charts
+plan = RollupPlan(view).request(
+    ['YEAR_2', 'MORBIDITY_WEEK'],
+    ['YEAR_2', 'QUARTER'],
+    'YEAR_2',
+    'MUNICIPALITY',
+    'MONTH'
+)
+weekly_cases = plan.rollup(['YEAR_2', 'MORBIDITY_WEEK'])['CASES']
 
 # Header
 st.markdown(render_header(
@@ -121,68 +180,77 @@ st.markdown(render_section_header("Summary Statistics"), unsafe_allow_html=True)
 col1, col2, col3, col4, col5 = st.columns(5)
 
 with col1:
-    total_cases = filtered_df['CASES'].sum()
+    total_cases = totals['CASES']
     st.metric("Total Cases", f"{total_cases:,.0f}")
 
 with col2:
-    avg_weekly = filtered_df.groupby(['YEAR_2', 'MORBIDITY_WEEK'])['CASES'].sum().mean()
+    avg_weekly = weekly_cases.mean()
     st.metric("Avg Weekly Cases", f"{avg_weekly:.1f}")
 
 with col3:
-    peak_cases = filtered_df.groupby(['YEAR_2', 'MORBIDITY_WEEK'])['CASES'].sum().max()
+    peak_cases = weekly_cases.max()
     st.metric("Peak Weekly Cases", f"{peak_cases:.0f}")
 
 with col4:
-    avg_temp = filtered_df['T2M_MAX'].mean()
+    avg_temp = totals['T2M_MAX']
     st.metric("Avg Max Temp", f"{avg_temp:.1f}°C")
 
 with col5:
-    avg_humidity = filtered_df['RH2M'].mean()
+    avg_humidity = totals['RH2M']
     st.metric("Avg Humidity", f"{avg_humidity:.1f}%")
 
+# Everything the charts below depend on; cached figures are keyed by it
+chart_filters = {
+    'version': version,
+    'municipality': selected_municipality,
+    'year_range': tuple(year_range),
+    'quarter': quarters,
+}
+
 # Choropleth Map
 st.markdown(render_section_header("Spatial Distribution"), unsafe_allow_html=True)
 
-if geojson:
-    # Aggregate cases by municipality
-    muni_cases = filtered_df.groupby('MUNICIPALITY')['CASES'].sum().reset_index()
-    
-    fig_map = px.choropleth_mapbox(
-        muni_cases,
-        geojson=geojson,
-        locations='MUNICIPALITY',
-        featureidkey='properties.MUNICIPALITY',
-        color='CASES',
-        color_continuous_scale='YlOrRd',
-        mapbox_style='carto-positron',
-        zoom=8,
-        center={"lat": 7.8, "lon": 122.5},
-        opacity=0.75,
-        labels={'CASES': 'Total Cases'},
-        hover_name='MUNICIPALITY',
-        hover_data={'CASES': ':,.0f'}
-    )
-    fig_map.update_layout(
-        margin={"r": 0, "t": 0, "l": 0, "b": 0},
-        height=450,
-        coloraxis_colorbar=dict(
-            title="Cases",
-            tickformat=",d"
+if spatial_asset is not None:
+    def build_map():
+        # Aggregate cases by municipality
+        muni_cases = plan.rollup('MUNICIPALITY')['CASES'].reset_index()
+        
+        fig_map = choropleth_map(
+            muni_cases,
+            spatial_asset,
+            MAP_ZOOM,
+            locations='MUNICIPALITY',
+            color='CASES',
+            color_continuous_scale='YlOrRd',
+            labels={'CASES': 'Total Cases'},
+            hover_name='MUNICIPALITY',
+            hover_data={'CASES': ':,.0f'}
         )
-    )
+        fig_map.update_layout(
+            margin={"r": 0, "t": 0, "l": 0, "b": 0},
+            height=450,
+            coloraxis_colorbar=dict(
+                title="Cases",
+                tickformat=",d"
+            )
+        )
+        return fig_map
+    
+    fig_map = cached_figure('case_map', {**chart_filters, 'map_mode': map_mode()}, build_map)
     st.plotly_chart(fig_map, use_container_width=True)
 else:
-    st.info("Map visualization requires geopandas. Showing table view instead.")
-    muni_cases = filtered_df.groupby('MUNICIPALITY')['CASES'].sum().sort_values(ascending=False).reset_index()
+    st.info("Map visualization requires shapely. Showing table view instead.")
+    muni_cases = plan.rollup('MUNICIPALITY')['CASES'].sort_values(ascending=False).reset_index()
     st.dataframe(muni_cases, use_container_width=True, hide_index=True)
 
 # Temporal Trends
 st.markdown(render_section_header("Temporal Analysis"), unsafe_allow_html=True)
 
-tab1, tab2, tab3 = st.tabs(["Yearly Trend", "Quarterly Pattern", "Monthly Breakdown"])
+# Only the active tab builds and sends its chart
+tab1, tab2, tab3 = lazy_tabs(["Yearly Trend", "Quarterly Pattern", "Monthly Breakdown"], key="desc_temporal_tab")
 
-with tab1:
-    yearly_data = filtered_df.groupby('YEAR_2')['CASES'].sum().reset_index()
+def build_yearly():
+    yearly_data = plan.rollup('YEAR_2')['CASES'].reset_index()
     yearly_data['YEAR_FULL'] = yearly_data['YEAR_2'].apply(lambda x: 2000 + int(x))
     
     fig_yearly = px.bar(
@@ -201,10 +269,10 @@ with tab1:
         xaxis=dict(tickmode='linear', dtick=1)
     )
     fig_yearly.update_traces(marker_line_width=0)
-    st.plotly_chart(fig_yearly, use_container_width=True)
+    return fig_yearly
 
-with tab2:
-    quarterly_data = filtered_df.groupby(['YEAR_2', 'QUARTER'])['CASES'].sum().reset_index()
+def build_quarterly():
+    quarterly_data = plan.rollup(['YEAR_2', 'QUARTER'])['CASES'].reset_index()
     quarterly_data['Period'] = quarterly_data['YEAR_2'].astype(str) + '-Q' + quarterly_data['QUARTER'].astype(str)
     
     fig_quarterly = px.area(
@@ -220,10 +288,10 @@ with tab2:
         paper_bgcolor='white',
         xaxis=dict(tickangle=45, tickfont=dict(size=10))
     )
-    st.plotly_chart(fig_quarterly, use_container_width=True)
+    return fig_quarterly
 
-with tab3:
-    monthly_data = filtered_df.groupby('MONTH')['CASES'].sum().reset_index()
+def build_monthly():
+    monthly_data = plan.rollup('MONTH')['CASES'].reset_index()
     month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
                    'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
     monthly_data['Month_Name'] = monthly_data['MONTH'].apply(lambda x: month_names[int(x)-1] if pd.notna(x) else '')
@@ -242,15 +310,134 @@ with tab3:
         plot_bgcolor='white',
         paper_bgcolor='white'
     )
-    st.plotly_chart(fig_monthly, use_container_width=True)
+    return fig_monthly
+
+def show_chart(chart_type, build):
+    st.plotly_chart(cached_figure(chart_type, chart_filters, build), use_container_width=True)
+
+render_open(tab1, show_chart, 'yearly_trend', build_yearly)
+render_open(tab2, show_chart, 'quarterly_pattern', build_quarterly)
+render_open(tab3, show_chart, 'monthly_breakdown', build_monthly)
+
+# Seasonal decomposition over the full dataset (sidebar filters do not apply)
+def show_seasonal_decomposition():
+    seasonal = load_seasonal(version)
+    location = st.selectbox("Municipality", seasonal.names[-1:] + seasonal.names[:-1], key="desc_seasonal_municipality")
+    
+    def build_decomposition():
+        parts = seasonal.components(location)
+        period = ('20' + parts['year'].astype(int).astype(str).str.zfill(2)
+                  + '-W' + parts['week'].astype(int).astype(str).str.zfill(2))
+        
+        # The full weekly history grows every season; each trace is thinned to the point budget
+        def thinned(column, method='lttb'):
+            keep = downsample_indices(np.arange(len(parts)), parts[column], CHART_POINT_BUDGET, method)
+            return dict(x=period.iloc[keep], y=parts[column].iloc[keep])
+        
+        fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.06,
+                            subplot_titles=("Cases and Trend", "Seasonal", "Remainder"))
+        fig.add_trace(go.Scatter(**thinned('observed'), name='Cases',
+                                 line=dict(color='#cbd5e1', width=1)), row=1, col=1)
+        fig.add_trace(go.Scatter(**thinned('trend'), name='Trend',
+                                 line=dict(color='#667eea', width=2)), row=1, col=1)
+        fig.add_trace(go.Scatter(**thinned('seasonal'), name='Seasonal',
+                                 line=dict(color='#10b981', width=2)), row=2, col=1)
+        fig.add_trace(go.Bar(**thinned('remainder', 'minmax'), name='Remainder',
+                             marker_color='#94a3b8'), row=3, col=1)
+        fig.update_layout(
+            height=600,
+            showlegend=False,
+            plot_bgcolor='white',
+            paper_bgcolor='white'
+        )
+        # Thinned traces keep different weeks; labels sort chronologically
+        fig.update_xaxes(nticks=12, tickangle=45, categoryorder='category ascending')
+        return fig
+    
+    st.plotly_chart(cached_figure('seasonal_decomposition', {'version': version, 'municipality': location},
+                                  build_decomposition), use_container_width=True)
+    
+    st.markdown("**Seasonality by Municipality**")
+    st.dataframe(
+        seasonal.summary().sort_values('seasonal_strength', ascending=False),
+        column_config={
+            'municipality': 'Municipality',
+            'seasonal_strength': st.column_config.ProgressColumn("Seasonal Strength", min_value=0.0, max_value=1.0, format='%.2f'),
+            'trend_strength': st.column_config.NumberColumn("Trend Strength", format='%.2f'),
+            'peak_week': st.column_config.NumberColumn("Peak Week", format='%d'),
+            'amplitude': st.column_config.NumberColumn("Seasonal Amplitude (cases)", format='%.1f'),
+        },
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption("Trend: centered 53-week moving average. Seasonal: 3-harmonic fit on week of year. "
+               "Strength is the share of variance the component explains beyond the remainder.")
+
+lazy_section("Seasonal Decomposition", "desc_seasonal", show_seasonal_decomposition)
+
+# Endemic channel over the full dataset (sidebar filters do not apply)
+def show_endemic_channel():
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        method = st.radio("Channel", list(CHANNEL_METHODS), format_func=CHANNEL_METHODS.get,
+                          horizontal=True, key="desc_endemic_method")
+    channels = load_endemic_channels(version, method)
+    with col2:
+        location = st.selectbox("Municipality", channels.names[-1:] + channels.names[:-1], key="desc_endemic_municipality")
+    with col3:
+        channel_years = channels.years + [channels.years[-1] + 1]
+        year = st.selectbox("Season", channel_years[::-1], format_func=lambda y: f"20{int(y):02d}", key="desc_endemic_year")
+    
+    lower, center, upper = channels.channel(year, location)
+    observed = None
+    if year in channels.years:
+        observed = channels.cases[channels.years.index(year), :, channels.names.index(location)]
+    
+    def build_endemic():
+        weeks = np.arange(1, len(lower) + 1)
+        fig = go.Figure()
+        # Stacked zones: success below Q1, safety to the median, alert to Q3
+        for values, name, color in [(lower, 'Success', 'rgba(16, 185, 129, 0.25)'),
+                                    (center, 'Safety', 'rgba(250, 204, 21, 0.25)'),
+                                    (upper, 'Alert', 'rgba(249, 115, 22, 0.25)')]:
+            fig.add_trace(go.Scatter(x=weeks, y=values, name=name, mode='lines',
+                                     line=dict(width=0.5, color=color), fill='tonexty' if name != 'Success' else 'tozeroy',
+                                     fillcolor=color))
+        if observed is not None:
+            fig.add_trace(go.Scatter(x=weeks, y=observed, name=f"Cases 20{int(year):02d}", mode='lines+markers',
+                                     line=dict(color='#1F2937', width=2), marker=dict(size=4)))
+        fig.update_layout(
+            height=400,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            plot_bgcolor='white',
+            paper_bgcolor='white'
+        )
+        fig.update_xaxes(title_text="Morbidity Week", range=[0.5, len(weeks) + 0.5])
+        fig.update_yaxes(title_text="Cases")
+        return fig
+    
+    endemic_filters = {'version': version, 'method': method, 'municipality': location, 'year': year}
+    st.plotly_chart(cached_figure('endemic_channel', endemic_filters, build_endemic), use_container_width=True)
+    
+    if observed is not None:
+        above = np.flatnonzero(observed > upper) + 1
+        if len(above):
+            st.caption(f"{len(above)} week(s) in the epidemic zone (above the upper channel): "
+                       f"{', '.join(map(str, above))}.")
+        else:
+            st.caption("No week of this season rose above the upper channel.")
+    else:
+        st.caption("Channel for the coming season, from the last five completed years.")
+    st.caption(f"Zones: {' · '.join(ZONES)}. Each season's channel uses the five seasons before it "
+               "(at least three with data).")
+
+lazy_section("Endemic Channel", "desc_endemic", show_endemic_channel)
 
 # Geographic Distribution
 st.markdown(render_section_header("Municipality Comparison"), unsafe_allow_html=True)
 
-col1, col2 = st.columns(2)
-
-with col1:
-    muni_data = filtered_df.groupby('MUNICIPALITY')['CASES'].sum().sort_values(ascending=True)
+def build_municipality_bar():
+    muni_data = plan.rollup('MUNICIPALITY')['CASES'].sort_values(ascending=True)
     
     fig_muni = px.bar(
         x=muni_data.values,
@@ -268,11 +455,11 @@ with col1:
         yaxis=dict(tickfont=dict(size=10)),
         coloraxis_showscale=False
     )
-    st.plotly_chart(fig_muni, use_container_width=True)
+    return fig_muni
 
-with col2:
+def build_municipality_pie():
     # Top municipalities pie chart
-    top_muni = filtered_df.groupby('MUNICIPALITY')['CASES'].sum().nlargest(8)
+    top_muni = plan.rollup('MUNICIPALITY')['CASES'].nlargest(8)
     
     fig_pie = px.pie(
         values=top_muni.values,
@@ -292,20 +479,22 @@ with col2:
         )
     )
     fig_pie.update_traces(textposition='inside', textinfo='percent')
-    st.plotly_chart(fig_pie, use_container_width=True)
-
-# Environmental Correlation
-st.markdown(render_section_header("Environmental Factors"), unsafe_allow_html=True)
+    return fig_pie
 
 col1, col2 = st.columns(2)
 
 with col1:
+    st.plotly_chart(cached_figure('municipality_bar', chart_filters, build_municipality_bar), use_container_width=True)
+
+with col2:
+    st.plotly_chart(cached_figure('municipality_pie', chart_filters, build_municipality_pie), use_container_width=True)
+
+# Environmental Correlation
+st.markdown(render_section_header("Environmental Factors"), unsafe_allow_html=True)
+
+def build_temperature():
     # Temperature vs Cases
-    temp_cases = filtered_df.groupby('MONTH').agg({
-        'CASES': 'sum',
-        'T2M_MAX': 'mean',
-        'T2M_MIN': 'mean'
-    }).reset_index()
+    temp_cases = plan.rollup('MONTH')[['CASES', 'T2M_MAX', 'T2M_MIN']].reset_index()
     
     fig_temp = make_subplots(specs=[[{"secondary_y": True}]])
     
@@ -330,16 +519,11 @@ with col1:
     fig_temp.update_xaxes(title_text="Month")
     fig_temp.update_yaxes(title_text="Cases", secondary_y=False)
     fig_temp.update_yaxes(title_text="Temperature (°C)", secondary_y=True)
-    
-    st.plotly_chart(fig_temp, use_container_width=True)
+    return fig_temp
 
-with col2:
+def build_humidity():
     # Humidity and Precipitation vs Cases
-    env_cases = filtered_df.groupby('MONTH').agg({
-        'CASES': 'sum',
-        'RH2M': 'mean',
-        'PRECTOTCORR': 'mean'
-    }).reset_index()
+    env_cases = plan.rollup('MONTH')[['CASES', 'RH2M', 'PRECTOTCORR']].reset_index()
     
     fig_env = make_subplots(specs=[[{"secondary_y": True}]])
     
@@ -364,32 +548,99 @@ with col2:
     fig_env.update_xaxes(title_text="Month")
     fig_env.update_yaxes(title_text="Cases", secondary_y=False)
     fig_env.update_yaxes(title_text="Humidity (%)", secondary_y=True)
+    return fig_env
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.plotly_chart(cached_figure('temperature_cases', chart_filters, build_temperature), use_container_width=True)
+
+with col2:
+    st.plotly_chart(cached_figure('humidity_cases', chart_filters, build_humidity), use_container_width=True)
+
+# Lagged cross-correlation over the full dataset (sidebar filters do not apply)
+def show_lagged_correlation():
+    ccf_table = load_ccf_table(version, artifact_version(CCF_ARTIFACT))
+    variables = [v for v in CLIMATE_LABELS if v in set(ccf_table['variable'])]
+    if not variables:
+        st.info("The dataset has no climate columns to correlate with cases.")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        variable = st.selectbox("Climate variable", variables, format_func=CLIMATE_LABELS.get, key="desc_ccf_variable")
+    with col2:
+        locations = [ALL_MUNICIPALITIES] + sorted(set(ccf_table['municipality']) - {ALL_MUNICIPALITIES})
+        location = st.selectbox("Municipality", locations, key="desc_ccf_municipality")
+    
+    rows = ccf_table[(ccf_table['variable'] == variable) & (ccf_table['municipality'] == location)]
+    if rows.empty:
+        st.info(f"No cross-correlation for {CLIMATE_LABELS[variable]} in {location}.")
+        return
+    band = float(rows['band'].iloc[0])
+    
+    def build_ccf():
+        colors = np.where(rows['significant'], '#667eea', '#cbd5e1')
+        fig = go.Figure(go.Bar(x=rows['lag'], y=rows['ccf'], marker_color=colors, name='CCF'))
+        for level in (band, -band):
+            fig.add_hline(y=level, line_dash='dash', line_color='#ef4444', line_width=1)
+        fig.update_layout(
+            height=350,
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            showlegend=False
+        )
+        fig.update_xaxes(title_text="Lag (weeks, positive = climate leads cases)", range=[-MAX_LAG - 1, MAX_LAG + 1])
+        fig.update_yaxes(title_text="Cross-correlation")
+        return fig
     
-    st.plotly_chart(fig_env, use_container_width=True)
+    ccf_filters = {'version': version, 'variable': variable, 'municipality': location}
+    st.plotly_chart(cached_figure('ccf', ccf_filters, build_ccf), use_container_width=True)
+    
+    leading = rows[rows['lag'] >= 0]
+    peak = leading.loc[leading['ccf'].abs().idxmax()]
+    st.caption(
+        f"Strongest leading lag: {int(peak['lag'])} weeks (r = {peak['ccf']:.2f}). "
+        f"Both series are prewhitened with the climate series' AR filter; "
+        f"bars outside ±{band:.2f} are significant at 95%."
+    )
+
+lazy_section("Lagged Cross-Correlation (Climate → Cases)", "desc_ccf", show_lagged_correlation)
 
-# Data Summary
-with st.expander("View Raw Data Summary"):
+# Data Summary (rows are only taken while the section is open)
+def show_raw_data():
     st.markdown("**Filtered Dataset Overview**")
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Records", f"{len(filtered_df):,}")
+        st.metric("Total Records", f"{int(totals['records']):,}")
     with col2:
         st.metric("Date Range", f"20{year_range[0]} - 20{year_range[1]}")
     with col3:
         st.metric("Municipalities", len(selected_municipality))
     
-    st.dataframe(
-        filtered_df.head(100).style.format({
-            'CASES': '{:.0f}',
-            'T2M_MAX': '{:.1f}',
-            'T2M_MIN': '{:.1f}',
-            'RH2M': '{:.1f}',
-            'PRECTOTCORR': '{:.2f}'
-        }),
-        use_container_width=True,
-        hide_index=True
+    # Only the explorer's current page is taken from the shared frame
+    filtered_rows = filter_index.view(
+        MUNICIPALITY=selected_municipality,
+        YEAR_2=range(year_range[0], year_range[1] + 1),
+        QUARTER=quarters
+    )
+    
+    data_explorer(
+        filtered_rows,
+        RAW_DATA_COLUMNS,
+        key="desc_explorer",
+        signature=chart_filters,
+        formats={
+            'CASES': '%.0f',
+            'T2M_MAX': '%.1f',
+            'T2M_MIN': '%.1f',
+            'RH2M': '%.1f',
+            'PRECTOTCORR': '%.2f'
+        }
     )
 
+lazy_section("View Raw Data Summary", "desc_raw_data", show_raw_data)
+
 # Footer
 st.markdown(render_footer(), unsafe_allow_html=True)
@@ -21,24 +21,22 @@ try:
 except:
     from styles import SHARED_CSS, render_header, render_section_header, render_footer, render_sidebar_header, render_info_box
 
-# Try imports for models
-try:
-    import statsmodels.api as sm
-    from statsmodels.discrete.count_model import ZeroInflatedNegativeBinomialP
-    from statsmodels.tsa.regime_switching.markov_regression import MarkovRegression
-    STATSMODELS_AVAILABLE = True
-    MARKOV_AVAILABLE = True
-except ImportError:
-    STATSMODELS_AVAILABLE = False
-    MARKOV_AVAILABLE = False
+from engine.autocorrelation import DEFAULT_PERMUTATIONS, NOT_SIGNIFICANT, case_matrix, spatial_clusters
+from engine.data import artifact_path, dataset_version
+from engine.endemic import EndemicChannels
+from engine.features import spatial_lag_label
+from engine.manifest import current_manifest
+from engine.models import calculate_municipality_risk, find_columns, municipality_risk_frames
+from engine.pipeline import (
+    ENSEMBLE_STATE, RISK_ARTIFACT, SCAN_ARTIFACT, artifact_version, compute_forecast_bundle,
+    compute_scan_clusters, read_forecast_artifact, read_risk_artifact, read_scan_artifact, select_risk,
+)
+from engine.scan import DEFAULT_REPLICATIONS, MAX_CLUSTER_WEEKS, MAX_ZONE_FRACTION
 
-# Try imports for mapping
-try:
-    import geopandas as gpd
-    from shapely import wkt
-    GEOPANDAS_AVAILABLE = True
-except ImportError:
-    GEOPANDAS_AVAILABLE = False
+# Municipality geometry shared with the Descriptive page
+from figure_cache import cached_figure
+from sections import lazy_section
+from spatial import animated_choropleth_map, choropleth_map, load_spatial_asset, map_mode
 
 # Apply shared styles
 st.markdown(SHARED_CSS, unsafe_allow_html=True)
@@ -76,6 +74,19 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+MAP_ZOOM = 8
+CONTIGUITY = 'queen'
+
+CLUSTER_COLORS = {
+    'High-High': '#DC2626',
+    'High-Low': '#F59E0B',
+    'Low-High': '#93C5FD',
+    'Low-Low': '#1D4ED8',
+    'Hot Spot': '#DC2626',
+    'Cold Spot': '#1D4ED8',
+    NOT_SIGNIFICANT: '#E5E7EB',
+}
+
 @st.cache_data
 def load_data():
     try:
@@ -84,460 +95,557 @@ def load_data():
     except FileNotFoundError:
         return None
 
-def find_columns(df):
-    """Dynamically find relevant columns"""
-    columns = {}
-    col_lower = {c.lower(): c for c in df.columns}
-    
-    for pattern in ['mun', 'municipality', 'city', 'location']:
-        for key, orig in col_lower.items():
-            if pattern in key:
-                columns['location'] = orig
-                break
-        if 'location' in columns:
-            break
-    
-    for pattern in ['case', 'count', 'total']:
-        for key, orig in col_lower.items():
-            if pattern in key and 'date' not in key:
-                columns['cases'] = orig
-                break
-        if 'cases' in columns:
-            break
-    
-    for pattern in ['year_2', 'year']:
-        for key, orig in col_lower.items():
-            if pattern in key:
-                columns['year'] = orig
-                break
-        if 'year' in columns:
-            break
-    
-    for pattern in ['morbidity_week', 'morbidity']:
-        for key, orig in col_lower.items():
-            if pattern in key:
-                columns['week'] = orig
-                break
-        if 'week' in columns:
-            break
-    
-    if 'week' not in columns:
-        for key, orig in col_lower.items():
-            if 'week' in key and 'year' not in key and df[orig].nunique() > 1:
-                columns['week'] = orig
-                break
-    
-    for pattern in ['geometry', 'geom']:
-        for key, orig in col_lower.items():
-            if pattern in key:
-                columns['geometry'] = orig
-                break
-        if 'geometry' in columns:
-            break
-    
-    # Environmental columns
-    for pattern in ['t2m_max', 'temp_max', 'temperature']:
-        for key, orig in col_lower.items():
-            if pattern in key:
-                columns['temp_max'] = orig
-                break
-        if 'temp_max' in columns:
-            break
-    
-    for pattern in ['rh2m', 'humidity', 'rh']:
-        for key, orig in col_lower.items():
-            if pattern in key:
-                columns['humidity'] = orig
-                break
-        if 'humidity' in columns:
-            break
-    
-    for pattern in ['prectot', 'precip', 'rain']:
-        for key, orig in col_lower.items():
-            if pattern in key:
-                columns['precipitation'] = orig
-                break
-        if 'precipitation' in columns:
-            break
-    
-    return columns
+@st.cache_data
+def load_forecast_bundle(artifact_token):
+    """Forecast bundle written by the batch pipeline (re-read only when it changes)"""
+    return read_forecast_artifact() if artifact_token else None
 
-def get_dataset_dates(df, year_col, week_col):
-    """Get last date in dataset"""
-    # Drop NaN values before converting
-    clean_df = df.dropna(subset=[year_col, week_col])
-    years = clean_df[year_col].astype(int)
-    max_year = years.max()
-    full_year = 2000 + max_year if max_year < 100 else max_year
-    
-    max_year_data = clean_df[clean_df[year_col].astype(int) == max_year]
-    max_week = int(max_year_data[week_col].max())
-    
-    jan1 = datetime(full_year, 1, 1)
-    if jan1.weekday() <= 3:
-        week1_start = jan1 - timedelta(days=jan1.weekday())
-    else:
-        week1_start = jan1 + timedelta(days=7 - jan1.weekday())
-    
-    last_date = week1_start + timedelta(weeks=max_week - 1)
-    return last_date, full_year, max_week
+@st.cache_data
+def load_risk_table(version, artifact_token):
+    """Risk table written by the batch pipeline for this dataset version (re-read only when it changes)"""
+    return read_risk_artifact(version=version) if artifact_token else None
 
-def prepare_regression_data(df, cols):
-    """Prepare time series for regression"""
-    time_series = df.groupby([cols['year'], cols['week']])[cols['cases']].sum().reset_index()
-    time_series.columns = ['year', 'week', 'cases']
-    time_series = time_series.sort_values(['year', 'week']).reset_index(drop=True)
-    time_series['time_index'] = range(len(time_series))
-    time_series['lag1'] = time_series['cases'].shift(1).fillna(0)
-    time_series['rolling_mean_4'] = time_series['cases'].rolling(window=4, min_periods=1).mean()
-    
-    for col in ['cases', 'time_index', 'lag1', 'rolling_mean_4']:
-        time_series[col] = time_series[col].astype(float)
-    
-    return time_series
+@st.cache_data
+def load_scan_table(version, artifact_token):
+    """Space-time clusters written by the batch pipeline for this dataset version (re-read only when they change)"""
+    return read_scan_artifact(version=version) if artifact_token else None
 
-def prepare_full_regression_data(df, cols):
-    """Prepare data with environmental variables for significance analysis"""
-    # Aggregate by time period
-    agg_dict = {cols['cases']: 'sum'}
-    
-    if 'temp_max' in cols:
-        agg_dict[cols['temp_max']] = 'mean'
-    if 'humidity' in cols:
-        agg_dict[cols['humidity']] = 'mean'
-    if 'precipitation' in cols:
-        agg_dict[cols['precipitation']] = 'mean'
-    
-    time_series = df.groupby([cols['year'], cols['week']]).agg(agg_dict).reset_index()
-    
-    # Rename columns
-    rename_dict = {cols['year']: 'year', cols['week']: 'week', cols['cases']: 'cases'}
-    if 'temp_max' in cols:
-        rename_dict[cols['temp_max']] = 'temp_max'
-    if 'humidity' in cols:
-        rename_dict[cols['humidity']] = 'humidity'
-    if 'precipitation' in cols:
-        rename_dict[cols['precipitation']] = 'precipitation'
-    
-    time_series = time_series.rename(columns=rename_dict)
-    time_series = time_series.sort_values(['year', 'week']).reset_index(drop=True)
-    
-    # Add features
-    time_series['time_index'] = range(len(time_series))
-    time_series['lag1'] = time_series['cases'].shift(1).fillna(0)
-    time_series['lag2'] = time_series['cases'].shift(2).fillna(0)
-    time_series['rolling_mean_4'] = time_series['cases'].rolling(window=4, min_periods=1).mean()
-    
-    # Convert to float
-    for col in time_series.columns:
-        if col not in ['year', 'week']:
-            time_series[col] = time_series[col].astype(float)
-    
-    return time_series
+@st.cache_data(show_spinner=False)
+def compute_live_scan(version, _df, cols):
+    """Space-time scan when the batch pipeline has not run (cached per dataset version)"""
+    asset = load_spatial_asset(version, cols['location'], cols['geometry'])
+    return compute_scan_clusters(_df, cols, asset)
 
-def fit_negative_binomial(train_data):
-    """Fit NB model"""
-    if not STATSMODELS_AVAILABLE:
-        return None, None
-    try:
-        X = train_data[['time_index', 'lag1', 'rolling_mean_4']].values.astype(float)
-        X = sm.add_constant(X, has_constant='add')
-        y = train_data['cases'].values.astype(float)
-        model = sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=1.0))
-        results = model.fit(disp=0)
-        return model, results
-    except:
-        return None, None
+@st.cache_data
+def compute_live_bundle(version, _df, cols):
+    """Fallback when the batch pipeline has not run (cached per dataset version)"""
+    spatial_asset = None
+    if 'geometry' in cols:
+        try:
+            spatial_asset = load_spatial_asset(version, cols['location'], cols['geometry'])
+        except Exception as e:
+            print(f"Spatial asset unavailable: {e}")
+    return compute_forecast_bundle(_df, cols, version, artifact_path(ENSEMBLE_STATE), spatial_asset)
 
-def fit_nb_with_env(train_data):
-    """Fit NB model with environmental variables for significance analysis"""
-    if not STATSMODELS_AVAILABLE:
-        return None, None
-    
-    try:
-        # Build feature list
-        feature_cols = ['time_index', 'lag1', 'rolling_mean_4']
-        feature_names = ['Time Trend', 'Previous Week Cases', '4-Week Rolling Average']
-        
-        if 'temp_max' in train_data.columns:
-            feature_cols.append('temp_max')
-            feature_names.append('Max Temperature')
-        if 'humidity' in train_data.columns:
-            feature_cols.append('humidity')
-            feature_names.append('Humidity')
-        if 'precipitation' in train_data.columns:
-            feature_cols.append('precipitation')
-            feature_names.append('Precipitation')
-        
-        X = train_data[feature_cols].values.astype(float)
-        X = sm.add_constant(X, has_constant='add')
-        y = train_data['cases'].values.astype(float)
-        
-        model = sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=1.0))
-        results = model.fit(disp=0)
-        
-        return results, ['Intercept'] + feature_names
-    except:
-        return None, None
+@st.cache_data(show_spinner=False)
+def compute_spatial_clusters(version, _df, cols, criterion=CONTIGUITY):
+    """LISA and Gi* for every municipality and epi-week (cached per dataset version)"""
+    asset = load_spatial_asset(version, cols['location'], cols['geometry'])
+    values, time_index = case_matrix(_df, cols['location'], cols['cases'], [cols['year'], cols['week']], asset.names)
+    return spatial_clusters(values, asset.weights(criterion), asset.names, time_index)
 
-def fit_zinb(train_data):
-    """Fit ZINB model"""
-    if not STATSMODELS_AVAILABLE:
-        return None, None
-    try:
-        X = train_data[['time_index', 'lag1', 'rolling_mean_4']].values.astype(float)
-        X = sm.add_constant(X, has_constant='add')
-        y = train_data['cases'].values.astype(float)
-        X_infl = np.ones((len(y), 1))
-        model = ZeroInflatedNegativeBinomialP(y, X, exog_infl=X_infl)
-        results = model.fit(disp=0, maxiter=300, method='bfgs')
-        return model, results
-    except:
-        try:
-            X_simple = sm.add_constant(train_data[['lag1']].values.astype(float))
-            y = train_data['cases'].values.astype(float)
-            X_infl = np.ones((len(y), 1))
-            model = ZeroInflatedNegativeBinomialP(y, X_simple, exog_infl=X_infl)
-            results = model.fit(disp=0, maxiter=300, method='nm')
-            return model, results
-        except:
-            return None, None
+@st.cache_data(show_spinner=False)
+def compute_risk_frames(version, _df, cols, weeks_window):
+    """Risk scores for every municipality and epi-week (cached per dataset version and window)"""
+    asset = load_spatial_asset(version, cols['location'], cols['geometry'])
+    return municipality_risk_frames(_df, cols, weeks_window, asset.names)
 
-def fit_markov_switching_nb(train_data):
-    """Fit Markov-Switching Negative Binomial model"""
-    if not MARKOV_AVAILABLE:
-        print("Markov not available")
-        return None, None
-    try:
-        # Prepare exogenous variables - simpler approach
-        y = train_data['cases'].values.astype(float)
-        X = train_data[['lag1']].values.astype(float)
-        
-        # Fit Markov-switching model with 2 regimes (low/high outbreak states)
-        model = MarkovRegression(
-            endog=y,
-            k_regimes=2,
-            exog=X,
-            switching_variance=True
+@st.cache_resource(show_spinner=False)
+def load_endemic_channels(version, _df, cols):
+    """Endemic channels for every municipality-week, shared per dataset version"""
+    return EndemicChannels.from_frame(_df, cols)
+
+def risk_score_map(risk_df, spatial_asset):
+    """Choropleth of municipality risk scores"""
+    fig_map = choropleth_map(
+        risk_df,
+        spatial_asset,
+        MAP_ZOOM,
+        locations='municipality',
+        color='risk_score',
+        color_continuous_scale='RdYlGn_r',
+        range_color=[0, 100],
+        hover_name='municipality',
+        hover_data={
+            'risk_score': ':.1f',
+            'total_cases': True,
+            'avg_cases': ':.1f',
+            'risk_level': True
+        },
+        labels={
+            'risk_score': 'Risk Score',
+            'total_cases': 'Total Cases',
+            'avg_cases': 'Avg Cases/Week',
+            'risk_level': 'Risk Level'
+        }
+    )
+    fig_map.update_layout(
+        height=450,
+        margin=dict(l=0, r=0, t=0, b=0),
+        coloraxis_colorbar=dict(
+            title='Risk',
+            tickvals=[0, 25, 50, 75, 100],
+            ticktext=['Low', '', 'Mod', '', 'Critical']
         )
-        results = model.fit(maxiter=200, disp=False, warn_convergence=False)
-        print(f"Markov model fitted successfully. AIC: {results.aic:.2f}")
-        return model, results
-    except Exception as e:
-        print(f"Markov fitting error (first attempt): {str(e)[:100]}")
-        # Fallback to even simpler specification
-        try:
-            y = train_data['cases'].values.astype(float)
-            # Just use constant term, no exog variables
-            model = MarkovRegression(
-                endog=y,
-                k_regimes=2,
-                switching_variance=False
-            )
-            results = model.fit(maxiter=200, disp=False, warn_convergence=False)
-            print(f"Markov model fitted (simple). AIC: {results.aic:.2f}")
-            return model, results
-        except Exception as e2:
-            print(f"Markov fitting error (fallback): {str(e2)[:100]}")
-            return None, None
+    )
+    return fig_map
 
-def predict_with_model(results, test_data, model_type='nb'):
-    """Make predictions"""
-    try:
-        if model_type == 'zinb':
-            n_params = results.model.exog.shape[1]
-            if n_params == 4:
-                X_test = test_data[['time_index', 'lag1', 'rolling_mean_4']].values.astype(float)
-            else:
-                X_test = test_data[['lag1']].values.astype(float)
-            X_test = sm.add_constant(X_test, has_constant='add')
-            predictions = results.predict(X_test, exog_infl=np.ones((len(test_data), 1)))
-        elif model_type == 'markov':
-            # For Markov-switching, use expected value across regimes
-            try:
-                if results.model.exog is not None:
-                    X_test = test_data[['lag1']].values.astype(float)
-                    predictions = results.predict(exog=X_test)
-                else:
-                    # No exog variables - just predict based on fitted model
-                    predictions = results.predict()
-                    # Trim or extend to test data length if needed
-                    if len(predictions) > len(test_data):
-                        # Take the last N predictions matching test data length
-                        predictions = predictions[-len(test_data):]
-                    elif len(predictions) < len(test_data):
-                        predictions = np.tile(predictions.mean(), len(test_data))
-            except Exception as e:
-                print(f"Markov prediction error: {str(e)[:100]}")
-                predictions = results.predict()
-                # Ensure correct length
-                if len(predictions) > len(test_data):
-                    predictions = predictions[-len(test_data):]
-                elif len(predictions) < len(test_data):
-                    predictions = np.tile(predictions.mean(), len(test_data))
-        else:
-            X_test = test_data[['time_index', 'lag1', 'rolling_mean_4']].values.astype(float)
-            X_test = sm.add_constant(X_test, has_constant='add')
-            predictions = results.predict(X_test)
-        
-        # Final safety check: ensure predictions match test_data length
-        predictions = np.array(predictions).flatten()
-        if len(predictions) != len(test_data):
-            print(f"Warning: Prediction length mismatch for {model_type}. Expected {len(test_data)}, got {len(predictions)}")
-            if len(predictions) > len(test_data):
-                predictions = predictions[-len(test_data):]
-            else:
-                predictions = np.tile(predictions.mean() if len(predictions) > 0 else 0, len(test_data))
-        
-        return predictions
-    except Exception as e:
-        print(f"Prediction error for {model_type}: {str(e)[:100]}")
-        return None
+def risk_animation_map(frames, spatial_asset):
+    """Risk score choropleth with one animation frame per epi-week"""
+    fig_map = animated_choropleth_map(
+        frames,
+        spatial_asset,
+        MAP_ZOOM,
+        animation_frame='frame',
+        locations='municipality',
+        color='risk_score',
+        customdata=['total_cases', 'risk_level'],
+        hovertemplate=(
+            '<b>%{location}</b><br>Risk Score: %{z:.1f}<br>'
+            'Total Cases: %{customdata[0]:,.0f}<br>Risk Level: %{customdata[1]}<extra></extra>'
+        ),
+        frame_prefix='Epi-week: ',
+        color_continuous_scale='RdYlGn_r',
+        range_color=[0, 100],
+        labels={'risk_score': 'Risk Score'}
+    )
+    fig_map.update_layout(
+        height=540,
+        margin=dict(l=0, r=0, t=0, b=0),
+        coloraxis_colorbar=dict(
+            title='Risk',
+            tickvals=[0, 25, 50, 75, 100],
+            ticktext=['Low', '', 'Mod', '', 'Critical']
+        )
+    )
+    return fig_map
+
+def cluster_map(week_rows, spatial_asset, color_col):
+    """Choropleth of LISA clusters or Gi* hot spots for one epi-week"""
+    fig_map = choropleth_map(
+        week_rows,
+        spatial_asset,
+        MAP_ZOOM,
+        locations='municipality',
+        color=color_col,
+        color_discrete_map=CLUSTER_COLORS,
+        hover_name='municipality',
+        hover_data={
+            color_col: False,
+            'value': ':.0f',
+            'local_i': ':.2f',
+            'lisa_p': ':.3f',
+            'gi_z': ':.2f',
+            'gi_p': ':.3f'
+        },
+        labels={
+            'value': 'Cases',
+            'local_i': 'Local Moran I',
+            'lisa_p': 'LISA p-value',
+            'gi_z': 'Gi* z-score',
+            'gi_p': 'Gi* p-value'
+        }
+    )
+    fig_map.update_layout(
+        height=450,
+        margin=dict(l=0, r=0, t=0, b=0),
+        legend=dict(title=None, orientation='h', yanchor='bottom', y=0.01, xanchor='left', x=0.01)
+    )
+    return fig_map
+
+def model_array(models, name, key):
+    values = models[name][key]
+    return None if values is None else np.array(values, dtype=float)
 
-def calculate_metrics(actual, predicted):
-    """Calculate performance metrics: MAE, RMSE, MASE"""
-    actual = np.array(actual).flatten().astype(float)
-    predicted = np.array(predicted).flatten().astype(float)
+def bundle_signature(bundle):
+    """Filter state for figures drawn from a forecast bundle"""
+    return {'version': bundle.get('dataset_version'), 'generated_at': bundle.get('generated_at')}
+
+def render_model_performance(bundle):
+    """Test-set accuracy of each model"""
+    models = bundle['models']
+    nb_test_pred = model_array(models, 'NB', 'test_pred')
+    zinb_test_pred = model_array(models, 'ZINB', 'test_pred')
+    markov_test_pred = model_array(models, 'Markov', 'test_pred')
+    nb_train_results = models['NB']['train_available']
+    zinb_train_results = models['ZINB']['train_available']
+    markov_train_results = models['Markov']['train_available']
     
-    rmse = np.sqrt(np.mean((actual - predicted) ** 2))
-    mae = np.mean(np.abs(actual - predicted))
+    st.markdown(f"""
+    <div class="info-box">
+        <strong>Evaluation:</strong> Train/Test Split (80/20) — 
+        Training: {bundle['n_train']} weeks, Testing: {bundle['n_test']} weeks
+    </div>
+    """, unsafe_allow_html=True)
     
-    naive_errors = np.abs(np.diff(actual))
-    mase = mae / np.mean(naive_errors) if len(naive_errors) > 0 and np.mean(naive_errors) > 0 else np.nan
+    col1, col2, col3 = st.columns(3)
     
-    return {'MAE': mae, 'RMSE': rmse, 'MASE': mase}
-
-def calculate_aic_bic(results, n_obs, model_type='nb'):
-    """
-    Calculate AIC, BIC, and Log-likelihood/Deviance for model comparison
-    
-    AIC = 2k - 2ln(L)
-    BIC = k*ln(n) - 2ln(L)
-    Deviance = -2*ln(L)
-    
-    where:
-    - k = number of parameters
-    - L = likelihood
-    - n = number of observations
-    """
-    try:
-        if hasattr(results, 'aic') and hasattr(results, 'bic'):
-            # Model already has AIC/BIC computed
-            aic = float(results.aic)
-            bic = float(results.bic)
-            log_likelihood = float(results.llf) if hasattr(results, 'llf') else np.nan
+    with col1:
+        st.markdown("**Negative Binomial (NB)**")
+        if nb_train_results and bundle['n_test'] > 0:
+            if nb_test_pred is not None:
+                nb_metrics = models['NB']['metrics']
+                st.markdown(f"""
+                <div class="perf-grid">
+                    <div class="perf-item"><div class="val">{nb_metrics['MAE']:.2f}</div><div class="lbl">MAE</div></div>
+                    <div class="perf-item"><div class="val">{nb_metrics['RMSE']:.2f}</div><div class="lbl">RMSE</div></div>
+                    <div class="perf-item"><div class="val">{nb_metrics['MASE']:.2f}</div><div class="lbl">MASE</div></div>
+                </div>
+                """, unsafe_allow_html=True)
+        else:
+            st.warning("Could not compute NB metrics")
+    
+    with col2:
+        st.markdown("**Zero-Inflated NB (ZINB)**")
+        if zinb_train_results and bundle['n_test'] > 0:
+            if zinb_test_pred is not None:
+                zinb_metrics = models['ZINB']['metrics']
+                st.markdown(f"""
+                <div class="perf-grid">
+                    <div class="perf-item"><div class="val">{zinb_metrics['MAE']:.2f}</div><div class="lbl">MAE</div></div>
+                    <div class="perf-item"><div class="val">{zinb_metrics['RMSE']:.2f}</div><div class="lbl">RMSE</div></div>
+                    <div class="perf-item"><div class="val">{zinb_metrics['MASE']:.2f}</div><div class="lbl">MASE</div></div>
+                </div>
+                """, unsafe_allow_html=True)
+        else:
+            st.warning("Could not compute ZINB metrics")
+    
+    with col3:
+        st.markdown("**Markov-Switching NB**")
+        if markov_train_results and bundle['n_test'] > 0:
+            if markov_test_pred is not None:
+                markov_metrics = models['Markov']['metrics']
+                st.markdown(f"""
+                <div class="perf-grid">
+                    <div class="perf-item"><div class="val">{markov_metrics['MAE']:.2f}</div><div class="lbl">MAE</div></div>
+                    <div class="perf-item"><div class="val">{markov_metrics['RMSE']:.2f}</div><div class="lbl">RMSE</div></div>
+                    <div class="perf-item"><div class="val">{markov_metrics['MASE']:.2f}</div><div class="lbl">MASE</div></div>
+                </div>
+                """, unsafe_allow_html=True)
         else:
-            # Calculate manually
-            k = len(results.params)  # number of parameters
-            log_likelihood = float(results.llf)  # log-likelihood
+            st.warning("Could not compute Markov metrics")
+
+def render_goodness_of_fit(bundle):
+    """AIC/BIC comparison, count model catalog and test-set predictions"""
+    models = bundle['models']
+    nb_test_pred = model_array(models, 'NB', 'test_pred')
+    zinb_test_pred = model_array(models, 'ZINB', 'test_pred')
+    markov_test_pred = model_array(models, 'Markov', 'test_pred')
+    test_actual = np.array(bundle['test_actual'], dtype=float)
+    figure_key = bundle_signature(bundle)
+    
+    st.markdown("""
+    <div class="info-box">
+        <strong>Model Selection Criteria:</strong> AIC, BIC, Log-likelihood, and Deviance assess model fit.
+        <strong>Lower AIC/BIC/Deviance and higher Log-likelihood indicate better models.</strong>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # AIC/BIC for all models (computed on the training split)
+    aic_bic_data = []
+    
+    for name in ['NB', 'ZINB', 'Markov']:
+        fit_stats = models[name]['fit']
+        if fit_stats:
+            aic_bic_data.append({
+                'Model': models[name]['label'],
+                'AIC': round(fit_stats['AIC'], 2) if fit_stats['AIC'] is not None else np.nan,
+                'BIC': round(fit_stats['BIC'], 2) if fit_stats['BIC'] is not None else np.nan,
+                'Log-likelihood': round(fit_stats['Log-likelihood'], 2) if fit_stats['Log-likelihood'] is not None else np.nan,
+                'Deviance': round(fit_stats['Deviance'], 2) if fit_stats['Deviance'] is not None else np.nan,
+                'Parameters': fit_stats['Parameters']
+            })
+    
+    if aic_bic_data:
+        aic_bic_df = pd.DataFrame(aic_bic_data)
+        
+        # Identify best models
+        if not aic_bic_df['AIC'].isna().all():
+            best_aic_idx = aic_bic_df['AIC'].idxmin()
+            aic_bic_df['Best AIC'] = ''
+            aic_bic_df.loc[best_aic_idx, 'Best AIC'] = '✓ Best'
+        
+        if not aic_bic_df['BIC'].isna().all():
+            best_bic_idx = aic_bic_df['BIC'].idxmin()
+            aic_bic_df['Best BIC'] = ''
+            aic_bic_df.loc[best_bic_idx, 'Best BIC'] = '✓ Best'
+        
+        # Style the dataframe
+        def highlight_best(row):
+            if '✓ Best' in str(row.get('Best AIC', '')) or '✓ Best' in str(row.get('Best BIC', '')):
+                return ['background-color: #D1FAE5'] * len(row)
+            else:
+                return ['background-color: #F9FAFB'] * len(row)
+        
+        styled_aic_bic = aic_bic_df.style.apply(highlight_best, axis=1)
+        st.dataframe(styled_aic_bic, use_container_width=True, hide_index=True)
+        
+        # Interpretation
+        st.markdown("**Model Selection Recommendation:**")
+        
+        if not aic_bic_df['AIC'].isna().all() and not aic_bic_df['BIC'].isna().all():
+            best_aic_model = aic_bic_df.loc[best_aic_idx, 'Model']
+            best_bic_model = aic_bic_df.loc[best_bic_idx, 'Model']
             
-            aic = 2 * k - 2 * log_likelihood
-            bic = k * np.log(n_obs) - 2 * log_likelihood
+            if best_aic_model == best_bic_model:
+                st.markdown(f"""
+                <div style="padding: 1rem; background: #D1FAE5; border-radius: 8px; border-left: 4px solid #10B981;">
+                    <strong>✓ Recommended Model: {best_aic_model}</strong><br>
+                    Both AIC and BIC criteria agree that this model provides the best balance between 
+                    goodness of fit and model complexity.
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown(f"""
+                <div style="padding: 1rem; background: #FEF3C7; border-radius: 8px; border-left: 4px solid #F59E0B;">
+                    <strong>⚠ Mixed Results:</strong><br>
+                    • AIC prefers: <strong>{best_aic_model}</strong> (more complex model may be justified)<br>
+                    • BIC prefers: <strong>{best_bic_model}</strong> (simpler model preferred)<br>
+                    Consider both criteria along with domain knowledge for final model selection.
+                </div>
+                """, unsafe_allow_html=True)
         
-        deviance = -2 * log_likelihood if not np.isnan(log_likelihood) else np.nan
+        # Visual comparison
+        col1, col2 = st.columns(2)
         
-        return {'AIC': aic, 'BIC': bic, 'Log-likelihood': log_likelihood, 'Deviance': deviance}
-    except Exception as e:
-        return {'AIC': np.nan, 'BIC': np.nan, 'Log-likelihood': np.nan, 'Deviance': np.nan}
-
-def predict_future(results, last_data, weeks_ahead=4, model_type='nb'):
-    """Predict future cases"""
-    predictions = []
-    current_lag1 = float(last_data['cases'].iloc[-1])
-    current_rolling = float(last_data['rolling_mean_4'].iloc[-1])
-    next_time_index = float(last_data['time_index'].iloc[-1]) + 1
-    
-    for i in range(weeks_ahead):
-        if model_type == 'zinb':
-            try:
-                n_params = results.model.exog.shape[1]
-                if n_params == 4:
-                    X_future = np.array([[1.0, next_time_index + i, current_lag1, current_rolling]])
-                else:
-                    X_future = np.array([[1.0, current_lag1]])
-                pred = results.predict(X_future, exog_infl=np.ones((1, 1)))
-            except:
-                pred = [current_rolling]
-        elif model_type == 'markov':
-            try:
-                if results.model.exog is not None:
-                    X_future = np.array([[current_lag1]])
-                    pred = results.predict(exog=X_future)
-                    if hasattr(pred, '__iter__'):
-                        pred_value = float(pred[-1] if len(pred) > 0 else current_rolling)
-                    else:
-                        pred_value = float(pred)
-                else:
-                    # No exog - use smoothed predicted mean
-                    pred_value = results.smoothed_marginal_probabilities[:, 0].mean() * results.params[0] + \
-                                 results.smoothed_marginal_probabilities[:, 1].mean() * results.params[1]
-                pred = [pred_value]
-            except Exception as e:
-                print(f"Markov future prediction error: {str(e)[:100]}")
-                pred = [current_rolling]
-        else:
-            X_future = np.array([[1.0, next_time_index + i, current_lag1, current_rolling]])
-            try:
-                pred = results.predict(X_future)
-            except:
-                pred = [current_rolling]
+        with col1:
+            def build_aic():
+                fig_aic = px.bar(
+                    aic_bic_df,
+                    x='Model',
+                    y='AIC',
+                    title='AIC Comparison (Lower is Better)',
+                    color='AIC',
+                    color_continuous_scale='RdYlGn_r',
+                    text='AIC'
+                )
+                fig_aic.update_traces(texttemplate='%{text:.2f}', textposition='outside')
+                fig_aic.update_layout(
+                    height=300,
+                    plot_bgcolor='white',
+                    paper_bgcolor='white',
+                    showlegend=False,
+                    xaxis_title='',
+                    yaxis_title='AIC Value'
+                )
+                return fig_aic
+            
+            st.plotly_chart(cached_figure('aic_comparison', figure_key, build_aic), use_container_width=True)
         
-        pred_value = float(np.array(pred).flatten()[0])
-        predictions.append(max(0, pred_value))
-        current_lag1 = pred_value
-        current_rolling = (current_rolling * 3 + pred_value) / 4
-    
-    return predictions
-
-def calculate_municipality_risk(df, cols, selected_year=None, selected_weeks=4):
-    """Calculate risk by municipality with filters"""
-    if selected_year is None or selected_year == 'All Years':
-        # Use all data when "All Years" is selected
-        if selected_year == 'All Years':
-            recent_data = df.copy()
-            max_week = df[cols['week']].max()
-        else:
-            max_year = df[cols['year']].max()
-            recent_data = df[df[cols['year']] == max_year]
-            max_week = recent_data[cols['week']].max()
+        with col2:
+            def build_bic():
+                fig_bic = px.bar(
+                    aic_bic_df,
+                    x='Model',
+                    y='BIC',
+                    title='BIC Comparison (Lower is Better)',
+                    color='BIC',
+                    color_continuous_scale='RdYlGn_r',
+                    text='BIC'
+                )
+                fig_bic.update_traces(texttemplate='%{text:.2f}', textposition='outside')
+                fig_bic.update_layout(
+                    height=300,
+                    plot_bgcolor='white',
+                    paper_bgcolor='white',
+                    showlegend=False,
+                    xaxis_title='',
+                    yaxis_title='BIC Value'
+                )
+                return fig_bic
+            
+            st.plotly_chart(cached_figure('bic_comparison', figure_key, build_bic), use_container_width=True)
     else:
-        max_year = selected_year
-        recent_data = df[df[cols['year']] == max_year]
-        max_week = recent_data[cols['week']].max()
+        st.warning("No models available for AIC/BIC comparison")
     
-    # For "All Years", aggregate all data; otherwise filter by recent weeks
-    if selected_year == 'All Years':
-        recent_weeks = recent_data
-    else:
-        recent_weeks = recent_data[recent_data[cols['week']] >= max(1, max_week - selected_weeks + 1)]
+    # Count model catalog fitted on one shared design matrix
+    if bundle.get('comparison'):
+        st.markdown("**Count Model Catalog (Training Split)**")
+        comparison_df = pd.DataFrame(bundle['comparison'])
+        comparison_df[['AIC', 'BIC', 'Log-likelihood', 'Deviance']] = (
+            comparison_df[['AIC', 'BIC', 'Log-likelihood', 'Deviance']].astype(float).round(2)
+        )
+        st.dataframe(comparison_df, use_container_width=True, hide_index=True)
     
-    risk_df = recent_weeks.groupby(cols['location']).agg({
-        cols['cases']: ['sum', 'mean', 'max', 'std']
-    }).reset_index()
-    risk_df.columns = ['municipality', 'total_cases', 'avg_cases', 'max_cases', 'std_cases']
-    risk_df['std_cases'] = risk_df['std_cases'].fillna(0)
+    # Actual vs Predicted Chart
+    if nb_test_pred is not None or zinb_test_pred is not None or markov_test_pred is not None:
+        st.markdown("**Actual vs Predicted (Test Set)**")
+        
+        def build_compare():
+            fig_compare = go.Figure()
+            fig_compare.add_trace(go.Scatter(
+                y=test_actual,
+                mode='lines+markers',
+                name='Actual',
+                line=dict(color='#1F2937', width=2)
+            ))
+            
+            if nb_test_pred is not None:
+                fig_compare.add_trace(go.Scatter(
+                    y=nb_test_pred,
+                    mode='lines+markers',
+                    name='NB Predicted',
+                    line=dict(color='#667eea', width=2, dash='dash')
+                ))
+            
+            if zinb_test_pred is not None:
+                fig_compare.add_trace(go.Scatter(
+                    y=zinb_test_pred,
+                    mode='lines+markers',
+                    name='ZINB Predicted',
+                    line=dict(color='#10B981', width=2, dash='dot')
+                ))
+            
+            if markov_test_pred is not None:
+                fig_compare.add_trace(go.Scatter(
+                    y=markov_test_pred,
+                    mode='lines+markers',
+                    name='Markov Predicted',
+                    line=dict(color='#F59E0B', width=2, dash='dashdot')
+                ))
+            
+            fig_compare.update_layout(
+                height=300,
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                plot_bgcolor='white',
+                paper_bgcolor='white',
+                xaxis_title="Test Period",
+                yaxis_title="Cases",
+                margin=dict(t=40)
+            )
+            return fig_compare
+        
+        fig_compare = cached_figure('actual_vs_predicted', figure_key, build_compare)
+        st.plotly_chart(fig_compare, use_container_width=True)
+
+def render_significance(bundle):
+    """Environmental coefficients and neighbour spillover"""
+    figure_key = bundle_signature(bundle)
     
-    # Calculate risk score
-    if risk_df['total_cases'].max() > 0:
-        risk_df['risk_score'] = (risk_df['total_cases'] / risk_df['total_cases'].max() * 100).round(1)
-    else:
-        risk_df['risk_score'] = 0
+    st.markdown("""
+    <div class="info-box">
+        Analysis of factors that significantly influence dengue case counts. 
+        Factors with <strong>p-value < 0.05</strong> are considered statistically significant.
+    </div>
+    """, unsafe_allow_html=True)
     
-    # Categorize risk
-    risk_df['risk_level'] = pd.cut(
-        risk_df['risk_score'],
-        bins=[-1, 25, 50, 75, 100],
-        labels=['Low', 'Moderate', 'High', 'Critical']
-    )
+    # Coefficients of the NB model with environmental variables
+    significance = bundle['significance']
     
-    # Calculate trend (using std as volatility indicator)
-    risk_df['trend'] = risk_df.apply(
-        lambda x: '↑ Increasing' if x['std_cases'] > x['avg_cases'] * 0.5 else 
-                  ('↓ Stable' if x['avg_cases'] < 1 else '→ Steady'),
-        axis=1
-    )
+    if significance:
+        try:
+            # Create significance table
+            sig_data = []
+            for factor in significance:
+                name = factor['name']
+                coef = factor['coef'] if factor['coef'] is not None else np.nan
+                pval = factor['pvalue'] if factor['pvalue'] is not None else 1.0
+                ci_low = factor['ci_low'] if factor['ci_low'] is not None else np.nan
+                ci_high = factor['ci_high'] if factor['ci_high'] is not None else np.nan
+                
+                # Determine significance
+                if pval < 0.001:
+                    sig_level = '***'
+                    sig_text = 'Highly Significant'
+                elif pval < 0.01:
+                    sig_level = '**'
+                    sig_text = 'Very Significant'
+                elif pval < 0.05:
+                    sig_level = '*'
+                    sig_text = 'Significant'
+                else:
+                    sig_level = ''
+                    sig_text = 'Not Significant'
+                
+                # Effect direction
+                if name != 'Intercept':
+                    if coef > 0:
+                        effect = '↑ Increases cases'
+                    else:
+                        effect = '↓ Decreases cases'
+                else:
+                    effect = '-'
+                
+                sig_data.append({
+                    'Factor': name,
+                    'Coefficient': round(float(coef), 4),
+                    'p-value': f"{float(pval):.4f}",
+                    'Significance': f"{sig_text} {sig_level}",
+                    'Effect': effect,
+                    '95% CI': f"[{float(ci_low):.3f}, {float(ci_high):.3f}]"
+                })
+            
+            sig_df = pd.DataFrame(sig_data)
+            
+            # Display table
+            def highlight_significance(row):
+                if '***' in row['Significance'] or '**' in row['Significance']:
+                    return ['background-color: #D1FAE5'] * len(row)
+                elif '*' in row['Significance']:
+                    return ['background-color: #FEF3C7'] * len(row)
+                else:
+                    return ['background-color: #F9FAFB'] * len(row)
+            
+            styled_sig = sig_df.style.apply(highlight_significance, axis=1)
+            st.dataframe(styled_sig, use_container_width=True, hide_index=True)
+            
+            # Visual representation
+            st.markdown("**Factor Importance (Absolute Coefficient)**")
+            
+            factor_importance = sig_df[sig_df['Factor'] != 'Intercept'].copy()
+            factor_importance['Abs_Coef'] = factor_importance['Coefficient'].abs()
+            factor_importance = factor_importance.sort_values('Abs_Coef', ascending=True)
+            
+            def build_importance():
+                fig_importance = px.bar(
+                    factor_importance,
+                    x='Abs_Coef',
+                    y='Factor',
+                    orientation='h',
+                    color='Coefficient',
+                    color_continuous_scale='RdYlGn_r',
+                    labels={'Abs_Coef': 'Absolute Coefficient', 'Factor': ''}
+                )
+                fig_importance.update_layout(
+                    height=250,
+                    plot_bgcolor='white',
+                    paper_bgcolor='white',
+                    showlegend=False,
+                    coloraxis_showscale=True,
+                    coloraxis_colorbar=dict(title='Effect')
+                )
+                return fig_importance
+            
+            st.plotly_chart(cached_figure('factor_importance', figure_key, build_importance), use_container_width=True)
+            
+            # Key findings
+            st.markdown("**Key Findings:**")
+            
+            significant_factors = [row for _, row in sig_df.iterrows() 
+                                  if '*' in row['Significance'] and row['Factor'] != 'Intercept']
+            
+            if significant_factors:
+                for factor in significant_factors:
+                    direction = "increases" if factor['Coefficient'] > 0 else "decreases"
+                    st.markdown(f"""
+                    <div style="padding: 0.5rem; margin: 0.25rem 0; background: #F0FDF4; border-radius: 8px; border-left: 4px solid #10B981;">
+                        <strong>{factor['Factor']}</strong> significantly {direction} dengue cases 
+                        <span style="color: #6B7280;">(p = {factor['p-value']}, coefficient = {factor['Coefficient']:.4f})</span>
+                    </div>
+                    """, unsafe_allow_html=True)
+            else:
+                st.info("No factors reached statistical significance at p < 0.05 level.")
+                
+        except Exception as e:
+            st.warning(f"Could not extract model coefficients: {e}")
+    else:
+        st.warning("Could not fit model with environmental variables for significance analysis.")
     
-    return risk_df.sort_values('risk_score', ascending=False)
+    # Neighbour spillover per municipality (spatial-lag covariates)
+    if bundle.get('spillover'):
+        st.markdown("**Neighbour Spillover by Municipality**")
+        spillover_df = pd.DataFrame(bundle['spillover'])
+        lag_cols = [c[:-len('_coef')] for c in spillover_df.columns if c.endswith('_coef')]
+        display_df = pd.DataFrame({'Municipality': spillover_df['municipality']})
+        for col in lag_cols:
+            label = spatial_lag_label(col)
+            display_df[f"{label} Coef."] = spillover_df[f"{col}_coef"].round(4)
+            display_df[f"{label} p"] = spillover_df[f"{col}_pvalue"].round(4)
+        st.dataframe(display_df, use_container_width=True, hide_index=True)
+        st.caption(
+            "Negative Binomial fit per municipality on its own previous-week cases and the "
+            "contiguity-weighted average of its neighbours' lagged cases."
+        )
 
 # Main Application
 def main():
@@ -554,14 +662,14 @@ def main():
         st.error(f"Missing columns: {missing}")
         return
     
-    # Get dates and prepare data
-    last_date, last_year, last_week = get_dataset_dates(df, cols['year'], cols['week'])
-    time_series = prepare_regression_data(df, cols)
-    full_time_series = prepare_full_regression_data(df, cols)
+    # Precomputed artifacts from the batch pipeline, else compute live
+    version = dataset_version()
+    bundle = load_forecast_bundle(artifact_version())
+    if bundle is None:
+        bundle = compute_live_bundle(version, df, cols)
     
-    train_size = int(len(time_series) * 0.8)
-    train_data = time_series.iloc[:train_size].copy()
-    test_data = time_series.iloc[train_size:].copy()
+    last_date = datetime.strptime(bundle['last_date'], '%Y-%m-%d')
+    last_year, last_week = bundle['last_year'], bundle['last_week']
     
     # Sidebar
     with st.sidebar:
@@ -573,8 +681,12 @@ def main():
         st.markdown("---")
         st.markdown("### Map Filters")
         
-        # Year selection for map
-        available_years = sorted(df[cols['year']].unique())
+        # Year selection for map (from the dataset manifest when it can be built)
+        manifest = current_manifest()
+        if manifest is not None and manifest['years']:
+            available_years = manifest['years']
+        else:
+            available_years = sorted(df[cols['year']].unique())
         year_options = ['All Years'] + list(available_years)
         year_labels = {y: f"20{int(y)}" if y != 'All Years' else 'All Years' for y in year_options}
         selected_year = st.selectbox(
@@ -596,6 +708,7 @@ def main():
         st.markdown("• Negative Binomial")
         st.markdown("• Zero-Inflated NB")
         st.markdown("• Markov-Switching NB")
+        st.markdown("• Backtest-Weighted Ensemble")
     
     # Header
     st.markdown(render_header(
@@ -618,12 +731,20 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # Fit models
-    nb_model, nb_results = fit_negative_binomial(time_series)
-    zinb_model, zinb_results = fit_zinb(time_series)
-    markov_model, markov_results = fit_markov_switching_nb(time_series)
+    if bundle.get('dataset_version') != version:
+        st.markdown(f"""
+        <div class="warning-box">
+            Forecasts were precomputed on <strong>{bundle['generated_at']}</strong>. 
+            Entries saved since then will be included after the next batch run.
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Model outputs from the forecast bundle
+    models = bundle['models']
+    nb_results = models['NB']['available']
+    zinb_results = models['ZINB']['available']
+    markov_results = models['Markov']['available']
     
-    # Debug: Show model status
     models_status = []
     if nb_results: models_status.append("✓ NB")
     if zinb_results: models_status.append("✓ ZINB")
@@ -632,15 +753,43 @@ def main():
     if models_status:
         st.info(f"Models loaded: {' | '.join(models_status)}")
     
+    # Forecasts are precomputed for the longest horizon; shorter ones are prefixes
+    nb_pred = model_array(models, 'NB', 'forecast')
+    zinb_pred = model_array(models, 'ZINB', 'forecast')
+    markov_pred = model_array(models, 'Markov', 'forecast')
+    nb_pred = nb_pred[:forecast_weeks] if nb_pred is not None else None
+    zinb_pred = zinb_pred[:forecast_weeks] if zinb_pred is not None else None
+    markov_pred = markov_pred[:forecast_weeks] if markov_pred is not None else None
+    
+    ensemble = bundle['ensemble']
+    ensemble_pred = None
+    if ensemble['forecast'] is not None:
+        ensemble_pred = np.array(ensemble['forecast'], dtype=float)[:forecast_weeks]
+    
     # Predictions Section
     st.markdown(render_section_header("Next Week Forecast"), unsafe_allow_html=True)
     
+    recent_avg = float(bundle['recent_avg'])
+    
+    if ensemble_pred is not None:
+        ensemble_next = round(float(ensemble_pred[0]), 1)
+        risk_class = "high" if ensemble_next > recent_avg * 1.5 else "medium" if ensemble_next > recent_avg else "low"
+        risk_text = "HIGH RISK" if risk_class == "high" else "MODERATE" if risk_class == "medium" else "LOW RISK"
+        weight_text = " · ".join(f"{name} {w:.0%}" for name, w in zip(ensemble['members'], ensemble['weights']))
+        
+        st.markdown(f"""
+        <div class="pred-card {risk_class}">
+            <div class="pred-label">Ensemble Forecast</div>
+            <div class="pred-value">{ensemble_next}</div>
+            <div class="pred-sublabel">Predicted Cases - Week {next_week_num} · Weights: {weight_text}</div>
+            <div class="pred-badge">{risk_text}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
     col1, col2, col3 = st.columns(3)
-    recent_avg = float(time_series['cases'].tail(4).mean())
     
     with col1:
         if nb_results:
-            nb_pred = predict_future(nb_results, time_series, forecast_weeks, 'nb')
             nb_next = round(nb_pred[0], 1)
             risk_class = "high" if nb_next > recent_avg * 1.5 else "medium" if nb_next > recent_avg else "low"
             risk_text = "HIGH RISK" if risk_class == "high" else "MODERATE" if risk_class == "medium" else "LOW RISK"
@@ -658,7 +807,6 @@ def main():
     
     with col2:
         if zinb_results:
-            zinb_pred = predict_future(zinb_results, time_series, forecast_weeks, 'zinb')
             zinb_next = round(zinb_pred[0], 1)
             risk_class = "high" if zinb_next > recent_avg * 1.5 else "medium" if zinb_next > recent_avg else "low"
             risk_text = "HIGH RISK" if risk_class == "high" else "MODERATE" if risk_class == "medium" else "LOW RISK"
@@ -676,7 +824,6 @@ def main():
     
     with col3:
         if markov_results:
-            markov_pred = predict_future(markov_results, time_series, forecast_weeks, 'markov')
             markov_next = round(markov_pred[0], 1)
             risk_class = "high" if markov_next > recent_avg * 1.5 else "medium" if markov_next > recent_avg else "low"
             risk_text = "HIGH RISK" if risk_class == "high" else "MODERATE" if risk_class == "medium" else "LOW RISK"
@@ -696,11 +843,38 @@ def main():
     st.markdown(render_section_header(f"{forecast_weeks}-Week Forecast"), unsafe_allow_html=True)
     
     fig_forecast = go.Figure()
-    historical = time_series.tail(16)
+    historical = bundle['history']
+    
+    # Province endemic channel behind the series; the last history point is (last_year, last_week)
+    channels = load_endemic_channels(version, df, cols)
+    channel_year = last_year if last_year in channels.years else last_year % 100
+    positions = np.arange(len(historical) + forecast_weeks)
+    lower, center, upper = channels.around(channel_year, last_week, positions - (len(historical) - 1))
+    
+    fig_forecast.add_trace(go.Scatter(
+        x=positions, y=lower, mode='lines', line=dict(width=0),
+        hoverinfo='skip', showlegend=False
+    ))
+    fig_forecast.add_trace(go.Scatter(
+        x=positions,
+        y=upper,
+        mode='lines',
+        name='Endemic Channel (Q1–Q3)',
+        line=dict(color='rgba(16, 185, 129, 0.4)', width=1),
+        fill='tonexty',
+        fillcolor='rgba(16, 185, 129, 0.12)'
+    ))
+    fig_forecast.add_trace(go.Scatter(
+        x=positions,
+        y=center,
+        mode='lines',
+        name='Endemic Median',
+        line=dict(color='rgba(16, 185, 129, 0.8)', width=1, dash='dot')
+    ))
     
     fig_forecast.add_trace(go.Scatter(
         x=list(range(len(historical))),
-        y=historical['cases'],
+        y=historical,
         mode='lines+markers',
         name='Historical',
         line=dict(color='#1F2937', width=2),
@@ -737,6 +911,16 @@ def main():
             marker=dict(size=8, symbol='star')
         ))
     
+    if ensemble_pred is not None:
+        fig_forecast.add_trace(go.Scatter(
+            x=list(range(len(historical), len(historical) + forecast_weeks)),
+            y=ensemble_pred,
+            mode='lines+markers',
+            name='Ensemble Forecast',
+            line=dict(color='#EF4444', width=3),
+            marker=dict(size=9, symbol='circle')
+        ))
+    
     fig_forecast.update_layout(
         height=350,
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
@@ -751,6 +935,13 @@ def main():
     
     st.plotly_chart(fig_forecast, use_container_width=True)
     
+    if ensemble_pred is not None:
+        threshold = upper[len(historical):]
+        above = [i + 1 for i in range(forecast_weeks) if ensemble_pred[i] > threshold[i]]
+        if above:
+            st.warning(f"Ensemble forecast is above the epidemic threshold (endemic channel Q3) "
+                       f"in forecast week(s) {', '.join(map(str, above))}.")
+    
     # Forecast Table
     forecast_table = []
     for i in range(forecast_weeks):
@@ -761,7 +952,8 @@ def main():
             'Date': (last_date + timedelta(weeks=i+1)).strftime('%b %d, %Y'),
             'NB Prediction': round(nb_pred[i], 1) if nb_results else '-',
             'ZINB Prediction': round(zinb_pred[i], 1) if zinb_results else '-',
-            'Markov Prediction': round(markov_pred[i], 1) if markov_results else '-'
+            'Markov Prediction': round(markov_pred[i], 1) if markov_results else '-',
+            'Ensemble Prediction': round(float(ensemble_pred[i]), 1) if ensemble_pred is not None else '-'
         })
     
     st.dataframe(pd.DataFrame(forecast_table), use_container_width=True, hide_index=True)
@@ -771,55 +963,67 @@ def main():
     window_display = "" if selected_year == 'All Years' else f" (Last {weeks_window} Weeks)"
     st.markdown(render_section_header(f"Risk Map - {year_display}{window_display}"), unsafe_allow_html=True)
     
-    risk_df = calculate_municipality_risk(df, cols, selected_year, weeks_window)
+    # A table built before the latest Data Entry save is stale: compute live instead
+    risk_table = load_risk_table(version, artifact_version(RISK_ARTIFACT))
+    if risk_table is not None:
+        risk_df = select_risk(risk_table, selected_year, weeks_window)
+    else:
+        risk_df = calculate_municipality_risk(df, cols, selected_year, weeks_window)
     geometry_col = cols.get('geometry')
     
-    if GEOPANDAS_AVAILABLE and geometry_col:
+    if geometry_col:
         try:
-            muni_geo = df.drop_duplicates(subset=[cols['location']])[[cols['location'], geometry_col]].copy()
-            muni_geo.columns = ['municipality', 'geometry']
-            map_data = risk_df.merge(muni_geo, on='municipality', how='left')
-            
-            geometries = map_data['geometry'].apply(lambda x: wkt.loads(x) if pd.notna(x) else None)
-            gdf = gpd.GeoDataFrame(map_data, geometry=geometries, crs="EPSG:4326")
-            gdf['centroid'] = gdf.geometry.centroid
-            gdf['lon'] = gdf['centroid'].x
-            gdf['lat'] = gdf['centroid'].y
-            
-            fig_map = px.choropleth_mapbox(
-                gdf,
-                geojson=gdf.geometry.__geo_interface__,
-                locations=gdf.index,
-                color='risk_score',
-                color_continuous_scale='RdYlGn_r',
-                range_color=[0, 100],
-                mapbox_style='carto-positron',
-                center={'lat': gdf['lat'].mean(), 'lon': gdf['lon'].mean()},
-                zoom=8,
-                opacity=0.75,
-                hover_name='municipality',
-                hover_data={
-                    'risk_score': ':.1f',
-                    'total_cases': True,
-                    'avg_cases': ':.1f',
-                    'risk_level': True
-                },
-                labels={
-                    'risk_score': 'Risk Score',
-                    'total_cases': 'Total Cases',
-                    'avg_cases': 'Avg Cases/Week',
-                    'risk_level': 'Risk Level'
-                }
-            )
-            fig_map.update_layout(
-                height=450,
-                margin=dict(l=0, r=0, t=0, b=0),
-                coloraxis_colorbar=dict(
-                    title='Risk',
-                    tickvals=[0, 25, 50, 75, 100],
-                    ticktext=['Low', '', 'Mod', '', 'Critical']
+            # Geometry is parsed once per dataset version; only risk values change here
+            spatial_asset = load_spatial_asset(version, cols['location'], geometry_col)
+        except Exception as e:
+            spatial_asset = None
+            st.warning(f"Map error: {e}")
+    else:
+        spatial_asset = None
+    
+    if spatial_asset is not None:
+        map_layer = st.radio(
+            "Map layer", ['Risk Score', 'Risk Timeline', 'LISA Clusters', 'Gi* Hot Spots'],
+            horizontal=True, label_visibility='collapsed'
+        )
+        map_filters = {'version': version, 'risk_artifact': artifact_version(RISK_ARTIFACT),
+                       'year': selected_year, 'weeks_window': weeks_window, 'map_mode': map_mode()}
+        try:
+            if map_layer == 'Risk Score':
+                fig_map = cached_figure('risk_map', map_filters,
+                                        lambda: risk_score_map(risk_df, spatial_asset))
+            elif map_layer == 'Risk Timeline':
+                # Every frame comes from one pass over the municipality x week matrix
+                frames = compute_risk_frames(version, df, cols, weeks_window)
+                if selected_year != 'All Years':
+                    frames = frames[frames[cols['year']] == selected_year]
+                fig_map = cached_figure('risk_animation', map_filters,
+                                        lambda: risk_animation_map(frames, spatial_asset))
+                st.caption(
+                    f"Risk score over the trailing {weeks_window} weeks at each epi-week; "
+                    "press Play or drag the slider to step through the season"
+                )
+            else:
+                # Every week is precomputed; moving the slider only re-colours the map
+                clusters, global_i = compute_spatial_clusters(version, df, cols)
+                cluster_year = clusters[cols['year']].max() if selected_year == 'All Years' else selected_year
+                year_rows = clusters[clusters[cols['year']] == cluster_year]
+                week_options = sorted(year_rows[cols['week']].unique())
+                cluster_week = week_options[-1]
+                if len(week_options) > 1:
+                    cluster_week = st.select_slider("Epi-week", options=week_options, value=cluster_week)
+                
+                week_rows = year_rows[year_rows[cols['week']] == cluster_week]
+                week_global = global_i[(global_i[cols['year']] == cluster_year) &
+                                       (global_i[cols['week']] == cluster_week)].iloc[0]
+                color_col = 'lisa_cluster' if map_layer == 'LISA Clusters' else 'hotspot'
+                fig_map = cached_figure('cluster_map', {**map_filters, 'layer': color_col, 'week': cluster_week},
+                                        lambda: cluster_map(week_rows, spatial_asset, color_col))
+                st.caption(
+                    f"Week {cluster_week}, 20{int(cluster_year)} - Global Moran's I = {week_global['morans_i']:.3f} "
+                    f"(p = {week_global['p_value']:.3f}); {CONTIGUITY} contiguity, "
+                    f"{DEFAULT_PERMUTATIONS} permutations, p ≤ 0.05"
                 )
-            )
             st.plotly_chart(fig_map, use_container_width=True)
         except Exception as e:
             st.warning(f"Map error: {e}")
@@ -899,403 +1103,41 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
+    # Space-Time Clusters (Kulldorff scan, space-time permutation model)
+    st.markdown(render_section_header("Space-Time Clusters"), unsafe_allow_html=True)
+    
+    scan_clusters = load_scan_table(version, artifact_version(SCAN_ARTIFACT))
+    if scan_clusters is None and spatial_asset is not None:
+        if st.checkbox(f"Run space-time scan ({DEFAULT_REPLICATIONS} Monte Carlo replications)"):
+            with st.spinner("Scanning municipality and epi-week cylinders..."):
+                scan_clusters = compute_live_scan(version, df, cols)
+    
+    if scan_clusters is not None and len(scan_clusters) > 0:
+        scan_df = scan_clusters[['cluster', 'municipalities', 'start', 'end', 'weeks',
+                                 'observed', 'expected', 'relative_risk', 'llr', 'p_value']].copy()
+        scan_df[['expected', 'relative_risk', 'llr']] = scan_df[['expected', 'relative_risk', 'llr']].round(2)
+        scan_df['p_value'] = scan_df['p_value'].round(3)
+        scan_df.columns = ['Cluster', 'Municipalities', 'Start', 'End', 'Weeks',
+                           'Observed', 'Expected', 'Relative Risk', 'LLR', 'p-value']
+        st.dataframe(scan_df, use_container_width=True, hide_index=True)
+        st.caption(
+            f"Cylinders of up to {MAX_ZONE_FRACTION:.0%} of municipalities and {MAX_CLUSTER_WEEKS} consecutive epi-weeks. "
+            "Secondary clusters share no municipality with higher-ranked ones."
+        )
+    elif scan_clusters is not None:
+        st.info("No space-time cylinder has more cases than expected.")
+    
     # Model Performance
     st.markdown(render_section_header("Model Performance"), unsafe_allow_html=True)
-    
-    st.markdown(f"""
-    <div class="info-box">
-        <strong>Evaluation:</strong> Train/Test Split (80/20) — 
-        Training: {len(train_data)} weeks, Testing: {len(test_data)} weeks
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Train models for evaluation
-    nb_train_model, nb_train_results = fit_negative_binomial(train_data)
-    zinb_train_model, zinb_train_results = fit_zinb(train_data)
-    markov_train_model, markov_train_results = fit_markov_switching_nb(train_data)
-    
-    col1, col2, col3 = st.columns(3)
-    
-    nb_test_pred = None
-    zinb_test_pred = None
-    markov_test_pred = None
-    
-    with col1:
-        st.markdown("**Negative Binomial (NB)**")
-        if nb_train_results and len(test_data) > 0:
-            nb_test_pred = predict_with_model(nb_train_results, test_data, 'nb')
-            if nb_test_pred is not None:
-                nb_metrics = calculate_metrics(test_data['cases'].values, nb_test_pred)
-                st.markdown(f"""
-                <div class="perf-grid">
-                    <div class="perf-item"><div class="val">{nb_metrics['MAE']:.2f}</div><div class="lbl">MAE</div></div>
-                    <div class="perf-item"><div class="val">{nb_metrics['RMSE']:.2f}</div><div class="lbl">RMSE</div></div>
-                    <div class="perf-item"><div class="val">{nb_metrics['MASE']:.2f}</div><div class="lbl">MASE</div></div>
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.warning("Could not compute NB metrics")
-    
-    with col2:
-        st.markdown("**Zero-Inflated NB (ZINB)**")
-        if zinb_train_results and len(test_data) > 0:
-            zinb_test_pred = predict_with_model(zinb_train_results, test_data, 'zinb')
-            if zinb_test_pred is not None:
-                zinb_metrics = calculate_metrics(test_data['cases'].values, zinb_test_pred)
-                st.markdown(f"""
-                <div class="perf-grid">
-                    <div class="perf-item"><div class="val">{zinb_metrics['MAE']:.2f}</div><div class="lbl">MAE</div></div>
-                    <div class="perf-item"><div class="val">{zinb_metrics['RMSE']:.2f}</div><div class="lbl">RMSE</div></div>
-                    <div class="perf-item"><div class="val">{zinb_metrics['MASE']:.2f}</div><div class="lbl">MASE</div></div>
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.warning("Could not compute ZINB metrics")
-    
-    with col3:
-        st.markdown("**Markov-Switching NB**")
-        if markov_train_results and len(test_data) > 0:
-            markov_test_pred = predict_with_model(markov_train_results, test_data, 'markov')
-            if markov_test_pred is not None:
-                markov_metrics = calculate_metrics(test_data['cases'].values, markov_test_pred)
-                st.markdown(f"""
-                <div class="perf-grid">
-                    <div class="perf-item"><div class="val">{markov_metrics['MAE']:.2f}</div><div class="lbl">MAE</div></div>
-                    <div class="perf-item"><div class="val">{markov_metrics['RMSE']:.2f}</div><div class="lbl">RMSE</div></div>
-                    <div class="perf-item"><div class="val">{markov_metrics['MASE']:.2f}</div><div class="lbl">MASE</div></div>
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.warning("Could not compute Markov metrics")
+    lazy_section("Test-set accuracy", "pred_performance", render_model_performance, bundle)
     
     # Goodness of Fit Statistics (AIC/BIC)
     st.markdown(render_section_header("Goodness of Fit Statistics (Model Selection)"), unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class="info-box">
-        <strong>Model Selection Criteria:</strong> AIC, BIC, Log-likelihood, and Deviance assess model fit.
-        <strong>Lower AIC/BIC/Deviance and higher Log-likelihood indicate better models.</strong>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Calculate AIC/BIC for all models
-    aic_bic_data = []
-    n_train = len(train_data)
-    
-    if nb_train_results:
-        nb_aic_bic = calculate_aic_bic(nb_train_results, n_train, 'nb')
-        aic_bic_data.append({
-            'Model': 'Negative Binomial (NB)',
-            'AIC': round(nb_aic_bic['AIC'], 2),
-            'BIC': round(nb_aic_bic['BIC'], 2),
-            'Log-likelihood': round(nb_aic_bic['Log-likelihood'], 2),
-            'Deviance': round(nb_aic_bic['Deviance'], 2),
-            'Parameters': len(nb_train_results.params)
-        })
-    
-    if zinb_train_results:
-        zinb_aic_bic = calculate_aic_bic(zinb_train_results, n_train, 'zinb')
-        aic_bic_data.append({
-            'Model': 'Zero-Inflated NB (ZINB)',
-            'AIC': round(zinb_aic_bic['AIC'], 2),
-            'BIC': round(zinb_aic_bic['BIC'], 2),
-            'Log-likelihood': round(zinb_aic_bic['Log-likelihood'], 2),
-            'Deviance': round(zinb_aic_bic['Deviance'], 2),
-            'Parameters': len(zinb_train_results.params)
-        })
-    
-    if markov_train_results:
-        markov_aic_bic = calculate_aic_bic(markov_train_results, n_train, 'markov')
-        aic_bic_data.append({
-            'Model': 'Markov-Switching NB',
-            'AIC': round(markov_aic_bic['AIC'], 2),
-            'BIC': round(markov_aic_bic['BIC'], 2),
-            'Log-likelihood': round(markov_aic_bic['Log-likelihood'], 2),
-            'Deviance': round(markov_aic_bic['Deviance'], 2),
-            'Parameters': len(markov_train_results.params)
-        })
-    
-    if aic_bic_data:
-        aic_bic_df = pd.DataFrame(aic_bic_data)
-        
-        # Identify best models
-        if not aic_bic_df['AIC'].isna().all():
-            best_aic_idx = aic_bic_df['AIC'].idxmin()
-            aic_bic_df['Best AIC'] = ''
-            aic_bic_df.loc[best_aic_idx, 'Best AIC'] = '✓ Best'
-        
-        if not aic_bic_df['BIC'].isna().all():
-            best_bic_idx = aic_bic_df['BIC'].idxmin()
-            aic_bic_df['Best BIC'] = ''
-            aic_bic_df.loc[best_bic_idx, 'Best BIC'] = '✓ Best'
-        
-        # Style the dataframe
-        def highlight_best(row):
-            if '✓ Best' in str(row.get('Best AIC', '')) or '✓ Best' in str(row.get('Best BIC', '')):
-                return ['background-color: #D1FAE5'] * len(row)
-            else:
-                return ['background-color: #F9FAFB'] * len(row)
-        
-        styled_aic_bic = aic_bic_df.style.apply(highlight_best, axis=1)
-        st.dataframe(styled_aic_bic, use_container_width=True, hide_index=True)
-        
-        # Interpretation
-        st.markdown("**Model Selection Recommendation:**")
-        
-        if not aic_bic_df['AIC'].isna().all() and not aic_bic_df['BIC'].isna().all():
-            best_aic_model = aic_bic_df.loc[best_aic_idx, 'Model']
-            best_bic_model = aic_bic_df.loc[best_bic_idx, 'Model']
-            
-            if best_aic_model == best_bic_model:
-                st.markdown(f"""
-                <div style="padding: 1rem; background: #D1FAE5; border-radius: 8px; border-left: 4px solid #10B981;">
-                    <strong>✓ Recommended Model: {best_aic_model}</strong><br>
-                    Both AIC and BIC criteria agree that this model provides the best balance between 
-                    goodness of fit and model complexity.
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div style="padding: 1rem; background: #FEF3C7; border-radius: 8px; border-left: 4px solid #F59E0B;">
-                    <strong>⚠ Mixed Results:</strong><br>
-                    • AIC prefers: <strong>{best_aic_model}</strong> (more complex model may be justified)<br>
-                    • BIC prefers: <strong>{best_bic_model}</strong> (simpler model preferred)<br>
-                    Consider both criteria along with domain knowledge for final model selection.
-                </div>
-                """, unsafe_allow_html=True)
-        
-        # Visual comparison
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig_aic = px.bar(
-                aic_bic_df,
-                x='Model',
-                y='AIC',
-                title='AIC Comparison (Lower is Better)',
-                color='AIC',
-                color_continuous_scale='RdYlGn_r',
-                text='AIC'
-            )
-            fig_aic.update_traces(texttemplate='%{text:.2f}', textposition='outside')
-            fig_aic.update_layout(
-                height=300,
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                showlegend=False,
-                xaxis_title='',
-                yaxis_title='AIC Value'
-            )
-            st.plotly_chart(fig_aic, use_container_width=True)
-        
-        with col2:
-            fig_bic = px.bar(
-                aic_bic_df,
-                x='Model',
-                y='BIC',
-                title='BIC Comparison (Lower is Better)',
-                color='BIC',
-                color_continuous_scale='RdYlGn_r',
-                text='BIC'
-            )
-            fig_bic.update_traces(texttemplate='%{text:.2f}', textposition='outside')
-            fig_bic.update_layout(
-                height=300,
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                showlegend=False,
-                xaxis_title='',
-                yaxis_title='BIC Value'
-            )
-            st.plotly_chart(fig_bic, use_container_width=True)
-    else:
-        st.warning("No models available for AIC/BIC comparison")
-    
-    # Actual vs Predicted Chart
-    if nb_test_pred is not None or zinb_test_pred is not None or markov_test_pred is not None:
-        st.markdown("**Actual vs Predicted (Test Set)**")
-        
-        fig_compare = go.Figure()
-        fig_compare.add_trace(go.Scatter(
-            y=test_data['cases'].values,
-            mode='lines+markers',
-            name='Actual',
-            line=dict(color='#1F2937', width=2)
-        ))
-        
-        if nb_test_pred is not None:
-            fig_compare.add_trace(go.Scatter(
-                y=nb_test_pred,
-                mode='lines+markers',
-                name='NB Predicted',
-                line=dict(color='#667eea', width=2, dash='dash')
-            ))
-        
-        if zinb_test_pred is not None:
-            fig_compare.add_trace(go.Scatter(
-                y=zinb_test_pred,
-                mode='lines+markers',
-                name='ZINB Predicted',
-                line=dict(color='#10B981', width=2, dash='dot')
-            ))
-        
-        if markov_test_pred is not None:
-            fig_compare.add_trace(go.Scatter(
-                y=markov_test_pred,
-                mode='lines+markers',
-                name='Markov Predicted',
-                line=dict(color='#F59E0B', width=2, dash='dashdot')
-            ))
-        
-        fig_compare.update_layout(
-            height=300,
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            xaxis_title="Test Period",
-            yaxis_title="Cases",
-            margin=dict(t=40)
-        )
-        st.plotly_chart(fig_compare, use_container_width=True)
+    lazy_section("Model selection and test-set predictions", "pred_goodness_of_fit", render_goodness_of_fit, bundle)
     
     # Significant Factors Section
     st.markdown(render_section_header("Significant Factors Analysis"), unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class="info-box">
-        Analysis of factors that significantly influence dengue case counts. 
-        Factors with <strong>p-value < 0.05</strong> are considered statistically significant.
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Fit model with environmental variables
-    nb_env_results, feature_names = fit_nb_with_env(full_time_series)
-    
-    if nb_env_results is not None and feature_names is not None:
-        # Extract coefficients and p-values
-        try:
-            coefs = nb_env_results.params
-            pvalues = nb_env_results.pvalues
-            conf_int = nb_env_results.conf_int()
-            
-            # Create significance table
-            sig_data = []
-            for i, name in enumerate(feature_names):
-                # Safely extract values
-                if i >= len(coefs):
-                    continue
-                    
-                coef = coefs[i]
-                pval = pvalues[i] if i < len(pvalues) else 1.0
-                
-                # Handle confidence intervals - could be DataFrame or array
-                try:
-                    if hasattr(conf_int, 'iloc'):
-                        # DataFrame format
-                        ci_low = conf_int.iloc[i, 0]
-                        ci_high = conf_int.iloc[i, 1]
-                    else:
-                        # Array format
-                        ci_low = conf_int[i, 0]
-                        ci_high = conf_int[i, 1]
-                except (IndexError, KeyError):
-                    ci_low = coef - 1.96 * nb_env_results.bse[i] if i < len(nb_env_results.bse) else coef
-                    ci_high = coef + 1.96 * nb_env_results.bse[i] if i < len(nb_env_results.bse) else coef
-                
-                # Determine significance
-                if pval < 0.001:
-                    sig_level = '***'
-                    sig_text = 'Highly Significant'
-                elif pval < 0.01:
-                    sig_level = '**'
-                    sig_text = 'Very Significant'
-                elif pval < 0.05:
-                    sig_level = '*'
-                    sig_text = 'Significant'
-                else:
-                    sig_level = ''
-                    sig_text = 'Not Significant'
-                
-                # Effect direction
-                if name != 'Intercept':
-                    if coef > 0:
-                        effect = '↑ Increases cases'
-                    else:
-                        effect = '↓ Decreases cases'
-                else:
-                    effect = '-'
-                
-                sig_data.append({
-                    'Factor': name,
-                    'Coefficient': round(float(coef), 4),
-                    'p-value': f"{float(pval):.4f}",
-                    'Significance': f"{sig_text} {sig_level}",
-                    'Effect': effect,
-                    '95% CI': f"[{float(ci_low):.3f}, {float(ci_high):.3f}]"
-                })
-            
-            sig_df = pd.DataFrame(sig_data)
-            
-            # Display table
-            def highlight_significance(row):
-                if '***' in row['Significance'] or '**' in row['Significance']:
-                    return ['background-color: #D1FAE5'] * len(row)
-                elif '*' in row['Significance']:
-                    return ['background-color: #FEF3C7'] * len(row)
-                else:
-                    return ['background-color: #F9FAFB'] * len(row)
-            
-            styled_sig = sig_df.style.apply(highlight_significance, axis=1)
-            st.dataframe(styled_sig, use_container_width=True, hide_index=True)
-            
-            # Visual representation
-            st.markdown("**Factor Importance (Absolute Coefficient)**")
-            
-            factor_importance = sig_df[sig_df['Factor'] != 'Intercept'].copy()
-            factor_importance['Abs_Coef'] = factor_importance['Coefficient'].abs()
-            factor_importance = factor_importance.sort_values('Abs_Coef', ascending=True)
-            
-            fig_importance = px.bar(
-                factor_importance,
-                x='Abs_Coef',
-                y='Factor',
-                orientation='h',
-                color='Coefficient',
-                color_continuous_scale='RdYlGn_r',
-                labels={'Abs_Coef': 'Absolute Coefficient', 'Factor': ''}
-            )
-            fig_importance.update_layout(
-                height=250,
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                showlegend=False,
-                coloraxis_showscale=True,
-                coloraxis_colorbar=dict(title='Effect')
-            )
-            st.plotly_chart(fig_importance, use_container_width=True)
-            
-            # Key findings
-            st.markdown("**Key Findings:**")
-            
-            significant_factors = [row for _, row in sig_df.iterrows() 
-                                  if '*' in row['Significance'] and row['Factor'] != 'Intercept']
-            
-            if significant_factors:
-                for factor in significant_factors:
-                    direction = "increases" if factor['Coefficient'] > 0 else "decreases"
-                    st.markdown(f"""
-                    <div style="padding: 0.5rem; margin: 0.25rem 0; background: #F0FDF4; border-radius: 8px; border-left: 4px solid #10B981;">
-                        <strong>{factor['Factor']}</strong> significantly {direction} dengue cases 
-                        <span style="color: #6B7280;">(p = {factor['p-value']}, coefficient = {factor['Coefficient']:.4f})</span>
-                    </div>
-                    """, unsafe_allow_html=True)
-            else:
-                st.info("No factors reached statistical significance at p < 0.05 level.")
-                
-        except Exception as e:
-            st.warning(f"Could not extract model coefficients: {e}")
-    else:
-        st.warning("Could not fit model with environmental variables for significance analysis.")
+    lazy_section("Coefficients and spillover", "pred_significance", render_significance, bundle)
     
     # Methodology
     with st.expander("Methodology"):
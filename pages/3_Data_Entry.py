@@ -5,6 +5,7 @@ Dengue Surveillance System - Zamboanga Sibugay
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sys
 sys.path.append('..')
 
@@ -13,6 +14,12 @@ try:
 except:
     from styles import SHARED_CSS, render_header, render_section_header, render_footer, render_sidebar_header, render_info_box, render_success_box, render_warning_box
 
+from engine.bitmap import FrameView
+from engine.data import dataset_version
+from engine.manifest import current_manifest, update_manifest
+from explorer import data_explorer
+from engine.geometry import SHAPELY_AVAILABLE, update_geometry_store
+
 # Page configuration
 st.set_page_config(
     page_title="Data Entry - Dengue Surveillance",
@@ -29,6 +36,12 @@ DATA_FILE = 'sibugay_dengue_cases_dataset.csv'
 def load_data():
     return pd.read_csv(DATA_FILE)
 
+@st.cache_resource(show_spinner=False, max_entries=1)
+def load_record_view(version):
+    """All records as a shared read-only view for the explorer"""
+    frame = load_data()
+    return FrameView(frame, np.arange(len(frame)))
+
 df = load_data()
 
 # Sidebar
@@ -41,7 +54,11 @@ with st.sidebar:
     - Save to database
     """)
     st.markdown("---")
-    st.markdown(f"**Total Records:** {len(df):,}")
+    manifest = current_manifest(DATA_FILE)
+    if manifest is not None:
+        st.markdown(f"**Total Records:** {manifest['records']:,}")
+        if manifest['last_year'] is not None:
+            st.markdown(f"**Latest Week:** 20{manifest['last_year']:02d}-W{manifest['last_week']:02d}")
 
 # Header
 st.markdown(render_header(
@@ -178,7 +195,13 @@ if 'new_entries' in st.session_state and st.session_state['new_entries']:
             # Ensure columns are in correct order matching the CSV
             csv_columns = list(df.columns)
             save_df = pending_df[csv_columns]
+            previous_version = dataset_version(DATA_FILE)
             save_df.to_csv(DATA_FILE, mode='a', header=False, index=False)
+            # Fold the new rows into the summary manifest
+            update_manifest(save_df, previous_version, dataset_version(DATA_FILE))
+            if SHAPELY_AVAILABLE:
+                # Carry the WKB boundaries over to the new dataset version
+                update_geometry_store(save_df, previous_version, dataset_version(DATA_FILE))
             st.success(f"{len(pending_df)} entries saved!")
             st.session_state['new_entries'] = []
             st.cache_data.clear()
@@ -200,18 +223,23 @@ else:
 # Recent Data
 st.markdown(render_section_header("Recent Records"), unsafe_allow_html=True)
 
-# Show last entries
-recent_df = df.tail(15)[['MUNICIPALITY', 'YEAR_2', 'MORBIDITY_WEEK', 'CASES', 'T2M_MAX', 'RH2M']].copy()
-recent_df.columns = ['Municipality', 'Year', 'Week', 'Cases', 'Max Temp', 'Humidity']
-
-st.dataframe(
-    recent_df.style.format({
-        'Cases': '{:.0f}',
-        'Max Temp': '{:.1f}°C',
-        'Humidity': '{:.1f}%'
-    }),
-    use_container_width=True,
-    hide_index=True
+# Latest entries first; only the current page is sent to the browser
+version = dataset_version(DATA_FILE)
+st.fragment(data_explorer)(
+    load_record_view(version),
+    ['MUNICIPALITY', 'YEAR_2', 'MORBIDITY_WEEK', 'CASES', 'T2M_MAX', 'RH2M'],
+    key="entry_explorer",
+    signature=version,
+    labels={
+        'MUNICIPALITY': 'Municipality',
+        'YEAR_2': 'Year',
+        'MORBIDITY_WEEK': 'Week',
+        'CASES': 'Cases',
+        'T2M_MAX': 'Max Temp',
+        'RH2M': 'Humidity'
+    },
+    formats={'CASES': '%.0f', 'T2M_MAX': '%.1f°C', 'RH2M': '%.1f%%'},
+    descending=True
 )
 
 # Footer
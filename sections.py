@@ -0,0 +1,31 @@
+"""
+Lazy Page Sections
+Dengue Surveillance System - Zamboanga Sibugay
+Tabs and expanders whose bodies only run while they are visible
+
+Both rerun the script when the user switches tab or opens a section, and
+their containers report .open, so a page can skip the computation and
+serialization of everything the user is not looking at. Section bodies
+are fragments: widgets inside them rerun only the section.
+"""
+
+import streamlit as st
+
+
+def lazy_tabs(labels, key):
+    """st.tabs whose containers report .open (the active tab)"""
+    return st.tabs(labels, key=key, on_change='rerun')
+
+
+def render_open(container, render, *args):
+    """Run render(*args) as a fragment inside container if it is open"""
+    if container.open:
+        with container:
+            st.fragment(render)(*args)
+
+
+def lazy_section(label, key, render, *args, expanded=False):
+    """Expander that runs render(*args) only while it is open"""
+    section = st.expander(label, expanded=expanded, key=key, on_change='rerun')
+    render_open(section, render, *args)
+    return section
@@ -0,0 +1,141 @@
+"""
+Shared Spatial Asset
+Dengue Surveillance System - Zamboanga Sibugay
+Municipality geometry cached once per dataset version for every map page
+
+Map mode (DENGUE_MAP_MODE environment variable):
+    tiles   - carto-positron basemap tiles from the internet (default)
+    cached  - the same basemap from the local tile cache (python -m engine tiles)
+    offline - no basemap: plain projection with the province outline
+"""
+
+import os
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from engine.geometry import SHAPELY_AVAILABLE, build_spatial_asset, load_municipality_geometries
+from engine.tiles import CACHED_TILE_URL, tile_cache_available
+
+MAP_MODES = ['tiles', 'cached', 'offline']
+
+
+@st.cache_resource(show_spinner=False)
+def load_spatial_asset(version, location_col='MUNICIPALITY', geometry_col='geometry'):
+    """
+    Parsed boundaries, GeoJSON levels and centroids (None without shapely)
+
+    Cached as a resource: one read-only instance per dataset version is
+    shared by every page and session, and only the values drawn on top of
+    it change between interactions.
+    """
+    if not SHAPELY_AVAILABLE or version is None:
+        return None
+    names, geometries = load_municipality_geometries(version, location_col, geometry_col)
+    return build_spatial_asset(names, geometries, version)
+
+
+def map_mode():
+    """Configured map mode; 'cached' falls back to 'offline' without a tile cache"""
+    mode = os.environ.get('DENGUE_MAP_MODE', 'tiles').strip().lower()
+    if mode not in MAP_MODES:
+        mode = 'tiles'
+    if mode == 'cached' and not tile_cache_available():
+        mode = 'offline'
+    return mode
+
+
+def choropleth_map(frame, spatial_asset, zoom, opacity=0.75, **kwargs):
+    """
+    Municipality choropleth in the configured map mode
+
+    kwargs go to plotly express (locations, color, hover_data, ...);
+    features are matched on properties.MUNICIPALITY.
+    """
+    mode = map_mode()
+    geojson = spatial_asset.geojson(zoom)
+
+    if mode == 'offline':
+        fig = px.choropleth(frame, geojson=geojson, featureidkey='properties.MUNICIPALITY', **kwargs)
+        fig.update_traces(marker_opacity=opacity, marker_line_color='#FFFFFF', marker_line_width=0.5)
+        lon, lat = spatial_asset.outline()
+        fig.add_trace(go.Scattergeo(
+            lon=lon, lat=lat, mode='lines',
+            line=dict(color='#1F2937', width=1.5),
+            hoverinfo='skip', showlegend=False
+        ))
+        fig.update_geos(fitbounds='geojson', visible=False, projection_type='mercator')
+        return fig
+
+    fig = px.choropleth_mapbox(
+        frame,
+        geojson=geojson,
+        featureidkey='properties.MUNICIPALITY',
+        mapbox_style='carto-positron',
+        center=spatial_asset.center,
+        zoom=zoom,
+        opacity=opacity,
+        **kwargs
+    )
+    if mode == 'cached':
+        fig.update_layout(
+            mapbox_style='white-bg',
+            mapbox_layers=[{'below': 'traces', 'sourcetype': 'raster', 'source': [CACHED_TILE_URL]}]
+        )
+    return fig
+
+
+def animated_choropleth_map(frame, spatial_asset, zoom, animation_frame, locations, color,
+                            customdata=(), hovertemplate=None, frame_prefix='', opacity=0.75, **kwargs):
+    """
+    Choropleth with one Plotly animation frame per value of `animation_frame`
+
+    Boundaries go to the browser once with the base trace; each frame only
+    carries its colour values and customdata, so the play button and slider
+    step through weeks client-side without a rerun per frame. Frames keep
+    the order in which they first appear in `frame`.
+    """
+    labels = list(pd.unique(frame[animation_frame]))
+    first = frame[frame[animation_frame] == labels[0]]
+    names = first[locations].to_numpy()
+    customdata = list(customdata)
+
+    fig = choropleth_map(first, spatial_asset, zoom, opacity, locations=locations, color=color, **kwargs)
+    fig.data[0].update(customdata=first[customdata].to_numpy(), hovertemplate=hovertemplate)
+
+    grid = frame.set_index([animation_frame, locations]).reindex(pd.MultiIndex.from_product([labels, names]))
+    z = grid[color].to_numpy().reshape(len(labels), len(names))
+    extra = grid[customdata].to_numpy().reshape(len(labels), len(names), len(customdata))
+    fig.frames = [
+        go.Frame(name=str(label), data=[{'type': fig.data[0].type, 'z': z[i], 'customdata': extra[i]}],
+                 traces=[0])
+        for i, label in enumerate(labels)
+    ]
+
+    def animate(duration):
+        return {'frame': {'duration': duration, 'redraw': True}, 'transition': {'duration': 0},
+                'mode': 'immediate', 'fromcurrent': True}
+
+    fig.update_layout(
+        sliders=[{
+            'active': 0,
+            'currentvalue': {'prefix': frame_prefix},
+            'pad': {'t': 10, 'b': 10},
+            'steps': [{'label': str(label), 'method': 'animate', 'args': [[str(label)], animate(0)]}
+                      for label in labels],
+        }],
+        updatemenus=[{
+            'type': 'buttons',
+            'direction': 'left',
+            'showactive': False,
+            'x': 0, 'y': 0, 'xanchor': 'left', 'yanchor': 'top',
+            'pad': {'t': 60, 'r': 10},
+            'buttons': [
+                {'label': 'Play', 'method': 'animate', 'args': [None, animate(250)]},
+                {'label': 'Pause', 'method': 'animate', 'args': [[None], animate(0)]},
+            ],
+        }]
+    )
+    return fig
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MUNICIPALITIES = ['Alicia', 'Diplahan', 'Imelda', 'Ipil']
+
+
+@pytest.fixture
+def cases_frame():
+    """Four municipalities over three 52-week years, with climate columns"""
+    rng = np.random.default_rng(7)
+    rows = []
+    for year in (18, 19, 20):
+        for week in range(1, 53):
+            season = 4 + 3 * np.sin(2 * np.pi * (week - 20) / 52)
+            for i, name in enumerate(MUNICIPALITIES):
+                rows.append({
+                    'MUNICIPALITY': name,
+                    'YEAR_2': year,
+                    'MORBIDITY_WEEK': week,
+                    'CASES': int(rng.poisson(season + i)),
+                    'T2M_MAX': 31 + np.sin(2 * np.pi * week / 52) + rng.normal(0, 0.5),
+                    'T2M_MIN': 23 + rng.normal(0, 0.5),
+                    'RH2M': 80 + rng.normal(0, 3),
+                    'PRECTOTCORR': abs(rng.normal(5, 3)),
+                    'QV2M': 18 + rng.normal(0, 1),
+                    'GWETTOP': 0.7 + rng.normal(0, 0.05),
+                })
+    return pd.DataFrame(rows)
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from analysis_module import CASE_STATISTICS, describe_cases
+
+
+def _pandas_reference(values):
+    series = pd.Series(values, dtype=float).dropna()
+    return [series.count(), series.sum(), series.mean(), series.median(), series.std(),
+            series.min(), series.max(), series.quantile(0.25), series.quantile(0.75),
+            series.std() / series.mean() * 100]
+
+
+def test_describe_cases_matches_pandas_per_group():
+    rng = np.random.default_rng(7)
+    values = rng.poisson(6, 300).astype(float)
+    values[rng.choice(300, 20, replace=False)] = np.nan
+    codes = rng.integers(-1, 4, 300)
+    codes[codes == 2] = 3      # group 2 is empty
+
+    stats = describe_cases(values, codes, n_groups=4)
+    assert stats.shape == (4, len(CASE_STATISTICS))
+    for group in (0, 1, 3):
+        np.testing.assert_allclose(stats[group], _pandas_reference(values[codes == group]))
+    assert stats[2, 0] == 0
+    assert np.isnan(stats[2, 2:]).all()
+
+
+def test_describe_cases_overall_and_single_value():
+    values = np.array([3.0, np.nan, 1.0, 8.0, 4.0])
+    np.testing.assert_allclose(describe_cases(values)[0], _pandas_reference(values))
+    single = describe_cases([5.0])[0]
+    assert single[CASE_STATISTICS.index('median')] == 5.0
+    assert np.isnan(single[CASE_STATISTICS.index('std')])
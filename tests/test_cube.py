@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.cube import AggregateCube, RollupPlan
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(5)
+    n = 400
+    df = pd.DataFrame({
+        'MUNICIPALITY': rng.choice(['Ipil', 'Imelda', 'Titay'], n),
+        'YEAR_2': rng.choice([19, 20, 21], n).astype(float),
+        'QUARTER': rng.choice([1, 2, 3, 4], n).astype(float),
+        'MONTH': rng.integers(1, 13, n).astype(float),
+        'MORBIDITY_WEEK': rng.integers(1, 53, n).astype(float),
+        'CASES': rng.poisson(4, n).astype(float),
+        'T2M_MAX': rng.normal(31, 1, n),
+    })
+    for col in ['MUNICIPALITY', 'YEAR_2', 'QUARTER', 'MORBIDITY_WEEK', 'CASES', 'T2M_MAX']:
+        df.loc[rng.random(n) < 0.05, col] = np.nan
+    return df
+
+
+GROUPINGS = [('YEAR_2', 'MORBIDITY_WEEK'), ('YEAR_2', 'QUARTER'), ('YEAR_2',), ('MUNICIPALITY',), ('MONTH',)]
+
+
+def _expected(df, by):
+    grouped = df.dropna(subset=['CASES']).groupby(list(by))
+    return pd.DataFrame({
+        'CASES': grouped['CASES'].sum(),
+        'records': grouped['CASES'].size(),
+        'CASES_mean': grouped['CASES'].mean(),
+        'CASES_std': grouped['CASES'].std(),
+        'T2M_MAX': grouped['T2M_MAX'].mean(),
+    })
+
+
+def _compare(result, expected):
+    result = result[expected.columns]
+    if isinstance(expected.index, pd.MultiIndex):
+        assert list(result.index) == list(expected.index)
+    else:
+        np.testing.assert_array_equal(result.index, expected.index)
+    np.testing.assert_allclose(result.to_numpy(dtype=float), expected.to_numpy(dtype=float), equal_nan=True)
+
+
+def test_rollups_match_groupby_with_missing_keys(frame):
+    cube = AggregateCube.from_frame(frame)
+    plan = RollupPlan(cube).request(*GROUPINGS)
+    for by in GROUPINGS:
+        _compare(cube.rollup(by), _expected(frame, by))
+        _compare(plan.rollup(by), _expected(frame, by))
+
+
+def test_select_and_totals_match_filtered_frame(frame):
+    cube = AggregateCube.from_frame(frame)
+    view = cube.select(MUNICIPALITY=['Ipil', 'Titay'], YEAR_2=range(19, 21))
+    rows = frame[frame['MUNICIPALITY'].isin(['Ipil', 'Titay']) & frame['YEAR_2'].isin(range(19, 21))]
+    assert view.totals()['CASES'] == rows['CASES'].sum()
+    assert view.totals()['records'] == rows['CASES'].notna().sum()
+    _compare(view.rollup('MORBIDITY_WEEK'), _expected(rows, ('MORBIDITY_WEEK',)))
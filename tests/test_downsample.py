@@ -0,0 +1,45 @@
+import numpy as np
+
+from engine.downsample import lttb_indices, minmax_indices
+
+
+def _naive_lttb(x, y, max_points):
+    """Point-by-point LTTB with the same bucket edges"""
+    n = len(y)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    buckets = list(zip(edges[:-1], edges[1:]))
+    selected = [0]
+    for i, (start, stop) in enumerate(buckets):
+        if i + 1 < len(buckets):
+            next_start, next_stop = buckets[i + 1]
+            cx, cy = np.mean(x[next_start:next_stop]), np.mean(y[next_start:next_stop])
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[selected[-1]], y[selected[-1]]
+        best, best_area = start, -1.0
+        for j in range(start, stop):
+            area = abs((ax - cx) * (y[j] - ay) - (ax - x[j]) * (cy - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+    return np.array(selected + [n - 1])
+
+
+def test_lttb_matches_naive_loop():
+    rng = np.random.default_rng(5)
+    x = np.arange(500.0)
+    y = np.cumsum(rng.normal(size=500))
+    for budget in (3, 10, 77, 250):
+        np.testing.assert_array_equal(lttb_indices(x, y, budget), _naive_lttb(x, y, budget))
+
+
+def test_lttb_keeps_everything_within_budget():
+    np.testing.assert_array_equal(lttb_indices(np.arange(5.0), np.ones(5), 10), np.arange(5))
+
+
+def test_minmax_keeps_extremes():
+    y = np.random.default_rng(6).normal(size=400)
+    kept = minmax_indices(y, 40)
+    assert len(kept) <= 40 + 2
+    assert {0, 399, int(np.argmax(y)), int(np.argmin(y))} <= set(kept.tolist())
+    assert np.all(np.diff(kept) > 0)
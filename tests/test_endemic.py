@@ -0,0 +1,72 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from engine.ccf import ALL_MUNICIPALITIES
+from engine.endemic import EndemicChannels, nan_quantiles
+from engine.seasonal import SEASON_WEEKS
+
+
+def _channels(long_years=()):
+    rng = np.random.default_rng(3)
+    years = list(range(15, 23))
+    cases = rng.poisson(5, (len(years), SEASON_WEEKS, 2)).astype(float)
+    return EndemicChannels(['Ipil', ALL_MUNICIPALITIES], years, cases, long_years=long_years)
+
+
+def _naive_around(channels, year, week, offsets):
+    """Step one epi-week at a time, with 53 weeks in long years"""
+    def length(y):
+        return SEASON_WEEKS + (y in channels.long_years)
+
+    result = []
+    for offset in offsets:
+        y, w = year, week
+        for _ in range(abs(offset)):
+            if offset > 0:
+                y, w = (y, w + 1) if w < length(y) else (y + 1, 1)
+            else:
+                y, w = (y, w - 1) if w > 1 else (y - 1, length(y - 1))
+        index = y - channels.years[0]
+        if 0 <= index <= len(channels.years):
+            result.append(channels.bounds[:, index, min(w, SEASON_WEEKS) - 1, -1])
+        else:
+            result.append(np.full(3, np.nan))
+    return np.array(result).T
+
+
+def test_nan_quantiles_matches_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(4, 6, 7))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[0, 0] = np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        expected = np.nanpercentile(values, [25, 50, 75], axis=-1)
+    np.testing.assert_allclose(nan_quantiles(values, [0.25, 0.5, 0.75]), expected)
+
+
+def test_around_matches_week_by_week_walk():
+    channels = _channels()
+    offsets = np.arange(-70, 60)
+    np.testing.assert_array_equal(channels.around(20, 10, offsets), _naive_around(channels, 20, 10, offsets))
+
+
+def test_around_handles_53_week_years():
+    channels = _channels(long_years=[20])
+    offsets = np.arange(-20, 20)
+    bounds = channels.around(20, 53, offsets)
+    np.testing.assert_array_equal(bounds, _naive_around(channels, 20, 53, offsets))
+    # Week 53 shares week 52's channel; the next week is week 1 of the next season
+    np.testing.assert_array_equal(bounds[:, 20], channels.bounds[:, 20 - 15, SEASON_WEEKS - 1, -1])
+    np.testing.assert_array_equal(bounds[:, 21], channels.bounds[:, 21 - 15, 0, -1])
+
+
+def test_from_frame_records_long_years():
+    rows = [(year, week) for year in (19, 20) for week in range(1, 53)] + [(20, 53)]
+    df = pd.DataFrame(rows, columns=['YEAR_2', 'MORBIDITY_WEEK'])
+    df['MUNICIPALITY'] = 'Ipil'
+    df['CASES'] = 1
+    cols = {'location': 'MUNICIPALITY', 'cases': 'CASES', 'year': 'YEAR_2', 'week': 'MORBIDITY_WEEK'}
+    assert EndemicChannels.from_frame(df, cols).long_years == {20}
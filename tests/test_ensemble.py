@@ -0,0 +1,60 @@
+import numpy as np
+
+from engine.ensemble import EnsembleForecaster
+
+MEMBERS = ['NB', 'ZINB', 'Markov']
+
+
+def _naive_score(actual, predictions, previous, decay):
+    """Discounted member MAE / naive MAE, accumulated one week at a time"""
+    errors = np.zeros(len(predictions))
+    counts = np.zeros(len(predictions))
+    naive_error = naive_count = 0.0
+    for t, value in enumerate(actual):
+        errors *= decay
+        counts *= decay
+        naive_error *= decay
+        naive_count *= decay
+        for i, pred in enumerate(predictions):
+            if pred is not None:
+                errors[i] += abs(pred[t] - value)
+                counts[i] += 1
+        last = previous if t == 0 else actual[t - 1]
+        naive_error += abs(last - value)
+        naive_count += 1
+    return (errors / counts) / (naive_error / naive_count)
+
+
+def test_score_matches_weekly_accumulation():
+    rng = np.random.default_rng(1)
+    actual = rng.poisson(10, 30).astype(float)
+    predictions = [actual + rng.normal(0, s, 30) for s in (1.0, 3.0, 6.0)]
+    keys = [(20, w) for w in range(1, 31)]
+
+    ensemble = EnsembleForecaster(MEMBERS, decay=0.9)
+    assert ensemble.score(keys[:12], actual[:12], [p[:12] for p in predictions], previous=8.0) == 12
+    assert ensemble.score(keys, actual, predictions, previous=8.0) == 18
+
+    expected = _naive_score(actual, predictions, 8.0, 0.9)
+    np.testing.assert_allclose(ensemble.mase, expected)
+    assert np.argmax(ensemble.weights) == 0
+    np.testing.assert_allclose(ensemble.weights.sum(), 1.0)
+
+
+def test_score_skips_weeks_already_scored():
+    ensemble = EnsembleForecaster(MEMBERS)
+    keys = [(20, 1), (20, 2)]
+    ensemble.score(keys, [1.0, 2.0], [np.array([1.0, 2.0]), None, None], previous=0.0)
+    assert ensemble.score(keys, [1.0, 2.0], [np.array([5.0, 5.0]), None, None]) == 0
+
+
+def test_load_discards_state_from_another_version(tmp_path):
+    path = str(tmp_path / 'ensemble_state.json')
+    ensemble = EnsembleForecaster(MEMBERS)
+    ensemble.score([(20, 1)], [3.0], [np.array([2.0])] * 3, previous=1.0)
+    ensemble.dataset_version = 'v1'
+    ensemble.save(path)
+
+    assert EnsembleForecaster.load(path, MEMBERS, version='v1').n_scored == 1
+    fresh = EnsembleForecaster.load(path, MEMBERS, version='v2')
+    assert fresh.n_scored == 0 and fresh.last_key is None and fresh.dataset_version == 'v2'
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from engine.features import lag_tensor
+
+
+def test_lag_tensor_matches_shifted_copies():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(3, 20, 2))
+    lagged = lag_tensor(values, 2, 6)
+    assert lagged.shape == (3, 20, 2, 5)
+    for k, lag in enumerate(range(2, 7)):
+        expected = np.full_like(values, np.nan)
+        expected[:, lag:] = values[:, :-lag]
+        np.testing.assert_array_equal(lagged[..., k], expected)
+
+
+def test_lag_tensor_zero_lag_and_1d_input():
+    series = np.arange(10.0)
+    lagged = lag_tensor(series, 0, 1)
+    np.testing.assert_array_equal(lagged[0, :, 0, 0], series)
+    np.testing.assert_array_equal(lagged[0, 1:, 0, 1], series[:-1])
+    assert np.isnan(lagged[0, 0, 0, 1])
+
+
+def test_lag_tensor_rejects_bad_range():
+    with pytest.raises(ValueError):
+        lag_tensor(np.zeros(5), 3, 2)
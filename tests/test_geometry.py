@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from engine.geometry import SHAPELY_AVAILABLE, read_geometry_store, update_geometry_store, write_geometry_store
+
+pytestmark = pytest.mark.skipif(not SHAPELY_AVAILABLE, reason="shapely not installed")
+
+
+def _rows(names):
+    return pd.DataFrame({
+        'MUNICIPALITY': names,
+        'geometry': [f"POLYGON (({i} 0, {i + 1} 0, {i + 1} 1, {i} 1, {i} 0))" for i in range(len(names))],
+    })
+
+
+def test_update_geometry_store_extends_previous_version(tmp_path):
+    import shapely
+    write_geometry_store(['Ipil'], shapely.from_wkt(_rows(['Ipil'])['geometry']), 'v1', str(tmp_path))
+    assert update_geometry_store(_rows(['Ipil', 'Kabasalan']), 'v1', 'v2', artifact_dir=str(tmp_path))
+    names, _ = read_geometry_store('v2', str(tmp_path))
+    assert list(names) == ['Ipil', 'Kabasalan']
+
+
+def test_update_geometry_store_rejects_stale_store(tmp_path):
+    import shapely
+    write_geometry_store(['Ipil'], shapely.from_wkt(_rows(['Ipil'])['geometry']), 'v0', str(tmp_path))
+    assert not update_geometry_store(_rows(['Kabasalan']), 'v1', 'v2', artifact_dir=str(tmp_path))
+    assert read_geometry_store('v2', str(tmp_path)) is None
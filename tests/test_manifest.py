@@ -0,0 +1,32 @@
+import pandas as pd
+
+from engine.data import dataset_version
+from engine.manifest import MANIFEST_COLUMNS, current_manifest, load_manifest, update_manifest
+
+
+def _write(path, rows):
+    pd.DataFrame(rows, columns=MANIFEST_COLUMNS).to_csv(path, index=False)
+
+
+def test_update_manifest_matches_full_rebuild(tmp_path):
+    data_file = str(tmp_path / 'cases.csv')
+    _write(data_file, [['Ipil', 3, 19, 52], ['Imelda', 1, 20, 1]])
+    previous = dataset_version(data_file)
+    load_manifest(data_file, str(tmp_path))
+
+    new_rows = pd.DataFrame([['Kabasalan', 4, 22, 5]], columns=MANIFEST_COLUMNS)
+    new_rows.to_csv(data_file, mode='a', header=False, index=False)
+    updated = update_manifest(new_rows, previous, dataset_version(data_file), str(tmp_path))
+
+    (tmp_path / 'manifest.json').unlink()
+    rebuilt = load_manifest(data_file, str(tmp_path))
+    for field in ('records', 'total_cases', 'municipalities', 'years', 'year_min', 'year_max',
+                  'last_year', 'last_week'):
+        assert updated[field] == rebuilt[field]
+    assert rebuilt['years'] == [19, 20, 22]
+
+
+def test_current_manifest_is_none_for_unreadable_csv(tmp_path):
+    data_file = tmp_path / 'cases.csv'
+    data_file.write_text('MUNICIPALITY,CASES\nIpil,3\n')
+    assert current_manifest(str(data_file), str(tmp_path)) is None
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from engine.models import (
+    STATSMODELS_AVAILABLE, find_columns, fit_nb_with_env, independent_columns, prepare_full_regression_data,
+)
+from engine.seasonal import SeasonalDecomposition
+
+
+def test_independent_columns_skips_linear_combinations():
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(size=(2, 50))
+    X = np.column_stack([np.ones(50), a, b, 2 * a - b, np.full(50, 3.0), a + 1e-9 * rng.normal(size=50)])
+    assert independent_columns(X) == [0, 1, 2]
+
+
+@pytest.mark.skipif(not STATSMODELS_AVAILABLE, reason="statsmodels not installed")
+def test_significance_design_is_full_rank(cases_frame):
+    # Specific humidity as an exact rescaling of relative humidity
+    cases_frame['QV2M'] = cases_frame['RH2M'] * 0.2
+    cols = find_columns(cases_frame)
+    results, names = fit_nb_with_env(prepare_full_regression_data(cases_frame, cols))
+
+    X = results.model.exog
+    assert np.linalg.matrix_rank(X) == X.shape[1] == len(names)
+    assert not np.isnan(X).any()
+    assert 'Humidity (lag 2-12 wk)' in names
+    assert 'Specific Humidity (lag 2-12 wk)' not in names
+
+
+def test_full_regression_data_carries_province_seasonal_component(cases_frame):
+    cols = find_columns(cases_frame)
+    time_series = prepare_full_regression_data(cases_frame, cols)
+    decomposition = SeasonalDecomposition.from_frame(cases_frame, cols)
+    np.testing.assert_allclose(time_series['seasonal'], decomposition.seasonal[-1])
@@ -0,0 +1,18 @@
+import pandas as pd
+
+from engine.pipeline import SCAN_ARTIFACT, read_scan_artifact, write_parquet
+
+
+def test_empty_scan_artifact_keeps_its_version(tmp_path):
+    empty = pd.DataFrame(columns=['rank', 'cluster', 'municipalities', 'llr', 'p_value'])
+    write_parquet(empty, str(tmp_path / SCAN_ARTIFACT), 'v1')
+
+    clusters = read_scan_artifact(str(tmp_path), version='v1')
+    assert clusters is not None and len(clusters) == 0
+    assert read_scan_artifact(str(tmp_path), version='v2') is None
+
+
+def test_unversioned_artifact_counts_as_missing(tmp_path):
+    write_parquet(pd.DataFrame({'cluster': [1]}), str(tmp_path / SCAN_ARTIFACT))
+    assert read_scan_artifact(str(tmp_path), version='v1') is None
+    assert len(read_scan_artifact(str(tmp_path))) == 1